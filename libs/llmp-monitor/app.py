@@ -12,11 +12,12 @@ def main(base_path):
     # Add a top navigation menu
     menu = ["Metadata", "Generation Log", "Event Log"]
 
-    # Load job data
-    metadata, event_logs, generation_logs = utils.load_job(base_path, selected_job_id)
+    # Load job data (logs are loaded per page)
+    metadata = utils.load_job(base_path, selected_job_id)
 
     components.display_header(metadata, selected_job_id)
-    components.display_job_sidebar(metadata, event_logs)
+    job_metrics = utils.load_job_metrics(base_path, selected_job_id)
+    components.display_job_sidebar(metadata, job_metrics)
 
     tab1, tab2, tab3 = st.tabs(menu)
 
@@ -24,10 +25,10 @@ def main(base_path):
     components.display_metadata(tab1, metadata, base_path, selected_job_id)
 
     # tab 2 - generation log
-    components.display_generation_logs(tab2, generation_logs, base_path, selected_job_id)
+    components.display_generation_logs(tab2, base_path, selected_job_id)
 
     # tab 3 - event log
-    components.display_event_logs(tab3, event_logs)
+    components.display_event_logs(tab3, base_path, selected_job_id)
 
 
 if __name__ == "__main__":
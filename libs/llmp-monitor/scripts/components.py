@@ -1,4 +1,3 @@
-import pandas as pd
 import streamlit as st
 from scripts import utils
 
@@ -37,8 +36,8 @@ def display_sidebar(base_path):
     return selected_job_id, base_path
 
 
-def display_job_sidebar(metadata, event_logs):
-    if not metadata or not event_logs:
+def display_job_sidebar(metadata, job_metrics):
+    if not metadata or job_metrics is None:
         st.sidebar.write("...")
         return
 
@@ -57,46 +56,49 @@ def display_job_sidebar(metadata, event_logs):
     # version
 
 
-    # metrics
-    generation_events = [event for event in event_logs if event["event_type"] == "generation"]
-    if len(generation_events) > 0:
-        metrics_current_version = [
-            event["event_metrics"] for event in generation_events if event["job_version"] == current_version
-        ]
-        metrics_previous_versions = [
-            event["event_metrics"] for event in generation_events if event["job_version"] == current_version - 1
-        ]
+    # metrics (from the rollup of the job, no scan of the event log)
+    if job_metrics.versions:
+        current = job_metrics.summary(current_version)
+        previous = job_metrics.summary(current_version - 1)
 
-        # Filter df for current and previous versions
-        current_df = pd.DataFrame(metrics_current_version)
-        previous_df = pd.DataFrame(metrics_previous_versions)
-
-        current_df = previous_df if current_df.empty else current_df
+        current = previous if not current["count"] else current
+        has_previous = bool(previous["count"])
 
         # Delta color
-        delta_color = "inverse" if not previous_df.empty else "off"
+        delta_color = "inverse" if has_previous else "off"
+
+        def delta(metric, key="mean"):
+            if not has_previous:
+                return 0
+            return (current[metric][key] or 0) - (previous[metric][key] or 0)
 
         # Execution time
-        mean_exec_time_current = current_df["execution_time"].mean() if not current_df.empty else 0
-        mean_exec_time_previous = previous_df["execution_time"].mean() if not previous_df.empty else 0
-        delta_exec_time = mean_exec_time_current - mean_exec_time_previous if not previous_df.empty else 0
         st.sidebar.metric(
             "Execution time",
-            value=f"{mean_exec_time_current:.2f} s",
-            delta=f"{delta_exec_time:.2f} s",
+            value=f"{current['execution_time']['mean'] or 0:.2f} s",
+            delta=f"{delta('execution_time'):.2f} s",
+            delta_color=delta_color)
+        st.sidebar.metric(
+            "Execution time (p95)",
+            value=f"{current['execution_time']['p95'] or 0:.2f} s",
+            delta=f"{delta('execution_time', 'p95'):.2f} s",
             delta_color=delta_color)
 
         # Token usage
-        mean_token_usage_current = current_df["token_usage"].mean() if not current_df.empty else 0
-        mean_token_usage_previous = previous_df["token_usage"].mean() if not previous_df.empty else 0
-        delta_token_usage = mean_token_usage_current - mean_token_usage_previous if not previous_df.empty else 0
-        st.sidebar.metric("Token usage", value=mean_token_usage_current, delta=delta_token_usage, delta_color=delta_color)
+        st.sidebar.metric(
+            "Token usage",
+            value=f"{current['token_usage']['mean'] or 0:.0f}",
+            delta=f"{delta('token_usage'):.0f}",
+            delta_color=delta_color)
 
         # failure rate
-        failure_rate_current = current_df["failure_rate"].mean() - 1 if not current_df.empty else 0
-        failure_rate_previous = previous_df["failure_rate"].mean() - 1 if not previous_df.empty else 0
-        delta_failure_rate = failure_rate_current - failure_rate_previous if not previous_df.empty else 0
-        st.sidebar.metric("Failure rate", value=failure_rate_current, delta=delta_failure_rate, delta_color=delta_color)
+        failure_rate = current["failure_rate"] or 0
+        delta_failure_rate = failure_rate - (previous["failure_rate"] or 0) if has_previous else 0
+        st.sidebar.metric(
+            "Failure rate",
+            value=f"{failure_rate:.1%}",
+            delta=f"{delta_failure_rate:.1%}",
+            delta_color=delta_color)
 
 
 # ============================== Tabs ==============================
@@ -146,8 +148,8 @@ def display_editable_metadata(tab, metadata):
 # === Generation Log ===
 
 
-def display_generation_logs(tab, generation_logs, base_path, job_id):
-    if generation_logs is None:
+def display_generation_logs(tab, base_path, job_id):
+    if not utils.has_generation_log(base_path, job_id):
         tab.write("No generation log found!")
         return None
     tab.markdown("## Generation Logs")
@@ -155,16 +157,18 @@ def display_generation_logs(tab, generation_logs, base_path, job_id):
                  "Changes to the output of a generation event will be marked as 'Human Verified' in the event log and "
                  "will have a higher rank (weight) in optimization runs.\n"
                  "When you click 'Save changes', all generation events will be marked as 'Human Verified'.\n\n---")
-    generation_log_entries(tab, generation_logs, base_path, job_id)
+    page, page_size, newest_first = display_paging(tab, utils.count_generation_log(base_path, job_id), "gen")
+    generation_logs = utils.load_generation_log_page(base_path, job_id, page, page_size, newest_first)
+    generation_log_entries(tab, generation_logs, base_path, job_id, offset=page * page_size)
 
 
-def generation_log_entries(tab, generation_logs, base_path, job_id):
+def generation_log_entries(tab, generation_logs, base_path, job_id, offset=0):
     edited_generation_logs = []
-    for i, entry in enumerate(generation_logs):
+    for i, entry in enumerate(generation_logs, start=offset):
         unique_key = f"gen_{i}_{entry['event_id']}"
         edited_entry = _generation_log_entry(tab, entry)
         if tab.button("Save changes", key=unique_key):
-            utils.update_jsonl_entry(base_path, job_id, "generation_log.jsonl", edited_entry)
+            utils.update_generation_log_entry(base_path, job_id, edited_entry)
             tab.write("Changes saved!")
         edited_generation_logs.append(edited_entry)
         tab.divider()
@@ -209,11 +213,21 @@ def _generation_log_entry(tab, entry):
 
 # === Event Log ===
 
-def display_event_logs(tab, event_logs):
-    if event_logs is None:
+def display_event_logs(tab, base_path, job_id):
+    if not utils.has_event_log(base_path, job_id):
         tab.write("No event log found!")
         return None
 
+    facets = utils.event_log_facets(base_path, job_id)
+    col1, col2 = tab.columns(2)
+    event_type = col1.multiselect("Event type", facets["event_type"], key="event_type_filter") or None
+    job_version = col2.multiselect("Job version", facets["job_version"], key="job_version_filter") or None
+
+    total = utils.count_event_log(base_path, job_id, event_type=event_type, job_version=job_version)
+    page, page_size, newest_first = display_paging(tab, total, "event")
+    event_logs = utils.load_event_log_page(
+        base_path, job_id, page, page_size, event_type=event_type, job_version=job_version, newest_first=newest_first
+    )
     for event in event_logs:
         display_event_entry(tab, event)
         tab.markdown("---")
@@ -226,6 +240,17 @@ def display_event_entry(tab, event):
 
 
 # === Utils ===
+def display_paging(tab, total, key):
+    """Display the paging controls of a log. Returns the page (0-based), page size and order."""
+    col1, col2, col3 = tab.columns([1, 1, 2])
+    page_size = col2.selectbox("Page size", [20, 50, 100, 200], index=1, key=f"{key}_page_size")
+    num_pages = utils.num_pages(total, page_size)
+    page = col1.number_input("Page", min_value=1, max_value=num_pages, value=1, key=f"{key}_page")
+    newest_first = col3.checkbox("Newest first", value=True, key=f"{key}_newest_first")
+    col3.write(f"{total} entries, {num_pages} pages")
+    return int(page) - 1, page_size, newest_first
+
+
 def display_text_input_by_size(tab, label, value, key=None):
     if key is None:
         key = label
@@ -5,6 +5,8 @@ import os
 
 import uuid
 
+from llmp.services.log_segments import SegmentedLog
+
 def is_valid_uuid(s):
     try:
         uuid.UUID(str(s))
@@ -158,7 +160,7 @@ metadata_placeholder = st.empty()
 generation_log_placeholder = st.empty()
 
 # Load and display metadata and generation log
-if os.path.exists(metadata_path) and os.path.exists(generation_log_path):
+if os.path.exists(metadata_path):
     if choice == "Metadata":
         metadata = load_json(metadata_path)
         edited_metadata = display_metadata(metadata)
@@ -169,10 +171,8 @@ if os.path.exists(metadata_path) and os.path.exists(generation_log_path):
             save_json(edited_metadata, metadata_path, base_path)
     elif choice == "Generation Log":
         generation_log_placeholder.write('Generation Log:')
-        with open(generation_log_path, 'r') as f:
-            for line in f:
-                entry = json.loads(line)
-                display_generation_entry(entry)
+        for entry in SegmentedLog(generation_log_path):
+            display_generation_entry(entry)
 else:
     st.write(f"No data found for job {selected_job_name}")
     st.write(f"in path: {metadata_path}")
@@ -1,7 +1,17 @@
 import json
+import math
 import os
 import uuid
 import streamlit as st
+from pathlib import Path
+
+from llmp.data_model.version_history import compute_delta, new_entry
+from llmp.services.example_store import ExampleStore
+from llmp.services.log_index import LogIndex
+from llmp.services.log_segments import SegmentedLog
+from llmp.services.metrics import METRICS_FILE, MetricsRollup
+
+PAGE_SIZE = 50
 
 
 def is_valid_uuid(s):
@@ -23,21 +33,13 @@ def save_registry(job_register, base_path):
         json.dump(job_register, f)
 
 
-def update_jsonl_entry(base_path, job_id, filename, entry):
-    filepath = os.path.join(base_path, job_id, filename)
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            data = [json.loads(line) for line in f]
-        for i, item in enumerate(data):
-            if item["event_id"] == entry["event_id"]:
-                data[i] = entry
-                break
-        with open(filepath, 'w') as f:
-            for item in data:
-                json.dump(item, f)
-                f.write('\n')
-        return data
-    return None
+def update_generation_log_entry(base_path, job_id, entry):
+    """Record an edited generation in the update overlay of the generation log (see llmp.services.log_segments).
+
+    JobStorage reads the generation log through the same overlay.
+    """
+    SegmentedLog(Path(base_path) / job_id / "generation_log.jsonl").update([entry])
+    return entry
 
 
 def append_jsonl_entry(base_path, job_id, filename, entry):
@@ -58,6 +60,135 @@ def load_jsonl(base_path, job_id, filename):
         return data
     return None
 
+# === Logs (paged) ===
+# Pages are read via the byte-offset index of the logs (llmp.services.log_index). The cached functions take the
+# signature (mtime, size) of the log files as argument, so the cache is invalidated when a log changes.
+
+
+def file_signature(*filepaths):
+    signature = []
+    for filepath in filepaths:
+        stat = os.stat(filepath) if os.path.exists(filepath) else None
+        signature.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+    return tuple(signature)
+
+
+def num_pages(total, page_size=PAGE_SIZE):
+    return max(math.ceil(total / page_size), 1)
+
+
+def _event_log_path(base_path, job_id):
+    return Path(base_path) / job_id / "event_log.jsonl"
+
+
+def _generation_log_paths(base_path, job_id):
+    filepath = Path(base_path) / job_id / "generation_log.jsonl"
+    generation_log = SegmentedLog(filepath)
+    return filepath, generation_log.manifest_path, generation_log.updates_path
+
+
+def has_event_log(base_path, job_id):
+    return _event_log_path(base_path, job_id).exists()
+
+
+def has_generation_log(base_path, job_id):
+    return any(path.exists() for path in _generation_log_paths(base_path, job_id)[:2])
+
+
+def event_log_facets(base_path, job_id):
+    """Return the event types and job versions in the event log."""
+    filepath = _event_log_path(base_path, job_id)
+    return _event_log_facets(str(filepath), file_signature(filepath))
+
+
+def count_event_log(base_path, job_id, event_type=None, job_version=None):
+    filepath = _event_log_path(base_path, job_id)
+    return _count_event_log(str(filepath), file_signature(filepath), event_type, job_version)
+
+
+def load_event_log_page(base_path, job_id, page, page_size=PAGE_SIZE, event_type=None, job_version=None,
+                        newest_first=True):
+    """Load a page (0-based) of the event log, filtered by event type(s) and job version(s)."""
+    filepath = _event_log_path(base_path, job_id)
+    return _event_log_page(
+        str(filepath), file_signature(filepath), page, page_size, event_type, job_version, newest_first
+    )
+
+
+def count_generation_log(base_path, job_id):
+    filepath, *related_paths = _generation_log_paths(base_path, job_id)
+    return _count_generation_log(str(filepath), file_signature(filepath, *related_paths))
+
+
+def load_generation_log_page(base_path, job_id, page, page_size=PAGE_SIZE, newest_first=True):
+    """Load a page (0-based) of the generation log across rotated segments."""
+    filepath, *related_paths = _generation_log_paths(base_path, job_id)
+    return _generation_log_page(str(filepath), file_signature(filepath, *related_paths), page, page_size, newest_first)
+
+
+def _as_filter(value):
+    return list(value) if isinstance(value, (list, tuple, set)) else value
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _event_log_facets(filepath, signature):
+    index = LogIndex(Path(filepath))
+    return dict(event_type=index.distinct("event_type"), job_version=index.distinct("job_version"))
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _count_event_log(filepath, signature, event_type, job_version):
+    index = LogIndex(Path(filepath))
+    return len(index.positions(event_type=_as_filter(event_type), job_version=_as_filter(job_version)))
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _event_log_page(filepath, signature, page, page_size, event_type, job_version, newest_first):
+    index = LogIndex(Path(filepath))
+    entries, _ = index.page(
+        page, page_size, reverse=newest_first, event_type=_as_filter(event_type), job_version=_as_filter(job_version)
+    )
+    return entries
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _count_generation_log(filepath, signature):
+    return SegmentedLog(Path(filepath)).count()
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _generation_log_page(filepath, signature, page, page_size, newest_first):
+    generation_log = SegmentedLog(Path(filepath))
+    total = generation_log.count()
+    if not newest_first:
+        return generation_log.read_range(page * page_size, (page + 1) * page_size)
+    stop = max(total - page * page_size, 0)
+    return generation_log.read_range(max(stop - page_size, 0), stop)[::-1]
+
+
+def load_job_metrics(base_path, job_id):
+    """Load the metric rollup of a job, built from the event log if the job has no rollup yet."""
+    data = load_json(base_path, job_id, METRICS_FILE)
+    if data:
+        return MetricsRollup.from_dict(data)
+    filepath = _event_log_path(base_path, job_id)
+    return MetricsRollup.from_dict(_rollup_from_event_log(str(filepath), file_signature(filepath)))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _rollup_from_event_log(filepath, signature):
+    return MetricsRollup.from_events(_iter_jsonl(filepath)).to_dict()
+
+
+def _iter_jsonl(filepath):
+    if not os.path.exists(filepath):
+        return
+    with open(filepath, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
 def load_json(base_path, job_id, filename):
     filepath = os.path.join(base_path, job_id, filename)
     if os.path.exists(filepath):
@@ -71,7 +202,7 @@ def save_metadata(data, filename, base_path, job_id):
     old_data = load_json(base_path, data["idx"], filename)
     if compare_metadata(old_data, data):
         data["version"] = old_data["version"] + 1
-        append_jsonl_entry(base_path, job_id, "version_history.jsonl", old_data)
+        append_version_entry(base_path, job_id, old_data, data)
 
     if old_data["job_name"] != data["job_name"]:
         registry = load_registry(base_path)
@@ -84,6 +215,24 @@ def save_metadata(data, filename, base_path, job_id):
     st.rerun()
 
 
+def append_version_entry(base_path, job_id, old_data, new_data):
+    """Append the delta of a metadata edit to the version history."""
+    examples = ExampleStore(Path(base_path) / job_id / "examples.jsonl").load()
+    example_ids = [example["idx"] for example in examples]
+    old_state = dict(instruction=old_data.get("instruction"), example_ids=example_ids, config=old_data.get("config") or {})
+    new_state = dict(instruction=new_data.get("instruction"), example_ids=example_ids, config=new_data.get("config") or {})
+
+    filepath = os.path.join(base_path, job_id, "version_history.jsonl")
+    if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
+        with open(filepath, 'a') as f:
+            json.dump(new_entry(old_data["version"], None, old_state), f)
+            f.write('\n')
+    append_jsonl_entry(
+        base_path, job_id, "version_history.jsonl",
+        new_entry(new_data["version"], compute_delta(old_state, new_state), new_state)
+    )
+
+
 def compare_metadata(old_data, new_data):
     for key, value in old_data.items():
         if value != new_data[key]:
@@ -137,8 +286,5 @@ def editable_io_model(tab, model, prefix):
 
 
 def load_job(base_path, selected_job_id):
-    # Load metadata
-    metadata = load_json(base_path, selected_job_id, "metadata.json")
-    event_logs = load_jsonl(base_path, selected_job_id, "event_log.jsonl")
-    generation_logs = load_jsonl(base_path, selected_job_id, "generation_log.jsonl")
-    return metadata, event_logs, generation_logs
+    """Load the metadata of a job. Logs are loaded per page (see load_event_log_page, load_generation_log_page)."""
+    return load_json(base_path, selected_job_id, "metadata.json")
@@ -0,0 +1,128 @@
+"""Import-time benchmark with a budget check.
+
+Each module (or `module:name` for `from module import name`) is imported in a fresh interpreter (--repeat
+times, the median is reported). The import time excludes the interpreter startup, the process time includes
+it (cold start of a CLI tool or worker).
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5]
+    python benchmarks/bench_import.py structgenie.engine:StructEngine llmp --budget llmp=0.5
+
+Exits with 1 if an import fails, exceeds its budget (seconds) or loads one of its lazy dependencies, heavy
+packages that should only be imported on first use. Which structgenie is measured depends on the path,
+e.g. PYTHONPATH=../structgenie for the one in this repository.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# llmp modules importing numpy (checked instead of numpy itself, the released structgenie loads it via langchain)
+LLMP_NUMPY_MODULES = [
+    "llmp.utils.stats", "llmp.components.evaluation.run_metrics", "llmp.components.evaluation.metrics",
+    "llmp.services.analytics",
+]
+HEAVY_MODULES = [
+    "langchain", "openai", "mistralai", "tiktoken", "colorama", "nest_asyncio", "tqdm", "dotenv", "numpy",
+    *LLMP_NUMPY_MODULES,
+]
+
+# module: (import-time budget in seconds, dependencies that must not be loaded by the import)
+DEFAULT_BUDGETS = {
+    "structgenie": (0.1, HEAVY_MODULES),
+    "structgenie.engine:StructEngine": (0.3, ["langchain", "openai", "tiktoken", "colorama", "nest_asyncio", "numpy"]),
+    # report only, the released structgenie engine imports its drivers eagerly
+    "llmp.services.program": (None, ["tqdm", "nest_asyncio", "dotenv", *LLMP_NUMPY_MODULES]),
+}
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_statement(spec: str) -> str:
+    module, _, name = spec.partition(":")
+    return f"from {module} import {name}" if name else f"import {module}"
+
+
+def measure(module: str, repeat: int) -> dict:
+    import_times, process_times = [], []
+    loaded = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(statement=import_statement(module), heavy=HEAVY_MODULES)],
+            capture_output=True, text=True,
+        )
+        process_times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode
+            raise RuntimeError(f"{import_statement(module)} failed: {error}")
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        import_times.append(data["seconds"])
+        loaded = data["loaded"]
+    return dict(
+        import_seconds=statistics.median(import_times),
+        process_seconds=statistics.median(process_times),
+        loaded=loaded,
+    )
+
+
+def parse_budgets(values: list[str]) -> dict[str, float]:
+    budgets = {}
+    for value in values:
+        module, _, seconds = value.partition("=")
+        budgets[module] = float(seconds)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", help="modules to import. Defaults to the modules with budgets.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", action="append", default=[], help="module=seconds, overrides the default")
+    parser.add_argument("--save", default=None, help="write the results to a json file")
+    args = parser.parse_args()
+
+    budgets = {module: budget for module, (budget, _) in DEFAULT_BUDGETS.items()}
+    budgets.update(parse_budgets(args.budget))
+    modules = args.modules or list(budgets)
+
+    ok = True
+    results = {}
+    print(f"{'module':<34}{'import [ms]':>12}{'process [ms]':>14}{'budget [ms]':>13}  lazy dependencies loaded")
+    for module in modules:
+        try:
+            result = results[module] = measure(module, args.repeat)
+        except RuntimeError as e:
+            print(f"{module:<34}  {e}", file=sys.stderr)
+            ok = False
+            continue
+        budget = budgets.get(module)
+        lazy = DEFAULT_BUDGETS.get(module, (None, []))[1]
+        violations = [m for m in result["loaded"] if m in lazy]
+
+        flag = ""
+        if budget is not None and result["import_seconds"] > budget:
+            ok, flag = False, "  OVER BUDGET"
+        if violations:
+            ok = False
+        budget_ms = f"{budget * 1000:.0f}" if budget is not None else "-"
+        print(f"{module:<34}{result['import_seconds'] * 1000:>12.1f}{result['process_seconds'] * 1000:>14.1f}"
+              f"{budget_ms:>13}  {', '.join(violations) or '-'}{flag}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
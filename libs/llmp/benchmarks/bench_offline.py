@@ -0,0 +1,250 @@
+"""Offline benchmark of the llmp framework overhead.
+
+All generations are answered by the FakeDriver (llmp.integration.fake_driver), token counting is approximated
+instead of loading the tiktoken encoding, so the suite runs without network access. With the default latency
+of 0 the results measure the framework overhead only (prompt building, parsing, validation, logging, storage).
+
+Benchmarks:
+    program         Program.__call__ (default generator, incl. generation logging)
+    async           AsyncGenerator.generate with --runs concurrent engines
+    major_vote      MajorVoteGenerator.generate with --runs votes
+    evaluation      EvaluationEngine.evaluate on the job's examples
+    optimizer       ExampleOptimizer.evaluate and InstructionOptimizer.evaluate of two job settings
+    parser          OutputParser.parse + Validator.validate of a generation output
+    storage         JobStorage.store_logs, get and load_event_log
+
+Usage:
+    python benchmarks/bench_offline.py [--iterations 100] [--latency 0] [--error-rate 0] [--only program,parser]
+    python benchmarks/bench_offline.py --save results.json
+    python benchmarks/bench_offline.py --compare results.json [--max-regression 0.2]
+
+Reports throughput, latency percentiles (per operation), the peak/retained memory of an operation
+(tracemalloc, measured in a separate pass) and the number of failed operations (see --error-rate). With --compare the exit code is 1 if the throughput of a
+benchmark dropped by more than --max-regression against the saved results.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Literal
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline")
+
+import structgenie.base
+import structgenie.utils.helper
+from structgenie.components.output_parser.output_parser import OutputParser
+from structgenie.components.validation import Validator
+from structgenie.pydantic_v1 import BaseModel
+
+from llmp.components.evaluation.engine import EvaluationEngine
+from llmp.components.generator import AsyncGenerator, MajorVoteGenerator
+from llmp.components.optimizer.examples import ExampleOptimizer
+from llmp.components.optimizer.instructions import InstructionOptimizer
+from llmp.components.settings.program_settings import ProgramSettings
+from llmp.integration.fake_driver import FakeDriver, lognormal
+from llmp.services.job_manager import JobManager
+from llmp.services.program import Program
+
+OUTPUT = {"sentiment": "positive", "score": 3}
+
+
+class Input(BaseModel):
+    text: str
+
+
+class Output(BaseModel):
+    sentiment: Literal["positive", "negative"]
+    score: int
+
+
+def approx_count_tokens(string: str, encoding_name: str = "cl100k_base") -> int:
+    return len(string) // 4
+
+
+def create_job(job_manager: JobManager, num_examples: int):
+    job = job_manager.create_job(
+        "bench",
+        instruction="Classify the sentiment of the text and rate it from 1 to 5.",
+        input_examples=[Input(text=f"example text {i}") for i in range(num_examples)],
+        output_examples=[Output(**OUTPUT) for _ in range(num_examples)],
+    )
+    # explicit jobs are evaluated by comparison with the ideal output (no LLM grading)
+    job.is_explicit = True
+    return job
+
+
+# === Measurement ===
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+def measure(fn: Callable[[int], object], iterations: int, warmup: int, memory_iterations: int) -> dict:
+    def call(i) -> bool:
+        # injected driver errors that are not output errors are raised by the engine
+        try:
+            fn(i)
+            return True
+        except Exception:
+            return False
+
+    for i in range(warmup):
+        call(i)
+
+    gc.collect()
+    latencies = []
+    num_failed = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        op_start = time.perf_counter()
+        num_failed += not call(i)
+        latencies.append(time.perf_counter() - op_start)
+    total = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for i in range(memory_iterations):
+        call(iterations + i)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return dict(
+        iterations=iterations,
+        failed=num_failed,
+        ops_per_sec=iterations / total,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p95_ms=percentile(latencies, 0.95) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        peak_kib=(peak - base) / 1024,
+        retained_kib_per_op=(current - base) / 1024 / max(memory_iterations, 1),
+    )
+
+
+# === Benchmarks ===
+
+def benchmarks(base_path: Path, args) -> dict[str, Callable[[int], object]]:
+    job_manager = JobManager(str(base_path / "jobs"), background_logging=False)
+    job = create_job(job_manager, args.examples)
+    settings = [{"example_ids": [record.idx for record in job.example_records[:n]]} for n in (1, 2)]
+
+    program = Program(
+        "bench-program",
+        input_model=Input,
+        output_model=Output,
+        config=ProgramSettings(base_path=str(base_path / "program")),
+        instruction="Classify the sentiment of the text and rate it from 1 to 5.",
+        input_examples=[Input(text="example text")],
+        output_examples=[Output(**OUTPUT)],
+    )
+
+    example_optimizer = ExampleOptimizer(job, test_set=job.example_records[:2], display_progress=False)
+    example_optimizer.RUN_PER_SAMPLE = args.runs
+    instruction_optimizer = InstructionOptimizer(job, test_set=job.example_records[:2], display_progress=False)
+    instruction_optimizer.RUN_PER_SAMPLE = args.runs
+
+    parser = OutputParser(job.output_model, fix_by_llm=False, fix_partial_by_llm=False)
+    validator = Validator.from_output_model(job.output_model)
+    text = "Sentiment: positive\nScore: 3\n"
+
+    storage = job_manager.job_storage
+
+    def store_logs(i):
+        job.log_generation({"text": f"text {i}"}, OUTPUT, {"execution_time": 0.1, "token_usage": 100})
+        storage.store_logs(job)
+        storage.get(idx=job.idx)
+        return storage.load_event_log(job)
+
+    def parse(i):
+        output, _, _ = parser.parse(text, {})
+        return validator.validate(output, {})
+
+    return {
+        "program": lambda i: program({"text": f"text {i}"}),
+        "async": lambda i: AsyncGenerator(job, num_runs=args.runs).generate({"text": f"text {i}"}),
+        "major_vote": lambda i: MajorVoteGenerator(job, num_votes=args.runs).generate({"text": f"text {i}"}),
+        "evaluation": lambda i: EvaluationEngine(job, args.runs).evaluate(job.example_records[:2]),
+        "optimizer": lambda i: (example_optimizer.evaluate(settings), instruction_optimizer.evaluate(settings)),
+        "parser": parse,
+        "storage": store_logs,
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> bool:
+    """Print the throughput change against the baseline. Returns False on regressions."""
+    ok = True
+    print(f"\n{'benchmark':<14}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["ops_per_sec"], result["ops_per_sec"]
+        change = after / before - 1
+        flag = ""
+        if change < -max_regression:
+            ok, flag = False, "  REGRESSION"
+        print(f"{name:<14}{before:>12.1f}{after:>12.1f}{change:>+10.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100, help="measured operations per benchmark")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--memory-iterations", type=int, default=10, help="operations traced for allocations")
+    parser.add_argument("--runs", type=int, default=5, help="runs/votes of the async, major vote and eval benchmarks")
+    parser.add_argument("--examples", type=int, default=5, help="examples of the benchmark job")
+    parser.add_argument("--latency", type=float, default=0.0, help="median fake LLM latency in seconds (lognormal)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake LLM calls that raise")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", default=None, help="comma separated benchmarks to run")
+    parser.add_argument("--save", default=None, help="write the results to a json file")
+    parser.add_argument("--compare", default=None, help="compare the throughput with saved results")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+    # the engines log the traceback of every failed run
+    logging.getLogger("error_logger").disabled = True
+
+    driver = FakeDriver.configure(
+        responses=[OUTPUT],
+        latency=lognormal(args.latency) if args.latency else 0.0,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            mock.patch.object(structgenie.utils.helper, "count_tokens", approx_count_tokens), \
+            mock.patch.object(structgenie.base, "count_tokens", approx_count_tokens), \
+            mock.patch("llmp.data_model.job_record.load_driver_by_model", return_value=driver):
+        suite = benchmarks(Path(tmp_dir), args)
+        selected = args.only.split(",") if args.only else list(suite)
+
+        print(f"{'benchmark':<14}{'ops/s':>10}{'p50 [ms]':>10}{'p95 [ms]':>10}{'p99 [ms]':>10}"
+              f"{'peak [KiB]':>12}{'retained/op':>13}{'failed':>8}")
+        for name in selected:
+            result = measure(suite[name], args.iterations, args.warmup, args.memory_iterations)
+            results[name] = result
+            print(f"{name:<14}{result['ops_per_sec']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                  f"{result['p99_ms']:>10.2f}{result['peak_kib']:>12.1f}{result['retained_kib_per_op']:>13.1f}"
+                  f"{result['failed']:>8}")
+
+    print(f"\nfake LLM calls: {driver.script.num_calls} (injected errors: {driver.script.num_errors})")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
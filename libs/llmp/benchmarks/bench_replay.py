@@ -0,0 +1,103 @@
+"""Replay recorded LLM traffic of a job against the current llmp version.
+
+Record the LLM calls for the inputs of a job once (calls the LLM):
+
+    python benchmarks/bench_replay.py record --base-path data/jobs --job <name|id> --archive traffic.jsonl.gz
+
+Replay them offline and measure the end-to-end throughput:
+
+    python benchmarks/bench_replay.py replay --base-path data/jobs --job <name|id> --archive traffic.jsonl.gz \
+        [--timing original] [--mode batch|call]
+
+Inputs are taken from the generation log of the job (--limit, --since) or from a jsonl file (--inputs).
+--mode batch runs Program.batch in chunks of --batch-size, --mode call calls the program per input.
+Both commands run on a copy of the job, so its logs are not changed. Calls that miss the archive (e.g. after a
+prompt change) are counted as failed inputs.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from llmp.components.settings.program_settings import ProgramSettings
+from llmp.data_model.job_record import load_driver_by_model, use_driver
+from llmp.integration.replay_driver import RecordingDriver, ReplayArchive, ReplayDriver
+from llmp.services.job_manager import JobManager
+from llmp.services.program import Program
+from llmp.utils.signature import is_valid_uuid
+
+
+def load_inputs(job_manager: JobManager, job_id: str, args) -> list[dict]:
+    if args.inputs:
+        with open(args.inputs) as f:
+            return [json.loads(line) for line in f if line.strip()][:args.limit]
+    generations = job_manager.get_generation_log(job_id, start=args.since)
+    return [generation["input"] for generation in generations][:args.limit]
+
+
+def run(program: Program, inputs: list[dict], args) -> dict:
+    num_failed = 0
+    start = time.perf_counter()
+    if args.mode == "batch":
+        for i in range(0, len(inputs), args.batch_size):
+            try:
+                program.batch(inputs[i:i + args.batch_size])
+            except Exception as e:
+                print(f"batch {i // args.batch_size} failed: {e!r}", file=sys.stderr)
+                num_failed += len(inputs[i:i + args.batch_size])
+    else:
+        for input_data in inputs:
+            try:
+                program(input_data)
+            except Exception as e:
+                print(f"input failed: {e!r}", file=sys.stderr)
+                num_failed += 1
+    total = time.perf_counter() - start
+    program.job_manager.flush_logs()
+    return dict(inputs=len(inputs), failed=num_failed, seconds=total, inputs_per_sec=len(inputs) / total)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["record", "replay"])
+    parser.add_argument("--base-path", default="data/jobs")
+    parser.add_argument("--job", required=True, help="name or id of the job")
+    parser.add_argument("--archive", required=True, help="path of the replay archive (gzip jsonl)")
+    parser.add_argument("--inputs", default=None, help="jsonl file of inputs instead of the generation log")
+    parser.add_argument("--since", default=None, help="only inputs of generations since (YYYYmmddHHMMSS)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--mode", choices=["batch", "call"], default="batch")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--timing", choices=["fast", "original"], default="fast", help="replay timing")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="factor of the recorded latencies")
+    args = parser.parse_args()
+
+    job_manager = JobManager(args.base_path)
+    if is_valid_uuid(args.job):
+        job = job_manager.get_job(idx=args.job)
+    else:
+        job = job_manager.get_job(name=args.job)
+    inputs = load_inputs(job_manager, job.idx, args)
+
+    with tempfile.TemporaryDirectory() as tmp_dir, ReplayArchive(args.archive) as archive:
+        shutil.copytree(Path(args.base_path) / job.idx, Path(tmp_dir) / job.idx)
+        program = Program(job.idx, config=ProgramSettings(**{**job.config, "base_path": tmp_dir}))
+
+        if args.command == "record":
+            driver = RecordingDriver.wrap(load_driver_by_model(job.config["model_name"]), archive)
+        else:
+            driver = ReplayDriver.configure(archive, timing=args.timing, time_scale=args.time_scale)
+        num_calls = len(archive)
+
+        with use_driver(driver):
+            result = run(program, inputs, args)
+
+    result["recorded_calls"] = len(archive) - num_calls
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark the JSON backends of the file storage on a generation log.
+
+Compares the previous writer (json + JSONEncoder per line, jsonlines reader) with the serializer backends
+of llmp.utils.serializer (bulk writelines + streaming reader).
+
+Usage:
+    python benchmarks/bench_serialization.py [--lines 1000000] [--repeat 3]
+
+Reports the best of --repeat runs.
+"""
+import argparse
+import gc
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import jsonlines
+
+from llmp.data_model.events import Event
+from llmp.types import EventType
+from llmp.utils.encoder import dumps_encoder
+from llmp.utils.filesystem import FileOperations
+from llmp.utils.serializer import get_serializer, orjson, msgspec
+
+
+def generation_log(num_lines: int) -> list[dict]:
+    event_id = uuid4().hex
+    return [
+        {
+            "event_id": f"{event_id}-{i}",
+            "timestamp": "20240101120000",
+            "inputs": {"text": f"input text {i}", "language": "en"},
+            "output": {"label": "positive", "score": i % 100 / 100},
+            "metrics": {"model_name": "gpt-3.5-turbo", "execution_time": 0.42, "token_usage": 123},
+        }
+        for i in range(num_lines)
+    ]
+
+
+def events(num_lines: int) -> list[Event]:
+    return [Event(event_type=EventType.GENERATION, event_metrics={"n": i}) for i in range(num_lines)]
+
+
+def bench_stdlib_per_line(file_path: Path, records: list, models: bool) -> tuple[float, float]:
+    start = time.perf_counter()
+    with file_path.open("w") as f:
+        f.write("".join(dumps_encoder(r.dict() if models else r) + "\n" for r in records))
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with jsonlines.open(file_path, mode="r") as reader:
+        count = sum(1 for _ in reader)
+    assert count == len(records)
+    return write_time, time.perf_counter() - start
+
+
+def bench_backend(file_path: Path, records: list, backend: str) -> tuple[float, float]:
+    file_ops = FileOperations()
+    file_ops._serializer = get_serializer(backend)
+
+    start = time.perf_counter()
+    file_ops._write_jsonl_file(file_path, records)
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    count = sum(1 for _ in file_ops._iter_jsonl_file(file_path))
+    assert count == len(records)
+    return write_time, time.perf_counter() - start
+
+
+def best_of(repeat: int, bench, *args) -> tuple[float, float]:
+    runs = []
+    for _ in range(repeat):
+        gc.collect()
+        runs.append(bench(*args))
+    return min(r[0] for r in runs), min(r[1] for r in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000, help="number of generation log lines")
+    parser.add_argument("--event-lines", type=int, default=100_000, help="number of Event models")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = ["json"] + [name for name, module in [("orjson", orjson), ("msgspec", msgspec)] if module is not None]
+    datasets = [
+        (f"generation log ({args.lines:,} dicts)", generation_log(args.lines), False),
+        (f"event log ({args.event_lines:,} Events)", events(args.event_lines), True),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = Path(tmp_dir) / "log.jsonl"
+        for name, records, models in datasets:
+            print(f"\n{name}")
+            print(f"{'backend':<24}{'write [s]':>12}{'read [s]':>12}")
+            write_time, read_time = best_of(args.repeat, bench_stdlib_per_line, file_path, records, models)
+            print(f"{'json per line (before)':<24}{write_time:>12.2f}{read_time:>12.2f}")
+            for backend in backends:
+                write_time, read_time = best_of(args.repeat, bench_backend, file_path, records, backend)
+                print(f"{backend:<24}{write_time:>12.2f}{read_time:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ from abc import ABC, abstractmethod
 from typing import Protocol, List, Dict, Optional, Any, Union
 
 from structgenie.pydantic_v1 import UUID4
-from tqdm import tqdm
 
 from llmp.data_model.events import Event
 from llmp.data_model import ExampleRecord, JobRecord
@@ -50,6 +49,7 @@ class BaseOptimizer(ABC):
         if (d := desc_length - len(description)) > 0:
             description += " " * d
 
+        from tqdm import tqdm
         return tqdm(
             total=length,
             desc=description,
@@ -1,6 +1,7 @@
 from llmp.components.base import BaseEvaluationEngine
 from llmp.data_model import JobRecord, ExampleRecord
 from llmp.components.generator import SequentialAsyncGenerator
+from llmp.components.evaluation.run_metrics import RunMetrics
 from llmp.data_model.events import Event
 from llmp.types import GenOutput
 import llmp.components.evaluation.metrics as metrics
@@ -12,15 +13,19 @@ class EvaluationEngine(BaseEvaluationEngine):
     and updating the job accordingly.
     """
 
-    def __init__(self, job: JobRecord, num_runs: int = 5):
+    def __init__(self, job: JobRecord, num_runs: int = 5, run_metrics: RunMetrics = None):
         """Initialize the EvaluationEngine with a job and job settings.
 
         Args:
             job: JobRecord
             num_runs: int
+            run_metrics: RunMetrics to collect the runs of all evaluations in, e.g. shared by the engines of an
+                evaluation grid to compare the settings (RunMetrics.stats). The metrics returned and logged by
+                evaluate only cover the runs of that call.
         """
         super().__init__(job)
         self._num_runs = num_runs
+        self.run_metrics = run_metrics if run_metrics is not None else RunMetrics()
 
     def evaluate(self, records: list[ExampleRecord], job_settings: dict = None):
         """Evaluate the generated examples for a specific job."""
@@ -30,45 +35,38 @@ class EvaluationEngine(BaseEvaluationEngine):
         results = generator.generate(input_data=[record.input for record in records])
         assert len(results) == len(records)
 
-        sample_metrics = []
-        for outputs_metrics, sample_record in zip(results, records):
-            sample_metric = self.compute_sample_metrics(outputs_metrics, sample_record.output, sample_record.input)
+        evaluation = RunMetrics(capacity=max(len(records) * self._num_runs, 1))
+        for sample, (outputs_metrics, sample_record) in enumerate(zip(results, records)):
+            outputs, run_metrics = [o for o, _ in outputs_metrics], [m for _, m in outputs_metrics]
+            accuracy = self.compute_accuracy(outputs, sample_record.output, sample_record.input)
+            evaluation.add_runs(run_metrics, setting=job_settings, sample=sample, accuracy=accuracy)
+        self.run_metrics.extend(evaluation)
 
-            sample_metrics.append(sample_metric)
+        for sample_metric, sample_record in zip(evaluation.sample_summaries(), records):
             self.job.log_event(
                 Event.from_sample_metric(sample_metric, job_settings, example_id=sample_record.idx)
             )
 
-        aggregated_metrics = self.compute_metrics(sample_metrics)
+        aggregated_metrics = evaluation.setting_summary()
 
         self.job.log_event(
             Event.from_evaluation_metric(aggregated_metrics, job_settings, example_ids=[r.idx for r in records])
         )
         return aggregated_metrics
 
+    def compute_accuracy(self, outputs: list[dict], ideal_output: dict, sample_input: dict):
+        """Return the accuracy (1.0 match, 0.0 no match) of each output."""
+        if self.job.is_explicit:
+            return metrics.explicit_matches(outputs, ideal_output)
+        return metrics.implicit_matches(outputs, ideal_output, self.job, sample_input)
+
     def compute_sample_metrics(self, outputs_metrics: list[GenOutput], ideal_output: dict, sample_input: dict) -> dict:
         """Compute metrics for a single generation sample from multiple runs."""
 
         # unpack outputs and metrics
         outputs, run_metrics = [o for o, _ in outputs_metrics], [m for _, m in outputs_metrics]
-
-        # Compute accuracy
-        if self.job.is_explicit:
-            accuracy_metrics = metrics.explicit_accuracy(outputs, ideal_output)
-        else:
-            accuracy_metrics = metrics.implicit_accuracy(outputs, ideal_output, self.job, sample_input)
-
-        # Aggregate metrics
-        return {
-            "accuracy": accuracy_metrics,
-            "execution_time": metrics.avg_efficiency(run_metrics),
-            "failure_rate": metrics.avg_failure_rate(run_metrics),
-            "token_usage": metrics.avg_token_usage(run_metrics),
-            "num_runs": len(run_metrics),
-            "model_name": run_metrics[0]["model_name"],
-            "model_config": run_metrics[0]["model_config"],
-            "errors": [e for m in run_metrics for e in m["errors"] if m["errors"] is not None]
-        }
+        accuracy = self.compute_accuracy(outputs, ideal_output, sample_input)
+        return RunMetrics.from_runs(run_metrics, accuracy=accuracy).summary()
 
     def compute_metrics(self, sample_metrics: list[dict]) -> dict:
         """Compute metrics for a single generation sample from multiple runs."""
@@ -1,22 +1,20 @@
+import numpy as np
+
 from llmp.data_model import JobRecord
 from llmp.components.evaluation.prompts import MATCH_RESPONSE
 from llmp.integration.structgenie import Engine
 
 
-def explicit_accuracy(outputs: list, ideal_output: dict):
-    """Compute the accuracy of the outputs."""
-    correct = 0
-    for output in outputs:
-        if output == ideal_output:
-            correct += 1
-    return correct / len(outputs)
+def explicit_matches(outputs: list, ideal_output: dict) -> np.ndarray:
+    """Return 1.0 for each output equal to the ideal output, else 0.0."""
+    return np.fromiter((output == ideal_output for output in outputs), np.float64, count=len(outputs))
 
 
-def implicit_accuracy(outputs: list, ideal_output: dict, job: JobRecord, sample_input: dict):
-    """Compute the accuracy of the outputs."""
-    correct = 0
+def implicit_matches(outputs: list, ideal_output: dict, job: JobRecord, sample_input: dict) -> np.ndarray:
+    """Return 1.0 for each output the judge considers a match of the ideal output, else 0.0."""
     engine = Engine.from_template(MATCH_RESPONSE)
-    for output in outputs:
+    matches = np.zeros(len(outputs))
+    for i, output in enumerate(outputs):
         input_data = {
             "instruction": job.instruction,
             "ideal_output": ideal_output,
@@ -24,32 +22,44 @@ def implicit_accuracy(outputs: list, ideal_output: dict, job: JobRecord, sample_
             "example_input": sample_input,
         }
         output = engine.run(input_data)
-        if not output["choice"] == "D":
-            correct += 1
-    return correct / len(outputs)
+        matches[i] = output["choice"] != "D"
+    return matches
+
+
+def explicit_accuracy(outputs: list, ideal_output: dict):
+    """Compute the accuracy of the outputs."""
+    return float(explicit_matches(outputs, ideal_output).mean())
 
 
+def implicit_accuracy(outputs: list, ideal_output: dict, job: JobRecord, sample_input: dict):
+    """Compute the accuracy of the outputs."""
+    return float(implicit_matches(outputs, ideal_output, job, sample_input).mean())
+
 
 def avg_accuracy(run_metrics: list[dict]):
     """Compute the average accuracy of the runs."""
-    return sum([m["accuracy"] for m in run_metrics]) / len(run_metrics)
+    return _mean(run_metrics, "accuracy")
 
 
 def avg_efficiency(run_metrics: list[dict]):
     """Compute the average efficiency of the runs."""
-    return sum([m["execution_time"] for m in run_metrics]) / len(run_metrics)
+    return _mean(run_metrics, "execution_time")
 
 
 def avg_failure_rate(run_metrics):
     """Compute the average failure rate of the runs."""
-    return sum([m["failure_rate"] for m in run_metrics]) / len(run_metrics)
+    return _mean(run_metrics, "failure_rate")
 
 
 def avg_token_usage(outputs):
     """Compute the average token usage of the outputs."""
-    return sum([m["token_usage"] for m in outputs]) / len(outputs)
+    return _mean(outputs, "token_usage")
 
 
 def avg_num_runs(outputs):
     """Compute the average number of runs."""
-    return sum([m["num_runs"] for m in outputs]) / len(outputs)
+    return _mean(outputs, "num_runs")
+
+
+def _mean(metrics: list[dict], key: str) -> float:
+    return float(np.fromiter((m[key] for m in metrics), np.float64, count=len(metrics)).mean())
@@ -0,0 +1,275 @@
+"""Array-backed metrics of generation runs.
+
+Each run is one record of a numpy record array (setting, sample, execution_time, failure_rate, token_usage,
+accuracy), filled as runs complete. The errors of a run are stored separately (by run index), the model name and
+config once per setting. Statistics per setting or sample (mean, variance, percentiles, confidence interval) are
+computed with numpy (llmp.utils.stats), so large evaluation grids are aggregated without python loops over runs.
+Missing values are stored as NaN and ignored by the statistics.
+
+    run_metrics = RunMetrics()
+    run_metrics.add_runs(runs, setting={"example_ids": ids}, sample=0, accuracy=[1, 0, 1])
+    run_metrics.stats(by="setting")  # {setting: {"count": 3, "accuracy": {"mean": ..., "ci_low": ...}, ...}}
+"""
+from typing import Any, Hashable, Iterable, Sequence, Union
+
+import numpy as np
+
+from llmp.utils.signature import setting_hash
+from llmp.utils.stats import confidence_interval, group_counts, group_mean, group_percentiles, group_var
+
+FIELDS = ("execution_time", "failure_rate", "token_usage", "accuracy")
+RUN_DTYPE = np.dtype([("setting", np.int32), ("sample", np.int32)] + [(field, np.float64) for field in FIELDS])
+DEFAULT_PERCENTILES = (50, 95)
+
+
+class RunMetrics:
+
+    def __init__(self, capacity: int = 64):
+        """Metrics of generation runs, grouped by setting and sample.
+
+        Args:
+            capacity (int): Initial number of records (grows as needed).
+        """
+        self._records = np.zeros(capacity, dtype=RUN_DTYPE)
+        self._size = 0
+        self.settings: list[Hashable] = []
+        self.models: list[dict] = []
+        self.errors: dict[int, list] = {}
+        self._setting_index: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def records(self) -> np.recarray:
+        """The run records (view, in the order runs were added)."""
+        return self._records[:self._size].view(np.recarray)
+
+    @classmethod
+    def from_runs(cls, run_metrics: list[dict], accuracy: Iterable[float] = None) -> "RunMetrics":
+        """Container of the runs of one sample."""
+        table = cls(capacity=max(len(run_metrics), 1))
+        table.add_runs(run_metrics, accuracy=accuracy)
+        return table
+
+    # === Add ===
+
+    def add_runs(
+            self,
+            run_metrics: list[dict],
+            setting: Any = None,
+            sample: int = 0,
+            accuracy: Union[Iterable[float], float, None] = None,
+    ) -> range:
+        """Add the metrics of runs (generation metrics of structgenie).
+
+        Args:
+            run_metrics (list[dict]): Metrics of the runs.
+            setting (Any): The job setting (dict) or a hashable key of the setting.
+            sample (int): Index of the sample in the evaluation set.
+            accuracy (Iterable[float]|float, optional): Accuracy of each run (or one value for all runs).
+
+        Returns:
+            range: The indices of the added records.
+        """
+        num_runs = len(run_metrics)
+        setting_id = self.setting_id(setting)
+        if setting_id == len(self.models):
+            first = run_metrics[0] if run_metrics else {}
+            self.models.append(dict(model_name=first.get("model_name"), model_config=first.get("model_config")))
+
+        if accuracy is None or np.isscalar(accuracy):
+            accuracy = np.full(num_runs, np.nan if accuracy is None else accuracy, dtype=np.float64)
+        else:
+            accuracy = np.asarray(list(accuracy), dtype=np.float64)
+
+        start = self._size
+        self._reserve(start + num_runs)
+        records = self._records[start:start + num_runs]
+        records["setting"] = setting_id
+        records["sample"] = sample
+        for field in ("execution_time", "failure_rate", "token_usage"):
+            records[field] = np.fromiter((_float(m.get(field)) for m in run_metrics), np.float64, count=num_runs)
+        records["accuracy"] = accuracy
+        self._size += num_runs
+
+        for index, metrics in enumerate(run_metrics, start=start):
+            if metrics.get("errors"):
+                self.errors[index] = list(metrics["errors"])
+        return range(start, self._size)
+
+    def add(self, run_metrics: dict, setting: Any = None, sample: int = 0, accuracy: float = None) -> int:
+        """Add the metrics of a single run. Returns the index of the record."""
+        return self.add_runs([run_metrics], setting=setting, sample=sample, accuracy=accuracy)[0]
+
+    def extend(self, other: "RunMetrics") -> range:
+        """Add the runs of another RunMetrics, its settings are matched by key.
+
+        Returns:
+            range: The indices of the added records.
+        """
+        setting_ids = []
+        for i, key in enumerate(other.settings):
+            setting_id = self.setting_id(key)
+            if setting_id == len(self.models):
+                model = other.models[i] if i < len(other.models) else dict(model_name=None, model_config=None)
+                self.models.append(dict(model))
+            setting_ids.append(setting_id)
+
+        num_runs = len(other)
+        start = self._size
+        self._reserve(start + num_runs)
+        records = self._records[start:start + num_runs]
+        records[:] = other.records
+        records["setting"] = np.asarray(setting_ids, dtype=np.int32)[other.records["setting"]]
+        self._size += num_runs
+
+        for index, errors in other.errors.items():
+            self.errors[start + index] = list(errors)
+        return range(start, self._size)
+
+    def setting_id(self, setting: Any) -> int:
+        """Return the index of a setting (registered on first use). Dict settings are keyed by their hash."""
+        key = setting_hash(setting) if isinstance(setting, dict) or setting is None else setting
+        if key not in self._setting_index:
+            self._setting_index[key] = len(self.settings)
+            self.settings.append(key)
+        return self._setting_index[key]
+
+    # === Statistics ===
+
+    def stats(
+            self,
+            by: str = "setting",
+            fields: Sequence[str] = FIELDS,
+            percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+            confidence: float = 0.95,
+    ) -> dict:
+        """Statistics of the fields per setting or sample.
+
+        Returns:
+            dict: {setting key or sample: {"count": runs, field: {mean, var, p<percentile>, ci_low, ci_high}}}.
+                Values of fields without data are None.
+        """
+        keys, groups = self._groups(by)
+        counts = np.bincount(groups, minlength=len(keys))
+        result = {key: {"count": int(count)} for key, count in zip(keys, counts)}
+        records = self.records
+        for field in fields:
+            values = records[field]
+            means = group_mean(values, groups, len(keys))
+            variances = group_var(values, groups, len(keys))
+            lower, upper = confidence_interval(means, variances, group_counts(values, groups, len(keys)), confidence)
+            quantiles = group_percentiles(values, groups, len(keys), percentiles)
+            for i, key in enumerate(keys):
+                result[key][field] = dict(
+                    mean=_value(means[i]),
+                    var=_value(variances[i]),
+                    **{f"p{p:g}": _value(q) for p, q in zip(percentiles, quantiles[i])},
+                    ci_low=_value(lower[i]),
+                    ci_high=_value(upper[i]),
+                )
+        return result
+
+    def summary(self, setting: Any = None, sample: int = None) -> dict:
+        """Mean metrics of the runs (all, or of a setting/sample) in the format of the generation metrics."""
+        mask = self._mask(setting, sample)
+        records = self.records[mask]
+        indices = np.flatnonzero(mask)
+        summary = {field: _value(np.nanmean(records[field])) if _any(records[field]) else None for field in FIELDS}
+        if summary["accuracy"] is None:
+            del summary["accuracy"]
+        summary.update(num_runs=int(mask.sum()), **self._model(records), errors=self._errors(indices))
+        return summary
+
+    def sample_summaries(self, setting: Any = None) -> list[dict]:
+        """Mean metrics per sample (ordered by sample) of all runs, or of a setting."""
+        mask = self._mask(setting)
+        records = self.records[mask]
+        samples, groups = np.unique(records["sample"], return_inverse=True)
+        groups = groups.reshape(-1)
+        counts = np.bincount(groups, minlength=len(samples))
+        means = {field: group_mean(records[field], groups, len(samples)) for field in FIELDS}
+        model = self._model(records)
+
+        errors = [[] for _ in samples]
+        indices = np.flatnonzero(mask)
+        for position in np.flatnonzero(np.isin(indices, list(self.errors))):
+            errors[groups[position]].extend(self.errors[indices[position]])
+
+        summaries = []
+        for i in range(len(samples)):
+            summary = {field: _value(means[field][i]) for field in FIELDS}
+            if summary["accuracy"] is None:
+                del summary["accuracy"]
+            summary.update(num_runs=int(counts[i]), **model, errors=errors[i])
+            summaries.append(summary)
+        return summaries
+
+    def setting_summary(self, setting: Any = None) -> dict:
+        """Metrics of a setting averaged over its samples (each sample weighs the same, like compute_metrics)."""
+        mask = self._mask(setting)
+        records = self.records[mask]
+        samples, groups = np.unique(records["sample"], return_inverse=True)
+        groups = groups.reshape(-1)
+        summary = {}
+        for field in FIELDS:
+            sample_means = group_mean(records[field], groups, len(samples))
+            summary[field] = _value(np.nanmean(sample_means)) if _any(sample_means) else None
+        if summary["accuracy"] is None:
+            del summary["accuracy"]
+        num_runs = np.bincount(groups, minlength=len(samples)).mean() if len(samples) else 0
+        summary.update(num_runs=float(num_runs), **self._model(records), errors=self._errors(np.flatnonzero(mask)))
+        return summary
+
+    # === Private ===
+
+    def _reserve(self, size: int) -> None:
+        if size <= len(self._records):
+            return
+        records = np.zeros(max(size, 2 * len(self._records)), dtype=RUN_DTYPE)
+        records[:self._size] = self._records[:self._size]
+        self._records = records
+
+    def _mask(self, setting: Any = None, sample: int = None) -> np.ndarray:
+        records = self.records
+        mask = np.ones(self._size, dtype=bool)
+        if setting is not None:
+            key = setting_hash(setting) if isinstance(setting, dict) else setting
+            mask &= records["setting"] == self._setting_index.get(key, -1)
+        if sample is not None:
+            mask &= records["sample"] == sample
+        return mask
+
+    def _groups(self, by: str) -> tuple[list, np.ndarray]:
+        records = self.records
+        if by == "setting":
+            return list(self.settings), records["setting"].astype(np.int64)
+        if by == "sample":
+            samples, groups = np.unique(records["sample"], return_inverse=True)
+            return [int(sample) for sample in samples], groups.reshape(-1)
+        raise ValueError(f"Unknown group '{by}'. Choose from ['setting', 'sample'].")
+
+    def _model(self, records: np.ndarray) -> dict:
+        if not len(records):
+            return dict(model_name=None, model_config=None)
+        return dict(self.models[records["setting"][0]])
+
+    def _errors(self, indices: np.ndarray) -> list:
+        if not self.errors:
+            return []
+        return [error for index in indices[np.isin(indices, list(self.errors))] for error in self.errors[index]]
+
+
+def _float(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _any(values: np.ndarray) -> bool:
+    return bool(len(values)) and not np.isnan(values).all()
+
+
+def _value(value) -> Union[float, None]:
+    """numpy scalar to float (None for NaN), so summaries can be logged as json."""
+    value = float(value)
+    return None if np.isnan(value) else value
@@ -1,7 +1,22 @@
 """Generator module
-Used to perform generation tasks for a given job and input object."""
+Used to perform generation tasks for a given job and input object.
 
-from .simple import Generator
-from .concurrent import *
-from .consensus import MajorVoteGenerator
-from .examples import ExampleGenerator
+Generators are imported on first access (PEP 562), so importing one generator doesn't load the others."""
+from llmp.utils.lazy import lazy_exports
+
+_GENERATORS = {
+    "Generator": ".simple",
+    "AsyncGenerator": ".concurrent",
+    "SequentialAsyncGenerator": ".concurrent",
+    "SequentialAsyncGenerator2": ".concurrent",
+    "MultiThreadingAsyncGenerator": ".concurrent",
+    "MajorVoteGenerator": ".consensus",
+    "ExampleGenerator": ".examples",
+    "PackedGenerator": ".packed",
+    "CascadeGenerator": ".cascade",
+}
+
+__all__ = list(_GENERATORS)
+
+
+__getattr__, __dir__ = lazy_exports(_GENERATORS, globals())
@@ -0,0 +1,130 @@
+"""Cascade generator module.
+
+Generator that tries cheap models first and escalates to stronger models only on failed generations
+or low consensus reliability. The tiers are configured in the job config (see ProgramSettings):
+    - cascade_models: models tried before the job's model_name, cheapest first
+    - cascade_attempts: number of generation attempts per tier before escalating
+    - cascade_min_reliability: minimum consensus reliability to accept an output
+    - cascade_num_votes: number of votes per tier. With more than one vote the output is the majority vote.
+
+Escalations are logged as MODEL_ESCALATION events and the serving tier is added to the run metrics
+of the generation event, so hit rates per tier can be derived from the event log."""
+
+from typing import Iterable, Tuple
+
+from llmp.components.base import BaseGenerator
+from llmp.components.generator.concurrent import AsyncGenerator
+import llmp.components.generator.verification as verify
+from llmp.data_model import JobRecord
+from llmp.data_model.events import Event
+from llmp.data_model.job_record import load_engine_from_job
+from llmp.types import EventType, VerificationType
+
+
+class CascadeGenerator(BaseGenerator):
+    """Run a job on a cascade of models and escalate to the next tier only when needed."""
+
+    def __init__(self, job: JobRecord, job_settings: dict = None, **kwargs):
+        super().__init__(job, job_settings, **kwargs)
+        self._tiers = cascade_tiers(job.config)
+        self._attempts = max(job.config.get("cascade_attempts", 1), 1)
+        self._min_reliability = job.config.get("cascade_min_reliability", 0.0)
+        self._num_votes = job.config.get("cascade_num_votes", 1)
+
+    def generate(self, input_data: dict, **kwargs) -> Tuple[dict, dict]:
+        """Generate an output with the cheapest tier that succeeds.
+
+        Args:
+            input_data (dict): Input data for the job. With prompt placeholder as keys
+            **kwargs: any -  passed to engine.run() method
+
+        Returns:
+            Tuple[dict, dict]: output and run metrics incl. cascade_tier and model_name of the serving tier
+        """
+        for tier, model_name in enumerate(self._tiers):
+            is_last_tier = tier == len(self._tiers) - 1
+            try:
+                output, run_metrics = self._generate_tier(model_name, input_data, is_last_tier, **kwargs)
+            except Exception as e:
+                if is_last_tier:
+                    raise e
+                self._log_escalation(tier, reason="generation_failed", error=str(e))
+                continue
+
+            reliability = run_metrics.get("reliability", 1.0)
+            if not is_last_tier and reliability < self._min_reliability:
+                self._log_escalation(tier, reason="low_reliability", reliability=reliability)
+                continue
+
+            run_metrics["model_name"] = model_name
+            run_metrics["cascade_tier"] = tier
+            return output, run_metrics
+
+    def _generate_tier(self, model_name: str, input_data: dict, is_last_tier: bool, **kwargs) -> Tuple[dict, dict]:
+        engine_kwargs = dict(self._engine_kwargs, model_name=model_name)
+        if not is_last_tier:
+            engine_kwargs["max_retries"] = self._attempts - 1
+
+        if self._num_votes > 1:
+            generator = AsyncGenerator(self.job, self._job_settings, self._num_votes, **engine_kwargs)
+            outputs = generator.generate(input_data, skip_errors=True, **kwargs)
+            if not outputs:
+                raise ValueError(f"All {self._num_votes} generations failed for model '{model_name}'.")
+            return verify.get_majority_vote(outputs, job=self.job)
+
+        engine = load_engine_from_job(self.job, self._job_settings, **engine_kwargs)
+        return engine.run(input_data, **kwargs)
+
+    def _log_escalation(self, tier: int, reason: str, **kwargs):
+        self.job.log_event(Event.from_escalation(
+            dict(
+                from_model=self._tiers[tier],
+                to_model=self._tiers[tier + 1],
+                cascade_tier=tier,
+                reason=reason,
+                **kwargs
+            ),
+            job_setting=self._job_settings,
+            job_version=self.job.version,
+        ))
+
+    @property
+    def verification_type(self):
+        """Return the validation type for the generator.
+
+        Used in event log.
+        """
+        if self._num_votes > 1:
+            return VerificationType.MAJORITY_VOTE
+        return VerificationType.SINGLE_VOTE
+
+
+def cascade_tiers(config: dict) -> list[str]:
+    """Return the models of the cascade, cheapest first and the job's model_name last."""
+    tiers = [model for model in config.get("cascade_models", []) if model != config["model_name"]]
+    return tiers + [config["model_name"]]
+
+
+def is_cascade(config: dict) -> bool:
+    """Return True if the job config defines cascade models besides the job's model_name."""
+    return len(cascade_tiers(config)) > 1
+
+
+def get_cascade_hit_rates(job: JobRecord, events: Iterable[Event]) -> dict[str, float]:
+    """Return the share of generations served by each tier of the job's cascade.
+
+    The in-memory event log of a job is cleared when its logs are stored, so pass the persisted events
+    (see JobManager.get_cascade_hit_rates). Only generation events with a logged cascade_tier are taken
+    into account.
+    """
+    tiers = cascade_tiers(job.config)
+    served = [0] * len(tiers)
+    for event in events:
+        if event.event_type != EventType.GENERATION or not event.event_metrics:
+            continue
+        tier = event.event_metrics.get("cascade_tier")
+        if tier is not None and tier < len(tiers):
+            served[tier] += 1
+
+    total = sum(served)
+    return {model: (count / total if total else 0.0) for model, count in zip(tiers, served)}
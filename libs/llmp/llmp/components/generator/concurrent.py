@@ -11,7 +11,6 @@ the same prompt multiple times.
 import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import nest_asyncio
 from typing import Tuple, Union
 
 from llmp.components.base import BaseGenerator
@@ -48,6 +47,7 @@ class AsyncGenerator(BaseGenerator):
 
     def generate(self, input_data: Union[dict, list[dict]], skip_errors: bool = False, **kwargs) -> list[GenOutput]:
         """Generate an output based on the job + job_setting and input data."""
+        import nest_asyncio
         nest_asyncio.apply()
         results = asyncio.run(self.run_engines(input_data, skip_errors, **kwargs))
         return results
@@ -117,6 +117,7 @@ class SequentialAsyncGenerator2(BaseGenerator):
         self.generator = AsyncGenerator(job, job_settings, num_runs)
 
     def generate(self, input_data: list[dict], **kwargs) -> list[list[GenOutput]]:
+        import nest_asyncio
         nest_asyncio.apply()
         return asyncio.run(self._generate(input_data, **kwargs))
 
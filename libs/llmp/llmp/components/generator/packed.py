@@ -0,0 +1,51 @@
+"""Packed generator module.
+
+Generator that packs multiple inputs into shared prompts. Instruction, examples and format instructions
+are sent once per pack instead of once per input, which reduces the token usage for short jobs."""
+
+from typing import Tuple
+
+from llmp.components.base import BaseGenerator
+from llmp.components.settings.program_settings import ProgramSettings
+from llmp.data_model.job_record import load_engine_from_job
+from llmp.types import VerificationType
+
+
+class PackedGenerator(BaseGenerator):
+    """Generator that runs a job for a list of inputs packed into shared prompts.
+
+    The number of inputs per prompt is chosen from the context size of the job's model.
+    Missing or invalid items of a packed response are retried individually by the engine.
+    """
+
+    def __init__(self, job, job_settings: dict = None, max_pack_size: int = 20, **kwargs):
+        super().__init__(job, job_settings, **kwargs)
+        self._max_pack_size = max_pack_size
+
+    def generate(self, input_list: list[dict], **kwargs) -> Tuple[list[dict], dict]:
+        """Generate outputs for a list of inputs.
+
+        Args:
+            input_list (list[dict]): Input data for the job. With prompt placeholder as keys
+            **kwargs: any -  passed to engine.run_packed() method
+
+        Returns:
+            Tuple[list[dict], list[dict]]: outputs and run metrics in order of the inputs. The metrics of an
+                input are its share of the tokens and time of its pack plus its own retries and errors.
+        """
+        engine = load_engine_from_job(self.job, self._job_settings, **self._engine_kwargs)
+        outputs, _ = engine.run_packed(
+            input_list,
+            max_context_size=ProgramSettings.model_to_context_size(self.job.config["model_name"]),
+            max_pack_size=self._max_pack_size,
+            **kwargs
+        )
+        return outputs, engine.item_metrics
+
+    @property
+    def verification_type(self):
+        """Return the validation type for the generator.
+
+        Used in event log.
+        """
+        return VerificationType.SINGLE_VOTE
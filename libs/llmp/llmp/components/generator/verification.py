@@ -1,6 +1,5 @@
 from typing import Tuple
 
-from llmp.components.evaluation import metrics
 from llmp.components.generator._prompts import FIND_BEST_TEMPLATE
 from llmp.data_model import JobRecord
 from llmp.integration.structgenie import Engine
@@ -88,15 +87,9 @@ def _sort_count(tuple_list: list[tuple[dict, int]]) -> list[tuple[dict, int]]:
 
 def _merge_metrics(run_metrics: list[dict]) -> dict:
     """Merge a list of metrics into a single metric."""
-    return {
-        "execution_time": metrics.avg_efficiency(run_metrics),
-        "failure_rate": metrics.avg_failure_rate(run_metrics),
-        "token_usage": metrics.avg_token_usage(run_metrics),
-        "num_runs": len(run_metrics),
-        "model_name": run_metrics[0]["model_name"],
-        "model_config": run_metrics[0]["model_name"],
-        "errors": [e for m in run_metrics for e in m["errors"] if m["errors"] is not None]
-    }
+    from llmp.components.evaluation.run_metrics import RunMetrics
+
+    return RunMetrics.from_runs(run_metrics).summary()
 
 
 def _get_unique_outputs(outputs: list[dict]) -> list[dict]:
@@ -115,6 +108,8 @@ def get_majority_vote_by_key(outputs: list[Tuple[dict, dict]]) -> Tuple[dict, di
 
     Select the best output for each key based on the number of votes.
     """
+    from llmp.components.evaluation import metrics
+
     outputs, run_metrics = (list(i) for i in zip(*outputs))
     composed_output = {key: _rank_outputs_by_key(outputs, key)[0][key] for key in outputs[0].keys()}
     avg_votes = sum(
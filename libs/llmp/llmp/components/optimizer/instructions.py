@@ -19,8 +19,6 @@
 # Alternatively we can try to find the best One Shot Example. This would end up in the smallest number of test runs,
 # but we would miss eventually better example combinations.
 
-import tqdm
-
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -101,6 +99,7 @@ class InstructionOptimizer(BaseOptimizer):
         return best_setting, result
 
     def evaluate(self, job_settings: list[dict], num_workers: int = 5, **kwargs):
+        import tqdm
 
         pbar = tqdm.tqdm(total=len(job_settings), dynamic_ncols=True, disable=not self.display_progress)
         pbar.set_description("Evaluating Instructions")
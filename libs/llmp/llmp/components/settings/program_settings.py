@@ -1,9 +1,9 @@
 from enum import Enum
 
-from structgenie.driver.mistral_driver import MistralDriver
-from structgenie.driver.openai_driver import OpenAIDriver
 from structgenie.pydantic_v1 import BaseModel
 
+from llmp.integration.driver_registry import driver_registry
+
 
 class PromptType(str, Enum):
     ZERO_SHOT = "zero_shot"
@@ -48,6 +48,14 @@ class ProgramSettings(BaseModel):
     presence_penalty: float = 0
     max_retry: int = 3
 
+    # Cascade settings
+    # models tried before model_name, cheapest first. Escalation happens after cascade_attempts failed
+    # attempts or if the consensus reliability is below cascade_min_reliability.
+    cascade_models: list[str] = []
+    cascade_attempts: int = 1
+    cascade_min_reliability: float = 0.0
+    cascade_num_votes: int = 1
+
     @staticmethod
     def model_to_context_size(model_name: str = "gpt-3.5-turbo") -> int:
         """Calculate the maximum number of tokens possible to generate for a model.
@@ -61,38 +69,6 @@ class ProgramSettings(BaseModel):
         Example:
             .. code-block:: python
 
-                max_tokens = openai.modelname_to_contextsize("text-davinci-003")
+                max_tokens = ProgramSettings.model_to_context_size("text-davinci-003")
         """
-        model_token_mapping = {
-            "gpt-4": 8192,
-            "gpt-4-0314": 8192,
-            "gpt-4-0613": 8192,
-            "gpt-4-32k": 32768,
-            "gpt-4-32k-0314": 32768,
-            "gpt-4-32k-0613": 32768,
-            "gpt-3.5-turbo": 4096,
-            "gpt-3.5-turbo-0301": 4096,
-            "gpt-3.5-turbo-0613": 4096,
-            "gpt-3.5-turbo-16k": 16385,
-            "gpt-3.5-turbo-16k-0613": 16385,
-            "gpt-3.5-turbo-instruct": 4096,
-            "text-ada-001": 2049,
-            "ada": 2049,
-            "text-babbage-001": 2040,
-            "babbage": 2049,
-            "text-curie-001": 2049,
-            "curie": 2049,
-            "davinci": 2049,
-            "text-davinci-003": 4097,
-            "text-davinci-002": 4097,
-            "code-davinci-002": 8001,
-            "code-davinci-001": 8001,
-            "code-cushman-002": 2048,
-            "code-cushman-001": 2048,
-        }
-        return model_token_mapping.get(model_name, 2049)
-
-
-
-
-
+        return driver_registry.context_size(model_name)
@@ -25,12 +25,33 @@ Event specific data:
 from typing import Union, Optional
 from uuid import uuid4, UUID
 
-from structgenie.pydantic_v1 import BaseModel, Field
+from structgenie.pydantic_v1 import BaseModel, Field, PrivateAttr
 
 from llmp.types import EventType
 from llmp.utils.helper import get_timestamp
 
 
+MAX_EVENT_ERRORS = 5
+# sidecar of the job storages with the full error lists of compacted events, keyed by event_id
+ERROR_LOG = "event_errors"
+
+
+def compact_metrics(metrics: Optional[dict]) -> Optional[dict]:
+    """Return a compact copy of event metrics for the event log.
+
+    Errors are stored as strings and capped at MAX_EVENT_ERRORS (latest errors), the total count is kept
+    in num_errors. If errors were dropped, errors_ref names the error log that keeps the full list.
+    The metrics passed in are not modified.
+    """
+    if not metrics or not metrics.get("errors"):
+        return metrics
+    errors = metrics["errors"]
+    compact = {**metrics, "errors": [str(e) for e in errors[-MAX_EVENT_ERRORS:]], "num_errors": len(errors)}
+    if len(errors) > MAX_EVENT_ERRORS:
+        compact["errors_ref"] = ERROR_LOG
+    return compact
+
+
 class Event(BaseModel):
     event_id: str = Field(default_factory=lambda: uuid4().hex)
     timestamp: str = Field(default_factory=get_timestamp)
@@ -45,6 +66,23 @@ class Event(BaseModel):
     extra: Union[dict, None] = None
     ref_event_id: Union[str, None] = None
 
+    # full error list of compacted metrics, written to the error log by the job storages
+    _full_errors: Optional[list[str]] = PrivateAttr(default=None)
+
+    def compact(self) -> "Event":
+        """Compact the metrics for the event log and keep the full error list for the error log."""
+        errors = (self.event_metrics or {}).get("errors") or []
+        self.event_metrics = compact_metrics(self.event_metrics)
+        if len(errors) > MAX_EVENT_ERRORS:
+            self._full_errors = [str(e) for e in errors]
+        return self
+
+    def error_entry(self) -> Optional[dict]:
+        """Return the error log entry of the event, None if its errors were not compacted."""
+        if self._full_errors is None:
+            return None
+        return dict(event_id=self.event_id, errors=self._full_errors)
+
     @classmethod
     def from_sample_metric(cls, sample_metric: dict, job_setting: dict, example_id: Union[str, UUID] = None, **kwargs):
         return cls(
@@ -74,3 +112,17 @@ class Event(BaseModel):
             job_setting=job_setting,
             **kwargs
         )
+
+    @classmethod
+    def from_escalation(cls, escalation_metric: dict, job_setting: dict = None, **kwargs):
+        return cls(
+            event_type=EventType.MODEL_ESCALATION,
+            event_metrics=escalation_metric,
+            job_setting=job_setting,
+            **kwargs
+        )
+
+
+def error_entries(events: list[Event]) -> list[dict]:
+    """Return the error log entries of compacted events."""
+    return [entry for entry in (event.error_entry() for event in events) if entry is not None]
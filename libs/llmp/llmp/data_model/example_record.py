@@ -20,13 +20,21 @@ While tracking the execution history we could do this on job level as well and n
 This would simplify the logging process but would make it harder to track the usage count for each version of the example.
 """
 
-from typing import Optional
+from typing import Optional, Callable, Iterable
 from uuid import uuid4
 from structgenie.pydantic_v1 import BaseModel, validator, Field
 
 from llmp.types import VerificationType
 from llmp.integration.structgenie import Example
 
+# number of example replacements of all records, input indexes are rebuilt when it changes (see JobRecord)
+_example_changes = 0
+
+
+def example_changes() -> int:
+    """Return the number of example replacements of all records."""
+    return _example_changes
+
 
 class ExampleRecord(BaseModel):
     idx: str = Field(default_factory=lambda: uuid4().hex)
@@ -72,6 +80,69 @@ class ExampleRecord(BaseModel):
             return VerificationType(item)
         return item
 
+    def __setattr__(self, name, value):
+        global _example_changes
+        super().__setattr__(name, value)
+        if name == "example":
+            _example_changes += 1
+
+    def update(self, example: Example) -> None:
+        """Replace the example and bump the version. The previous example is kept in the version history."""
+        self.version_history[self.version] = self.example
+        self.version += 1
+        self.example = example
+
     @classmethod
     def from_input_output(cls, input_obj, output_obj, **kwargs):
         return cls(example=Example(input=input_obj, output=output_obj), **kwargs)
+
+    @classmethod
+    def from_storage(cls, data: dict) -> "ExampleRecord":
+        """Build a record from data written by the job storage without validation (trusted fast path)."""
+        values = dict(data)
+        values["example"] = Example.construct(**values["example"])
+        values["version_history"] = {
+            int(k): Example.construct(**v) for k, v in (values.get("version_history") or {}).items()
+        }
+        if values.get("verification_type") is not None:
+            values["verification_type"] = VerificationType(values["verification_type"])
+        return cls.construct(**values)
+
+
+class LazyExampleRecords(list):
+    """List of example records that is materialized by a loader on first access.
+
+    Used by the job storage, so jobs can be loaded without parsing all example records.
+    """
+
+    def __init__(self, iterable: Iterable = (), loader: Callable[[], list[ExampleRecord]] = None):
+        super().__init__(iterable)
+        self._loader = loader
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loader is None
+
+    def _materialize(self):
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            super().extend(loader())
+
+
+def _materializing(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._materialize()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in [
+    "__len__", "__iter__", "__reversed__", "__getitem__", "__setitem__", "__delitem__", "__contains__",
+    "__eq__", "__ne__", "__add__", "__iadd__", "__mul__", "__repr__", "__reduce_ex__",
+    "append", "extend", "insert", "remove", "pop", "index", "count", "sort", "reverse", "clear", "copy",
+]:
+    setattr(LazyExampleRecords, _name, _materializing(_name))
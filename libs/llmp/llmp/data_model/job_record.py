@@ -30,21 +30,32 @@
 # This will allow us to use example_manager to add examples from generation history without diluting the size of examples.
 
 
+import hashlib
 import json
+import threading
+from contextlib import contextmanager
 from uuid import uuid4
 
 from pathlib import Path
 
-from structgenie.driver.mistral_driver import MistralDriver
-from structgenie.driver.openai_driver import OpenAIDriver
 from structgenie.pydantic_v1 import BaseModel, UUID4, Field, validator, root_validator, PrivateAttr
-from typing import List, Dict, Optional, Any, Union, Type
+from typing import List, Dict, Optional, Any, Union, Type, Callable
 
 from llmp.data_model.events import Event
-from llmp.data_model.example_record import ExampleRecord
+from llmp.data_model.example_record import ExampleRecord, example_changes
+from llmp.data_model.version_history import (
+    job_state,
+    compute_delta,
+    apply_delta,
+    state_at,
+    diff_states,
+    index_history,
+    new_entry,
+)
 from llmp.types import EventType
 from llmp.utils.encoder import JSONEncoder
 from llmp.utils.helper import get_timestamp
+from llmp.integration.driver_registry import driver_registry
 from llmp.integration.structgenie import (
     Example,
     InputModel,
@@ -57,6 +68,9 @@ from llmp.integration.structgenie import (
 from llmp.utils.io_model import hash_from_io_models
 from llmp.utils.signature import is_valid_uuid
 
+# guards the in-memory logs of all jobs, so take_logs doesn't lose entries appended by other threads
+_LOG_LOCK = threading.Lock()
+
 
 class JobRecord(BaseModel):
     """
@@ -75,7 +89,7 @@ class JobRecord(BaseModel):
         example_records (List[ExampleRecord]): A list of example records associated with the job.
         instruction (Optional[str]): An optional instruction or description for the job.
         metrics (Optional[Dict[str, float]]): Metrics associated with the job, if available.
-        version_history (Dict[int, Any]): A dictionary capturing the history of versions for the job.
+        version_history (list[dict]): The delta-encoded history of versions for the job (see version_history.py).
         event_log (list[str]): A log of actions performed on the job.
         generation_log (list[dict]): A history of generations associated with the job.
 
@@ -98,6 +112,9 @@ class JobRecord(BaseModel):
         rollback(version: int):
             Rollback the job to a specific previous version.
 
+        diff_versions(old_version: int, new_version: int):
+            Return the changes between two versions.
+
         to_template() -> str:
             Convert the job into a template for LLM generation.
     """
@@ -120,30 +137,130 @@ class JobRecord(BaseModel):
     generation_log: list[dict] = Field(default_factory=list)
     event_log: list[Event] = Field(default_factory=list)
 
+    # in-memory log buffer, spilled to the log sink (storage) when full
+    _log_sink: Optional[Callable[["JobRecord"], None]] = PrivateAttr(default=None)
+    _max_buffered_logs: int = PrivateAttr(default=500)
+
+    # hash index from canonical input to example record, rebuilt when example_records is replaced or resized or
+    # the example of a record is replaced (update_example, ExampleRecord.update)
+    _input_index: dict = PrivateAttr(default_factory=dict)
+    _input_index_state: tuple = PrivateAttr(default=None)
+
+    # what the job storages have persisted (example fingerprints, metadata hash), used for incremental saves
+    _storage_state: dict = PrivateAttr(default_factory=dict)
+
     @property
     def io_hash(self) -> str:
         """Create a hash from the input and output models."""
         return hash_from_io_models(self.input_model, self.output_model, self.instruction, config=self.config)
 
+    def set_log_sink(self, log_sink: Callable[["JobRecord"], None], max_buffered_logs: int = 500):
+        """Set a sink that stores (and clears) the in-memory logs once max_buffered_logs entries are buffered.
+
+        Args:
+            log_sink: callable that persists job.event_log and job.generation_log and clears them e.g. store_logs
+            max_buffered_logs: maximum number of buffered events + generations
+        """
+        self._log_sink = log_sink
+        self._max_buffered_logs = max_buffered_logs
+
     def log_event(self, event: Event):
         """Add an event to the job."""
-        self.event_log.append(event)
+        event.compact()
+        with _LOG_LOCK:
+            self.event_log.append(event)
+        self._spill_logs()
+
+    def take_logs(self) -> tuple[list[Event], list[dict]]:
+        """Return the in-memory event and generation logs and clear them on the job."""
+        with _LOG_LOCK:
+            event_log, generation_log = self.event_log, self.generation_log
+            self.event_log, self.generation_log = [], []
+        return event_log, generation_log
+
+    def _spill_logs(self):
+        """Hand the buffered logs to the log sink if the buffer is full."""
+        if self._log_sink is None:
+            return
+        if len(self.event_log) + len(self.generation_log) >= self._max_buffered_logs:
+            self._log_sink(self)
 
     def log_generation(
             self, input_object: dict, output_object: dict, event_metric: dict, job_settings: dict = None
     ) -> Event:
         """Add a generation to the job."""
-        example_id = get_record_by_input(self, input_object).idx if input_in_records(self, input_object) else None
+        record = self.find_record_by_input(input_object)
+        example_id = record.idx if record else None
         event = Event.from_generation_job(event_metric, job_settings, example_id=example_id, job_version=self.version)
         self.log_event(event)
 
-        self.generation_log.append(dict(
-            event_id=event.event_id,
-            input=input_object,
-            output=output_object,
-        ))
+        with _LOG_LOCK:
+            self.generation_log.append(dict(
+                event_id=event.event_id,
+                timestamp=event.timestamp,
+                input=input_object,
+                output=output_object,
+            ))
+        self._spill_logs()
         return event
 
+    def find_record_by_input(self, input_example: dict) -> Union[ExampleRecord, None]:
+        """Find an example record by its input in O(1) via the input index.
+
+        Records must be changed via update_example (or ExampleRecord.update), edits of a record's input dict
+        in place are not tracked by the index.
+        """
+        record = self._get_input_index().get(input_hash(input_example))
+        if record is not None and record.input != input_example:
+            # record was modified in place, rebuild index
+            self._build_input_index()
+            record = self._input_index.get(input_hash(input_example))
+        return record
+
+    def update_example(self, idx: str, example: Example, **kwargs) -> ExampleRecord:
+        """Update the example of a record. The version of the record is bumped, the old example kept in its history."""
+        record = next((record for record in self.example_records if record.idx == idx), None)
+        if record is None:
+            raise ValueError(f"Example {idx} not found in job {self.idx}!")
+        record.update(example)
+        self._build_input_index()
+        self.log_event(Event(
+            event_type=EventType.UPDATE_EXAMPLES,
+            example_id=record.idx,
+            example_version=record.version,
+            **kwargs
+        ))
+        return record
+
+    def remove_example(self, idx: str) -> Union[ExampleRecord, None]:
+        """Remove an example record by its idx."""
+        record = next((record for record in self.example_records if record.idx == idx), None)
+        if record is not None:
+            self.example_records.remove(record)
+            self._build_input_index()
+        return record
+
+    def _get_input_index(self) -> dict:
+        if self._input_index_state != self._records_state():
+            self._build_input_index()
+        return self._input_index
+
+    def _build_input_index(self):
+        self._input_index = {}
+        for record in self.example_records:
+            self._input_index.setdefault(input_hash(record.input), record)
+        self._input_index_state = self._records_state()
+
+    def _records_state(self) -> tuple:
+        return id(self.example_records), len(self.example_records), example_changes()
+
+    def _append_record(self, record: ExampleRecord):
+        """Append an example record and add it to the input index."""
+        index = self._get_input_index()
+        self.example_records.append(record)
+        index.setdefault(input_hash(record.input), record)
+        self._input_index_state = self._records_state()
+
     def get_examples(self, example_ids: list = None):
         """Parse the examples to the correct version."""
         if example_ids:
@@ -153,19 +270,42 @@ class JobRecord(BaseModel):
 
     # === unused methods ===
 
-    def add_version(self, instruction: str, examples: List[ExampleRecord], metrics: Dict[str, float] = None) -> None:
-        """Add a new version to the job."""
+    def add_version(
+            self,
+            instruction: str,
+            examples: List[ExampleRecord],
+            metrics: Dict[str, float] = None,
+            config: dict = None,
+            rollback_to: int = None
+    ) -> dict:
+        """Add a new version to the job.
+
+        Only the delta to the previous version is added to the version history (see version_history.py).
+        """
+        old_state = job_state(self)
+        records = {record.idx: record for record in self.example_records}
+        if self.version not in index_history(self.version_history):
+            self.version_history.append(new_entry(self.version, None, old_state))
+
         self.version += 1
         self.instruction = instruction
         self.example_records = examples
+        if config is not None:
+            self.config = config
 
-        self.version_history.append(self.dict())
+        new_state = job_state(self)
+        records.update({record.idx: record for record in self.example_records})
+        entry = new_entry(
+            self.version, compute_delta(old_state, new_state, records), new_state, metrics, rollback_to=rollback_to
+        )
+        self.version_history.append(entry)
+        return entry
 
     def add_example(self, example_record: ExampleRecord, **kwargs) -> None:
         """Add an example to the job."""
         if input_in_records(self, example_record.input):
             return
-        self.example_records.append(example_record)
+        self._append_record(example_record)
         self.log_event(Event(
             event_type=EventType.ADD_EXAMPLES,
             example_id=example_record.idx,
@@ -188,7 +328,7 @@ class JobRecord(BaseModel):
             **kwargs
         )
 
-        self.example_records.append(record)
+        self._append_record(record)
         return record
 
 
@@ -196,27 +336,74 @@ class JobRecord(BaseModel):
     # --- version history methods ---
 
     # TODO: add a flag to rollback method for "hard" or "soft" rollback
-    def rollback(self, version: int) -> None:
-        """Rollback the job to a previous version."""
-        # if version not in self.version_history:
-        #     raise ValueError(f"Version {version} not found in version history!")
-        #
-        # self.version = version
-        # self.instruction = self.version_history[version]["instruction"]
-        return NotImplemented
+    def rollback(self, version: int) -> dict:
+        """Rollback the job to a previous version.
+
+        Reverts the deltas between the current and the target version and adds the result as a new version
+        (with rollback_to=version), so the history stays append-only. Removed examples are restored from the history.
+
+        Raises:
+            ValueError: If the version is not a previous version or can't be rebuilt from the version history.
+        """
+        if version >= self.version:
+            raise ValueError(f"Version {version} is not a previous version (current version: {self.version}).")
+
+        entries = index_history(self.version_history)
+        records = {record.idx: record for record in self.example_records}
+        deltas = [entries.get(v, {}).get("delta") for v in range(self.version, version, -1)]
+
+        if all(delta is not None for delta in deltas):
+            state = job_state(self)
+            for delta in deltas:
+                state = apply_delta(state, delta, reverse=True)
+                for idx, record in delta.get("records", {}).items():
+                    records.setdefault(idx, record)
+        else:
+            # history without deltas (e.g. full snapshots of older versions)
+            state = state_at(self.version_history, version)
+            for entry in reversed(self.version_history):
+                for record in entry.get("example_records", []):
+                    records.setdefault(record["idx"], record)
+                for idx, record in (entry.get("delta") or {}).get("records", {}).items():
+                    records.setdefault(idx, record)
+
+        missing = [idx for idx in state["example_ids"] if idx not in records]
+        if missing:
+            raise ValueError(f"Examples {missing} of version {version} not found in version history!")
+
+        examples = [
+            record if isinstance(record, ExampleRecord) else ExampleRecord.parse_obj(record)
+            for record in (records[idx] for idx in state["example_ids"])
+        ]
+        return self.add_version(state["instruction"], examples, config=state["config"], rollback_to=version)
+
+    def diff_versions(self, old_version: int, new_version: int) -> dict:
+        """Return the changes (instruction, added/removed example ids, config) between two versions."""
+        return diff_states(self._state_at(old_version), self._state_at(new_version))
+
+    def _state_at(self, version: int) -> dict:
+        if version == self.version:
+            return job_state(self)
+        return state_at(self.version_history, version)
 
 
 # === utils functions === -------------------------------------------------------------------------
 
 
+def input_hash(input_example: dict) -> str:
+    """Create a hash from the canonical (key sorted) json of an input example."""
+    canonical = json.dumps(input_example, sort_keys=True, cls=JSONEncoder, default=str)
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
 def input_in_records(job, input_example: dict) -> bool:
     """Check if an input example is already in the example records."""
-    return any(record.input == input_example for record in job.example_records)
+    return job.find_record_by_input(input_example) is not None
 
 
 def get_record_by_input(job, input_example: dict):
     """Find an example record by its input."""
-    return next((record for record in job.example_records if record.input == input_example), None)
+    return job.find_record_by_input(input_example)
 
 
 def get_template_from_job(job, job_settings: dict = None) -> str:
@@ -238,6 +425,7 @@ def load_engine_from_job(
         job_settings: dict = None,
         engine_cls: Type[Engine] = None,
         return_metrics: bool = True,
+        model_name: str = None,
         **kwargs) -> Engine:
     """Load a Engine engine from a job.
 
@@ -245,10 +433,13 @@ def load_engine_from_job(
         job: The job to load the engine from.
         job_settings: The job settings to use for the engine e.g. list of example_ids or different instruction.
         engine_cls (optional): The engine class to use for the engine e.g. AsyncEngine.
+        model_name (optional): The model to use instead of the job's model e.g. a tier of a model cascade.
     """
     if not engine_cls:
         engine_cls = Engine
 
+    model_name = model_name or job.config["model_name"]
+
     if job.output_model_cond and job.condition:
         engine_cls = ConditionalEngine
         kwargs["output_model_else"] = job.output_model_cond
@@ -256,7 +447,7 @@ def load_engine_from_job(
 
     # prepare driver
     if not kwargs.get("driver"):
-        kwargs["driver"] = load_driver_by_model(job.config["model_name"])
+        kwargs["driver"] = load_driver_by_model(model_name)
 
     job_settings = job_settings or {}
 
@@ -266,46 +457,31 @@ def load_engine_from_job(
         output_model=job.output_model,
         examples=ExampleSelector.load_examples(job.get_examples(job_settings)),
         return_metrics=return_metrics,
-        model_name=job.config["model_name"],
+        model_name=model_name,
         llm_kwargs=job.config.get("llm_kwargs", {}),
         **kwargs
     )
 
 
-def load_driver_by_model(model_name: str):
+_driver_override: Optional[Type] = None
+
+
+@contextmanager
+def use_driver(driver: Type):
+    """Load engines with this driver class for all models, e.g. a replay or fake driver for offline runs.
 
-    openai_models = {
-        "gpt-4": 8192,
-        "gpt-4-0314": 8192,
-        "gpt-4-0613": 8192,
-        "gpt-4-32k": 32768,
-        "gpt-4-32k-0314": 32768,
-        "gpt-4-32k-0613": 32768,
-        "gpt-3.5-turbo": 4096,
-        "gpt-3.5-turbo-0301": 4096,
-        "gpt-3.5-turbo-0613": 4096,
-        "gpt-3.5-turbo-16k": 16385,
-        "gpt-3.5-turbo-16k-0613": 16385,
-        "gpt-3.5-turbo-instruct": 4096,
-        "text-ada-001": 2049,
-        "ada": 2049,
-        "text-babbage-001": 2040,
-        "babbage": 2049,
-        "text-curie-001": 2049,
-        "curie": 2049,
-        "davinci": 2049,
-        "text-davinci-003": 4097,
-        "text-davinci-002": 4097,
-        "code-davinci-002": 8001,
-        "code-davinci-001": 8001,
-        "code-cushman-002": 2048,
-        "code-cushman-001": 2048,
-    }
-
-    if model_name in openai_models or "gpt-3.5-turbo" in model_name or "gpt-4" in model_name:
-        return OpenAIDriver
-
-    if "mistral" in model_name or "mixtral" in model_name:
-        return MistralDriver
-
-    raise ValueError(f"Model name '{model_name}' not supported.")
+    The override is process wide (engines of generator threads use it as well).
+    """
+    global _driver_override
+    previous, _driver_override = _driver_override, driver
+    try:
+        yield driver
+    finally:
+        _driver_override = previous
+
+
+def load_driver_by_model(model_name: str):
+    """Return the driver class of a model (see llmp.integration.driver_registry)."""
+    if _driver_override is not None:
+        return _driver_override
+    return driver_registry.get_driver(model_name)
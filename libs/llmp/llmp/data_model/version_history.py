@@ -0,0 +1,167 @@
+"""
+Delta-encoded version history of jobs.
+======================================
+Each entry of JobRecord.version_history describes one version:
+
+    {
+        "version": 3,
+        "timestamp": "20240101120000",
+        "delta": {
+            "instruction": [<old>, <new>],                  # only if changed
+            "examples": {"added": [<idx>], "removed": [<idx>]},
+            "config": {<key>: {"old": <value>, "new": <value>}},   # "old"/"new" omitted if the key is absent
+            "records": {<idx>: <example record>},          # data of added and removed examples
+        },
+        "checkpoint": {"instruction": ..., "example_ids": [...], "config": {...}},   # every CHECKPOINT_INTERVAL versions
+        "metrics": {...},
+        "rollback_to": 1,                                  # if the version was created by a rollback
+    }
+
+The first entry is a checkpoint of the base version (no delta). Deltas are reversible, so a rollback only
+walks the deltas between the current and the target version. The state of any version is rebuilt from the
+closest checkpoint before it. Full job snapshots of older versions of llmp (entries without delta/checkpoint)
+are read as checkpoints.
+"""
+from typing import Optional
+
+from llmp.utils.helper import get_timestamp
+
+CHECKPOINT_INTERVAL = 10
+
+
+def job_state(job) -> dict:
+    """Return the versioned state of a job."""
+    return dict(
+        instruction=job.instruction,
+        example_ids=[record.idx for record in job.example_records],
+        config=dict(job.config),
+    )
+
+
+def compute_delta(old_state: dict, new_state: dict, records: dict = None) -> dict:
+    """Compute the reversible delta between two states.
+
+    Args:
+        old_state (dict): The state before the change.
+        new_state (dict): The state after the change.
+        records (dict, optional): Example records (models or dicts) by idx, stored for added and removed examples.
+    """
+    delta = {}
+    if old_state["instruction"] != new_state["instruction"]:
+        delta["instruction"] = [old_state["instruction"], new_state["instruction"]]
+
+    old_ids, new_ids = set(old_state["example_ids"]), set(new_state["example_ids"])
+    added = [idx for idx in new_state["example_ids"] if idx not in old_ids]
+    removed = [idx for idx in old_state["example_ids"] if idx not in new_ids]
+    if added or removed:
+        delta["examples"] = dict(added=added, removed=removed)
+        delta["records"] = {idx: _as_dict(records[idx]) for idx in added + removed if records and idx in records}
+
+    config_delta = {}
+    old_config, new_config = old_state["config"], new_state["config"]
+    for key in set(old_config) | set(new_config):
+        if old_config.get(key) != new_config.get(key) or (key in old_config) != (key in new_config):
+            change = {}
+            if key in old_config:
+                change["old"] = old_config[key]
+            if key in new_config:
+                change["new"] = new_config[key]
+            config_delta[key] = change
+    if config_delta:
+        delta["config"] = config_delta
+
+    return delta
+
+
+def apply_delta(state: dict, delta: dict, reverse: bool = False) -> dict:
+    """Apply a delta (or its reverse) to a state. Returns a new state."""
+    state = dict(state, example_ids=list(state["example_ids"]), config=dict(state["config"]))
+    new = "old" if reverse else "new"
+
+    if "instruction" in delta:
+        state["instruction"] = delta["instruction"][0 if reverse else 1]
+
+    if "examples" in delta:
+        added, removed = delta["examples"]["added"], delta["examples"]["removed"]
+        if reverse:
+            added, removed = removed, added
+        removed = set(removed)
+        state["example_ids"] = [idx for idx in state["example_ids"] if idx not in removed] + added
+
+    for key, change in delta.get("config", {}).items():
+        if new in change:
+            state["config"][key] = change[new]
+        else:
+            state["config"].pop(key, None)
+
+    return state
+
+
+def state_at(history: list[dict], version: int) -> dict:
+    """Rebuild the state of a version from the closest checkpoint before it.
+
+    Raises:
+        ValueError: If the version can't be rebuilt from the history.
+    """
+    entries = index_history(history)
+    base = next((v for v in sorted(entries, reverse=True) if v <= version and _checkpoint(entries[v])), None)
+    if base is None:
+        raise ValueError(f"Version {version} not found in version history!")
+
+    state = _checkpoint(entries[base])
+    for v in range(base + 1, version + 1):
+        if v not in entries or entries[v].get("delta") is None:
+            raise ValueError(f"Version {version} not found in version history!")
+        state = apply_delta(state, entries[v]["delta"])
+    return state
+
+
+def diff_states(old_state: dict, new_state: dict) -> dict:
+    """Return a readable diff of two states (instruction, added/removed example ids and config changes)."""
+    delta = compute_delta(old_state, new_state)
+    delta.pop("records", None)
+    return delta
+
+
+def index_history(history: list[dict]) -> dict[int, dict]:
+    """Index history entries by version.
+
+    Later entries win, so duplicates written by older llmp versions are dropped. Entries that are neither
+    deltas nor job snapshots (e.g. plain metadata) are ignored.
+    """
+    return {entry["version"]: entry for entry in history if "delta" in entry or "example_records" in entry}
+
+
+def new_entry(
+        version: int,
+        delta: Optional[dict],
+        state: dict,
+        metrics: dict = None,
+        rollback_to: int = None
+) -> dict:
+    """Create a history entry. A checkpoint is added for the base version and every CHECKPOINT_INTERVAL versions."""
+    entry = dict(version=version, timestamp=get_timestamp(), delta=delta)
+    if delta is None or version % CHECKPOINT_INTERVAL == 0:
+        entry["checkpoint"] = state
+    if metrics is not None:
+        entry["metrics"] = metrics
+    if rollback_to is not None:
+        entry["rollback_to"] = rollback_to
+    return entry
+
+
+def _as_dict(record) -> dict:
+    return record.dict() if hasattr(record, "dict") else record
+
+
+def _checkpoint(entry: dict) -> Optional[dict]:
+    if entry.get("checkpoint") is not None:
+        return entry["checkpoint"]
+    if "delta" not in entry and "example_records" in entry:
+        # full job snapshot (older llmp versions)
+        return dict(
+            instruction=entry.get("instruction"),
+            example_ids=[record["idx"] for record in entry["example_records"]],
+            config=entry.get("config") or {},
+        )
+    return None
@@ -0,0 +1,250 @@
+"""Registry of generation drivers and model capabilities.
+
+A provider maps model names to a driver class, given as import path and imported on first use, so unused SDKs
+are never loaded. Models are registered with their capabilities (ModelInfo). Model names without an entry are
+served by the provider whose pattern (fnmatch) matches, with the default capabilities of the provider.
+
+Packages add providers through the `llmp.drivers` entry point group. Each entry point refers to a function
+that receives the registry; entry points are loaded on the first lookup:
+
+    # pyproject.toml of the plugin
+    [tool.poetry.plugins."llmp.drivers"]
+    local = "my_plugin:register"
+
+    # my_plugin/__init__.py
+    def register(registry):
+        registry.register_provider("local", "my_plugin.driver:LocalDriver", patterns=["local/*"])
+        registry.register_model("local/llama-3-8b", provider="local", context_size=8192, supports_json_schema=True)
+"""
+import importlib
+import threading
+import warnings
+from dataclasses import dataclass, field, replace
+from fnmatch import fnmatchcase
+from typing import Optional, Type, Union
+
+ENTRY_POINT_GROUP = "llmp.drivers"
+DEFAULT_CONTEXT_SIZE = 2049
+DEFAULT_TOKENIZER = "cl100k_base"
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    """Capabilities of a model.
+
+    Attributes:
+        name: The model name.
+        provider: Name of the provider serving the model.
+        context_size: Max number of tokens of prompt and completion.
+        supports_n: Whether one request can return several completions.
+        supports_json_schema: Whether outputs can be constrained to a json schema.
+        tokenizer: tiktoken encoding used to count the tokens of the model (approximation for other vendors).
+    """
+    name: str
+    provider: str
+    context_size: int = DEFAULT_CONTEXT_SIZE
+    supports_n: bool = False
+    supports_json_schema: bool = False
+    tokenizer: str = DEFAULT_TOKENIZER
+
+
+@dataclass
+class Provider:
+    name: str
+    driver: Union[str, Type]
+    patterns: list[str] = field(default_factory=list)
+    defaults: dict = field(default_factory=dict)
+
+    def load_driver(self) -> Type:
+        """Return the driver class, importing it on first use."""
+        if isinstance(self.driver, str):
+            module_name, _, attribute = self.driver.partition(":")
+            self.driver = getattr(importlib.import_module(module_name), attribute)
+        return self.driver
+
+    def matches(self, model_name: str) -> bool:
+        return any(fnmatchcase(model_name, pattern) for pattern in self.patterns)
+
+
+class DriverRegistry:
+
+    def __init__(self, load_plugins: bool = True):
+        """Registry of providers and models.
+
+        Args:
+            load_plugins (bool): Load the providers of the `llmp.drivers` entry points on the first lookup.
+        """
+        self.providers: dict[str, Provider] = {}
+        self.models: dict[str, ModelInfo] = {}
+        self._plugins_loaded = not load_plugins
+        self._lock = threading.RLock()
+
+    # === Registration ===
+
+    def register_provider(
+            self,
+            name: str,
+            driver: Union[str, Type],
+            patterns: list[str] = None,
+            **defaults,
+    ) -> Provider:
+        """Register a provider.
+
+        Args:
+            name (str): Name of the provider.
+            driver (str|Type): The driver class or its import path ("module:Class").
+            patterns (list[str], optional): fnmatch patterns of the model names served by the provider.
+            **defaults: Default capabilities (ModelInfo fields) of unregistered models matching the patterns.
+        """
+        with self._lock:
+            provider = self.providers[name] = Provider(name, driver, list(patterns or []), defaults)
+            return provider
+
+    def register_model(self, name: str, provider: str, **capabilities) -> ModelInfo:
+        """Register a model of a provider. Unset capabilities default to the provider defaults."""
+        with self._lock:
+            if provider not in self.providers:
+                raise ValueError(f"Unknown provider '{provider}'. Register the provider first.")
+            info = ModelInfo(name, provider, **{**self.providers[provider].defaults, **capabilities})
+            self.models[name] = info
+            return info
+
+    def register_models(self, provider: str, models: dict[str, dict]) -> None:
+        """Register several models of a provider ({model name: capabilities})."""
+        for name, capabilities in models.items():
+            self.register_model(name, provider, **capabilities)
+
+    # === Lookup ===
+
+    def get_model_info(self, model_name: str) -> ModelInfo:
+        """Return the capabilities of a model.
+
+        Raises:
+            ValueError: If no provider serves the model.
+        """
+        self.load_plugins()
+        with self._lock:
+            if model_name in self.models:
+                return self.models[model_name]
+            # later registered providers (plugins) take precedence
+            for provider in reversed(list(self.providers.values())):
+                if provider.matches(model_name):
+                    return ModelInfo(model_name, provider.name, **provider.defaults)
+        raise ValueError(f"Model name '{model_name}' not supported.")
+
+    def find_model_info(self, model_name: str) -> Optional[ModelInfo]:
+        """Return the capabilities of a model, None if no provider serves it."""
+        try:
+            return self.get_model_info(model_name)
+        except ValueError:
+            return None
+
+    def get_driver(self, model_name: str) -> Type:
+        """Return the driver class of a model."""
+        return self.providers[self.get_model_info(model_name).provider].load_driver()
+
+    def context_size(self, model_name: str) -> int:
+        """Return the context size of a model, DEFAULT_CONTEXT_SIZE for unknown models."""
+        info = self.find_model_info(model_name)
+        return info.context_size if info else DEFAULT_CONTEXT_SIZE
+
+    # === Plugins ===
+
+    def load_plugins(self) -> None:
+        """Register the providers of the `llmp.drivers` entry points (once)."""
+        if self._plugins_loaded:
+            return
+        with self._lock:
+            if self._plugins_loaded:
+                return
+            self._plugins_loaded = True
+            for entry_point in _entry_points(ENTRY_POINT_GROUP):
+                try:
+                    entry_point.load()(self)
+                except Exception as e:
+                    warnings.warn(f"Failed to load driver plugin '{entry_point.name}': {e!r}")
+
+    def copy(self) -> "DriverRegistry":
+        registry = DriverRegistry(load_plugins=False)
+        with self._lock:
+            registry.providers = {name: replace(provider) for name, provider in self.providers.items()}
+            registry.models = dict(self.models)
+            registry._plugins_loaded = self._plugins_loaded
+        return registry
+
+
+def _entry_points(group: str) -> list:
+    from importlib.metadata import entry_points
+
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    # python < 3.10
+    return list(eps.get(group, []))
+
+
+# === Built-in providers ===
+
+_OPENAI_CHAT = dict(supports_n=True)
+_OPENAI_LEGACY = dict(supports_n=True, tokenizer="r50k_base")
+_OPENAI_CODEX = dict(supports_n=True, tokenizer="p50k_base")
+
+
+def _register_builtin(registry: DriverRegistry) -> None:
+    registry.register_provider(
+        "openai",
+        "structgenie.driver.openai_driver:OpenAIDriver",
+        patterns=["*gpt-3.5-turbo*", "*gpt-4*"],
+        supports_n=True,
+    )
+    registry.register_models("openai", {
+        "gpt-4": dict(context_size=8192, **_OPENAI_CHAT),
+        "gpt-4-0314": dict(context_size=8192, **_OPENAI_CHAT),
+        "gpt-4-0613": dict(context_size=8192, **_OPENAI_CHAT),
+        "gpt-4-32k": dict(context_size=32768, **_OPENAI_CHAT),
+        "gpt-4-32k-0314": dict(context_size=32768, **_OPENAI_CHAT),
+        "gpt-4-32k-0613": dict(context_size=32768, **_OPENAI_CHAT),
+        "gpt-4-turbo": dict(context_size=128000, **_OPENAI_CHAT),
+        "gpt-4-0125-preview": dict(context_size=128000, **_OPENAI_CHAT),
+        "gpt-4-1106-preview": dict(context_size=128000, **_OPENAI_CHAT),
+        "gpt-4o": dict(context_size=128000, supports_n=True, supports_json_schema=True, tokenizer="o200k_base"),
+        "gpt-4o-mini": dict(context_size=128000, supports_n=True, supports_json_schema=True, tokenizer="o200k_base"),
+        "gpt-3.5-turbo": dict(context_size=4096, **_OPENAI_CHAT),
+        "gpt-3.5-turbo-0301": dict(context_size=4096, **_OPENAI_CHAT),
+        "gpt-3.5-turbo-0613": dict(context_size=4096, **_OPENAI_CHAT),
+        "gpt-3.5-turbo-1106": dict(context_size=16385, **_OPENAI_CHAT),
+        "gpt-3.5-turbo-0125": dict(context_size=16385, **_OPENAI_CHAT),
+        "gpt-3.5-turbo-16k": dict(context_size=16385, **_OPENAI_CHAT),
+        "gpt-3.5-turbo-16k-0613": dict(context_size=16385, **_OPENAI_CHAT),
+        "gpt-3.5-turbo-instruct": dict(context_size=4096, **_OPENAI_CHAT),
+        "text-ada-001": dict(context_size=2049, **_OPENAI_LEGACY),
+        "ada": dict(context_size=2049, **_OPENAI_LEGACY),
+        "text-babbage-001": dict(context_size=2040, **_OPENAI_LEGACY),
+        "babbage": dict(context_size=2049, **_OPENAI_LEGACY),
+        "text-curie-001": dict(context_size=2049, **_OPENAI_LEGACY),
+        "curie": dict(context_size=2049, **_OPENAI_LEGACY),
+        "davinci": dict(context_size=2049, **_OPENAI_LEGACY),
+        "text-davinci-003": dict(context_size=4097, **_OPENAI_CODEX),
+        "text-davinci-002": dict(context_size=4097, **_OPENAI_CODEX),
+        "code-davinci-002": dict(context_size=8001, **_OPENAI_CODEX),
+        "code-davinci-001": dict(context_size=8001, **_OPENAI_CODEX),
+        "code-cushman-002": dict(context_size=2048, **_OPENAI_CODEX),
+        "code-cushman-001": dict(context_size=2048, **_OPENAI_CODEX),
+    })
+
+    registry.register_provider(
+        "mistral",
+        "structgenie.driver.mistral_driver:MistralDriver",
+        patterns=["*mistral*", "*mixtral*"],
+    )
+    registry.register_models("mistral", {
+        name: dict(context_size=32768)
+        for name in [
+            "mistral-tiny", "mistral-small", "mistral-medium", "mistral-small-latest", "mistral-medium-latest",
+            "mistral-large-latest", "open-mistral-7b", "open-mixtral-8x7b",
+        ]
+    })
+
+
+driver_registry = DriverRegistry()
+_register_builtin(driver_registry)
@@ -0,0 +1,163 @@
+"""Deterministic offline generation driver.
+
+FakeDriver implements the structgenie BaseGenerationDriver interface without calling an LLM. It answers with
+scripted outputs (cycled in order) or the result of a responder function, waits for a latency drawn from a
+seeded distribution and raises injected errors at a configured rate. It is used to measure the framework
+overhead of llmp without network access (see benchmarks/bench_offline.py) and in tests.
+
+Engines take the driver class, so FakeDriver.configure returns a subclass holding the script:
+
+    driver = FakeDriver.configure(responses=["Genre: fantasy"], latency=lognormal(0.05, 0.5), error_rate=0.1)
+    engine = load_engine_from_job(job, driver=driver)
+    driver.script.num_calls
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple, Type, Union
+
+import yaml
+from structgenie.base import BaseGenerationDriver
+
+Latency = Union[float, Callable[[random.Random], float]]
+Response = Union[str, dict]
+
+
+class FakeDriverError(RuntimeError):
+    """Error injected by the FakeDriver."""
+
+
+def constant(seconds: float) -> Callable[[random.Random], float]:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Callable[[random.Random], float]:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    """Latency with a long tail, e.g. lognormal(0.8, 0.5) has a p99 of ~2.6s."""
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+class FakeScript:
+
+    def __init__(
+            self,
+            responses: list[Response] = None,
+            responder: Callable[[str, dict], Response] = None,
+            latency: Latency = 0.0,
+            error_rate: float = 0.0,
+            error: Type[Exception] = FakeDriverError,
+            token_usage: Optional[int] = None,
+            seed: int = 0,
+    ):
+        """Script of a FakeDriver.
+
+        Args:
+            responses (list[str|dict], optional): Outputs returned in order (cycled). Dicts are dumped as yaml.
+            responder (Callable, optional): Function (prompt, inputs) -> output, used instead of responses.
+            latency (float|Callable): Latency in seconds or a distribution drawn from a random.Random.
+            error_rate (float): Probability that a call raises the error.
+            error (Type[Exception]): The injected error.
+            token_usage (int, optional): Token usage per call. Defaults to (len(prompt) + len(output)) // 4.
+            seed (int): Seed of the latency and error draws.
+        """
+        if responses is None and responder is None:
+            raise ValueError("Either responses or responder must be provided.")
+        self.responses = responses
+        self.responder = responder
+        self.latency = latency if callable(latency) else constant(latency)
+        self.error_rate = error_rate
+        self.error = error
+        self.token_usage = token_usage
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.num_calls = 0
+        self.num_errors = 0
+
+    def next_call(self, prompt: str, inputs: dict) -> Tuple[str, float, bool]:
+        """Return the output, latency and whether the call fails."""
+        with self._lock:
+            index = self.num_calls
+            self.num_calls += 1
+            latency = max(self.latency(self._rng), 0.0)
+            fails = self.error_rate > 0 and self._rng.random() < self.error_rate
+            self.num_errors += int(fails)
+
+        if self.responder is not None:
+            response = self.responder(prompt, inputs)
+        else:
+            response = self.responses[index % len(self.responses)]
+        if isinstance(response, dict):
+            response = yaml.safe_dump(response, sort_keys=False, allow_unicode=True)
+        return response, latency, fails
+
+
+class FakeDriver(BaseGenerationDriver):
+    """Offline driver answering from a FakeScript."""
+    script: FakeScript = None
+    model_name: str = "fake-model"
+
+    def __init__(self, prompt: Any = None, model_name: str = None, llm_kwargs: dict = None):
+        self.prompt = prompt
+        self.model_name = model_name or self.model_name
+        self.llm_kwargs = llm_kwargs or {}
+
+    @classmethod
+    def prompt_mode(cls):
+        return "chat"
+
+    @classmethod
+    def configure(cls, model_name: str = "fake-model", **script_kwargs) -> Type["FakeDriver"]:
+        """Return a driver class answering from a new FakeScript (see FakeScript for the arguments)."""
+        return type(cls.__name__, (cls,), {"script": FakeScript(**script_kwargs), "model_name": model_name})
+
+    @classmethod
+    def load_driver(cls, prompt: Union[str, Any], model_name: str = None, llm_kwargs: dict = None, **kwargs):
+        if cls.script is None:
+            raise ValueError("FakeDriver is not configured. Use FakeDriver.configure(...) to create a driver.")
+        return cls(prompt, model_name=model_name, llm_kwargs=llm_kwargs)
+
+    def _prepare(self, inputs: dict) -> Tuple[str, str, float, bool]:
+        prompt = self.prompt if isinstance(self.prompt, str) else str(self.prompt)
+        # like the chat drivers, the last output of a retry is added without formatting
+        head, sep, last_output = prompt.partition("<%last_output%>")
+        prompt = head.format(**inputs) + sep + last_output
+        text, latency, fails = self.script.next_call(prompt, inputs)
+        return prompt, text, latency, fails
+
+    def _finish(self, prompt: str, text: str, fails: bool, start: float) -> Tuple[str, dict]:
+        if fails:
+            raise self.script.error("injected error")
+        token_usage = self.script.token_usage
+        if token_usage is None:
+            token_usage = (len(prompt) + len(text)) // 4
+        return text, {
+            "execution_time": time.perf_counter() - start,
+            "token_usage": token_usage,
+            "model_name": self.model_name,
+            "model_config": self.llm_kwargs,
+        }
+
+    def predict(self, memory: list[dict] = None, **kwargs) -> str:
+        return self.predict_and_measure(memory=memory, **kwargs)[0]
+
+    def predict_and_measure(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        start = time.perf_counter()
+        prompt, text, latency, fails = self._prepare(kwargs)
+        if latency:
+            time.sleep(latency)
+        return self._finish(prompt, text, fails, start)
+
+    async def predict_async(self, memory: list[dict] = None, **kwargs) -> str:
+        return (await self.predict_and_measure_async(memory=memory, **kwargs))[0]
+
+    async def predict_and_measure_async(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        start = time.perf_counter()
+        prompt, text, latency, fails = self._prepare(kwargs)
+        if latency:
+            await asyncio.sleep(latency)
+        return self._finish(prompt, text, fails, start)
@@ -0,0 +1,387 @@
+"""Record and replay LLM calls.
+
+RecordingDriver wraps any generation driver and stores each call (messages, llm_kwargs) -> (text, metrics) in a
+ReplayArchive. ReplayDriver answers from the archive without calling the LLM, either as fast as possible or
+with the recorded latency of each call, so recorded traffic can be replayed against new versions of llmp
+(see use_driver in llmp.data_model.job_record and benchmarks/bench_replay.py):
+
+    with ReplayArchive("traffic.jsonl.gz") as archive, use_driver(RecordingDriver.wrap(OpenAIDriver, archive)):
+        program.batch(inputs)
+
+    with use_driver(ReplayDriver.configure(ReplayArchive("traffic.jsonl.gz"), timing="original")):
+        program.batch(inputs)
+
+The archive is a gzip jsonl file. Message contents are stored once and referenced by id, so the shared
+instruction and examples of a job don't repeat in each call:
+
+    {"type": "content", "id": "<md5>", "content": "..."}
+    {"type": "call", "key": "<md5>", "model_name": "gpt-3.5-turbo", "llm_kwargs": {},
+     "messages": [{"role": "system", "content": "<content id>"}, ...], "text": "...", "metrics": {...},
+     "duration": 0.8, "retry": false}
+
+Requests are matched by their exact messages. Retries contain the failed output and the error remarks of the
+previous attempt, which rarely repeat verbatim (e.g. after a change of the parser), so a retry without exact
+match is answered by the recorded retry of the same request with the most similar remarks.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Optional, Tuple, Type, Union
+
+from structgenie.base import BaseGenerationDriver
+from structgenie.driver.utils import create_chat_message, create_examples_messages, split_prompt
+
+from llmp.utils.encoder import JSONEncoder
+from llmp.utils.serializer import get_serializer
+
+RETRY_MARKER = "<%last_output%>"
+TIMINGS = ("fast", "original")
+
+
+class ReplayMissError(LookupError):
+    """No recorded call matches the request."""
+
+
+def render_messages(prompt: Union[str, Any], memory: list[dict] = None, **inputs) -> list[dict]:
+    """Render a prompt with its inputs to chat messages (like the structgenie chat drivers)."""
+    prompt = prompt if isinstance(prompt, str) else str(prompt)
+    # the last output of a retry is added without formatting
+    head, sep, tail = prompt.partition(RETRY_MARKER)
+    head = head.format(**inputs)
+    prompt = head + sep + tail
+
+    messages = []
+    system_message = split_prompt(prompt, "system")
+    if system_message is not None:
+        messages.append(create_chat_message("system", system_message))
+    examples = split_prompt(prompt, "examples")
+    if examples:
+        messages.extend(create_examples_messages(examples))
+    for message in memory or []:
+        messages.append(create_chat_message(message["role"], message["content"]))
+
+    user_message = split_prompt(prompt, "user")
+    messages.append(create_chat_message("user", user_message if user_message is not None else head))
+
+    last_output = split_prompt(prompt, "last_output")
+    user_error = split_prompt(prompt, "user_error")
+    if last_output and user_error:
+        messages.append(create_chat_message("assistant", last_output))
+        messages.append(create_chat_message("user", user_error))
+    return messages
+
+
+def is_retry_prompt(prompt: Union[str, Any]) -> bool:
+    """Whether the prompt contains the last output and the error remarks of a previous attempt."""
+    prompt = prompt if isinstance(prompt, str) else str(prompt)
+    return RETRY_MARKER in prompt and bool(split_prompt(prompt, "last_output") and split_prompt(prompt, "user_error"))
+
+
+def driver_config(kwargs: dict) -> Tuple[str, dict]:
+    """Return the model name and the llm kwargs of the load_driver arguments of an engine."""
+    kwargs = dict(kwargs)
+    model_name = kwargs.pop("model_name", None)
+    return model_name, {**(kwargs.pop("llm_kwargs", None) or {}), **kwargs}
+
+
+def request_key(model_name: str, llm_kwargs: dict, messages: list[dict]) -> str:
+    canonical = json.dumps([model_name, llm_kwargs, messages], sort_keys=True, cls=JSONEncoder, default=str)
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
+def _content_id(content: str) -> str:
+    return hashlib.md5((content or "").encode("utf-8")).hexdigest()
+
+
+def _remarks(messages: list[dict]) -> str:
+    return "\n".join(message["content"] or "" for message in messages[-2:])
+
+
+class ReplayArchive:
+
+    def __init__(self, file_path: Union[str, Path], flush_every: int = 100):
+        """Archive of recorded LLM calls.
+
+        Existing calls are loaded on creation, new calls are appended to the file.
+
+        Args:
+            file_path (str|Path): Path of the archive (gzip jsonl).
+            flush_every (int): Append recorded calls to the file in batches of this size.
+        """
+        self.file_path = Path(file_path)
+        self.flush_every = flush_every
+        self._serializer = get_serializer()
+        self._lock = threading.Lock()
+        self._contents: dict[str, str] = {}
+        self._calls: dict[str, list[dict]] = {}
+        self._retries: dict[str, list[dict]] = {}
+        self._cursors: dict[str, int] = {}
+        self._buffer: list[dict] = []
+        self.num_calls = 0
+        self._load()
+
+    def __len__(self):
+        return self.num_calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # === Recording ===
+
+    def record(
+            self,
+            model_name: str,
+            llm_kwargs: dict,
+            messages: list[dict],
+            text: str,
+            metrics: dict,
+            duration: float,
+            retry: bool = False,
+    ) -> None:
+        """Add a call to the archive."""
+        with self._lock:
+            stored_messages = []
+            for message in messages:
+                content_id = _content_id(message["content"])
+                if content_id not in self._contents:
+                    self._contents[content_id] = message["content"]
+                    self._buffer.append(dict(type="content", id=content_id, content=message["content"]))
+                stored_messages.append({**message, "content": content_id})
+
+            call = dict(
+                type="call",
+                key=request_key(model_name, llm_kwargs, messages),
+                model_name=model_name,
+                llm_kwargs=llm_kwargs,
+                messages=stored_messages,
+                text=text,
+                metrics=metrics,
+                duration=duration,
+                retry=retry,
+            )
+            self._buffer.append(call)
+            self._add_call(call)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def flush(self) -> None:
+        """Append the buffered calls to the file."""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        self.flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        # every flush appends a gzip member, gzip readers read them as one stream
+        with gzip.open(self.file_path, "ab") as f:
+            f.write(self._serializer.dumps_lines(self._buffer))
+        self._buffer = []
+
+    # === Replay ===
+
+    def lookup(
+            self,
+            model_name: str,
+            llm_kwargs: dict,
+            messages: list[dict],
+            retry: bool = False,
+            min_similarity: float = 0.5,
+    ) -> Optional[dict]:
+        """Return the recorded call of a request, None if there is no match.
+
+        Requests recorded several times (e.g. votes) return their calls in recording order (cycled). Retries
+        without exact match return the recorded retry of the same request with the most similar remarks, if
+        the similarity is at least min_similarity.
+        """
+        key = request_key(model_name, llm_kwargs, messages)
+        with self._lock:
+            calls = self._calls.get(key)
+            if calls:
+                cursor = self._cursors.get(key, 0)
+                self._cursors[key] = cursor + 1
+                return calls[cursor % len(calls)]
+            if retry:
+                return self._most_similar_retry(model_name, llm_kwargs, messages, min_similarity)
+        return None
+
+    # === Private ===
+
+    def _most_similar_retry(self, model_name: str, llm_kwargs: dict, messages: list[dict], min_similarity: float):
+        candidates = self._retries.get(request_key(model_name, llm_kwargs, messages[:-2]), [])
+        remarks = _remarks(messages)
+        best, best_similarity = None, min_similarity
+        for call in candidates:
+            matcher = SequenceMatcher(None, remarks, _remarks(self._resolve(call["messages"])), autojunk=False)
+            if matcher.quick_ratio() < best_similarity:
+                continue
+            similarity = matcher.ratio()
+            if similarity >= best_similarity:
+                best, best_similarity = call, similarity
+        return best
+
+    def _resolve(self, stored_messages: list[dict]) -> list[dict]:
+        return [{**message, "content": self._contents.get(message["content"])} for message in stored_messages]
+
+    def _add_call(self, call: dict):
+        self._calls.setdefault(call["key"], []).append(call)
+        if call.get("retry"):
+            prefix_key = request_key(call["model_name"], call["llm_kwargs"], self._resolve(call["messages"][:-2]))
+            self._retries.setdefault(prefix_key, []).append(call)
+        self.num_calls += 1
+
+    def _load(self):
+        if not self.file_path.exists():
+            return
+        with gzip.open(self.file_path, "rb") as f:
+            for entry in self._serializer.iter_lines(f):
+                if entry["type"] == "content":
+                    self._contents[entry["id"]] = entry["content"]
+                elif entry["type"] == "call":
+                    self._add_call(entry)
+
+
+class RecordingDriver(BaseGenerationDriver):
+    """Driver wrapper recording the calls of another driver."""
+    driver: Type[BaseGenerationDriver] = None
+    archive: ReplayArchive = None
+
+    def __init__(self, executor: BaseGenerationDriver, prompt: Any, model_name: str, llm_kwargs: dict):
+        self.executor = executor
+        self.prompt = prompt
+        self.model_name = model_name
+        self.llm_kwargs = llm_kwargs
+
+    @classmethod
+    def wrap(cls, driver: Type[BaseGenerationDriver], archive: ReplayArchive) -> Type["RecordingDriver"]:
+        """Return a driver class recording the calls of driver to archive."""
+        return type(f"Recording{driver.__name__}", (cls,), {"driver": driver, "archive": archive})
+
+    @classmethod
+    def prompt_mode(cls):
+        return cls.driver.prompt_mode()
+
+    @classmethod
+    def load_driver(cls, prompt: Union[str, Any], **kwargs):
+        if cls.driver is None:
+            raise ValueError("RecordingDriver is not configured. Use RecordingDriver.wrap(driver, archive).")
+        executor = cls.driver.load_driver(prompt, **kwargs)
+        return cls(executor, prompt, *driver_config(kwargs))
+
+    def _record(self, messages: list[dict], text: str, metrics: dict, start: float):
+        self.archive.record(
+            self.model_name, self.llm_kwargs, messages, text, metrics,
+            duration=time.perf_counter() - start,
+            retry=is_retry_prompt(self.prompt),
+        )
+
+    def predict(self, memory: list[dict] = None, **kwargs) -> str:
+        return self.predict_and_measure(memory=memory, **kwargs)[0]
+
+    def predict_and_measure(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        messages = render_messages(self.prompt, memory, **kwargs)
+        start = time.perf_counter()
+        text, metrics = self.executor.predict_and_measure(memory=memory, **kwargs)
+        self._record(messages, text, metrics, start)
+        return text, metrics
+
+    async def predict_async(self, memory: list[dict] = None, **kwargs) -> str:
+        return (await self.predict_and_measure_async(memory=memory, **kwargs))[0]
+
+    async def predict_and_measure_async(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        messages = render_messages(self.prompt, memory, **kwargs)
+        start = time.perf_counter()
+        text, metrics = await self.executor.predict_and_measure_async(memory=memory, **kwargs)
+        self._record(messages, text, metrics, start)
+        return text, metrics
+
+
+class ReplayDriver(BaseGenerationDriver):
+    """Driver answering from a ReplayArchive."""
+    archive: ReplayArchive = None
+    timing: str = "fast"
+    time_scale: float = 1.0
+    min_similarity: float = 0.5
+
+    def __init__(self, prompt: Any, model_name: str, llm_kwargs: dict):
+        self.prompt = prompt
+        self.model_name = model_name
+        self.llm_kwargs = llm_kwargs
+
+    @classmethod
+    def prompt_mode(cls):
+        return "chat"
+
+    @classmethod
+    def configure(
+            cls,
+            archive: ReplayArchive,
+            timing: str = "fast",
+            time_scale: float = 1.0,
+            min_similarity: float = 0.5,
+    ) -> Type["ReplayDriver"]:
+        """Return a driver class replaying the calls of archive.
+
+        Args:
+            archive (ReplayArchive): The recorded calls.
+            timing (str): "fast" answers immediately, "original" waits for the recorded duration of each call.
+            time_scale (float): Factor of the recorded durations (timing "original").
+            min_similarity (float): Min similarity (0-1) of the error remarks of a fuzzy matched retry.
+        """
+        if timing not in TIMINGS:
+            raise ValueError(f"Unknown timing '{timing}'. Choose from {list(TIMINGS)}.")
+        attributes = dict(archive=archive, timing=timing, time_scale=time_scale, min_similarity=min_similarity)
+        return type(cls.__name__, (cls,), attributes)
+
+    @classmethod
+    def load_driver(cls, prompt: Union[str, Any], **kwargs):
+        if cls.archive is None:
+            raise ValueError("ReplayDriver is not configured. Use ReplayDriver.configure(archive).")
+        return cls(prompt, *driver_config(kwargs))
+
+    def _lookup(self, memory: list[dict], inputs: dict) -> Tuple[dict, float]:
+        messages = render_messages(self.prompt, memory, **inputs)
+        call = self.archive.lookup(
+            self.model_name, self.llm_kwargs, messages,
+            retry=is_retry_prompt(self.prompt),
+            min_similarity=self.min_similarity,
+        )
+        if call is None:
+            raise ReplayMissError(f"No recorded call for the request: {messages[-1]['content'][:200]}")
+        delay = call["duration"] * self.time_scale if self.timing == "original" else 0.0
+        return call, delay
+
+    @staticmethod
+    def _result(call: dict, start: float) -> Tuple[str, dict]:
+        return call["text"], {**(call["metrics"] or {}), "execution_time": time.perf_counter() - start}
+
+    def predict(self, memory: list[dict] = None, **kwargs) -> str:
+        return self.predict_and_measure(memory=memory, **kwargs)[0]
+
+    def predict_and_measure(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        start = time.perf_counter()
+        call, delay = self._lookup(memory, kwargs)
+        if delay:
+            time.sleep(delay)
+        return self._result(call, start)
+
+    async def predict_async(self, memory: list[dict] = None, **kwargs) -> str:
+        return (await self.predict_and_measure_async(memory=memory, **kwargs))[0]
+
+    async def predict_and_measure_async(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        start = time.perf_counter()
+        call, delay = self._lookup(memory, kwargs)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._result(call, start)
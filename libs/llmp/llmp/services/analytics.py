@@ -0,0 +1,429 @@
+"""Columnar export of event logs for offline analytics.
+
+The exporter converts `event_log.jsonl` into columnar parts in `<job dir>/analytics/event_log/`: Parquet files
+if pyarrow is installed, else directories with one `.npy` file per column. Each event is one
+row with the columns
+
+    event_id, timestamp, event_type, setting_hash (str), job_version (int, -1 if not set)
+    metrics.<key> (float or str): event_metrics flattened ("metrics.model_config.temperature"), numbers and
+        booleans as float (NaN if missing), strings as str ("" if missing). Error lists become metrics.num_errors.
+
+Exports are incremental: the manifest stores how far the log was exported (byte size and checksum of the last
+exported line) and only new lines are converted into new parts. A rewritten log is exported again.
+
+    {"format": "npy", "size": 40960, "tail": "<md5>", "parts": [{"name": "part-000000", "rows": 1000}],
+     "next_id": 1}
+
+Columns are loaded as numpy arrays ({name: array}), e.g. for pandas.DataFrame(columns). aggregate computes
+counts, failure rates and metric statistics per job version and setting with numpy (no python loop over events).
+"""
+import hashlib
+import shutil
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence, Union
+
+import numpy as np
+
+from llmp.types import EventType
+from llmp.utils.filesystem import FileOperations
+from llmp.utils.signature import setting_hash
+from llmp.utils.stats import group_mean, group_percentiles
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+ANALYTICS_DIR = "analytics"
+METRIC_PREFIX = "metrics."
+DEFAULT_METRICS = ("execution_time", "token_usage", "accuracy")
+DEFAULT_PERCENTILES = (50, 95)
+
+_FORMATS = ("parquet", "npy")
+
+
+def flatten_metrics(event_metrics: Union[dict, None], prefix: str = METRIC_PREFIX) -> dict:
+    """Flatten event metrics into scalar columns (numbers as float, strings as str)."""
+    columns = {}
+    for key, value in (event_metrics or {}).items():
+        name = prefix + key
+        if isinstance(value, dict):
+            columns.update(flatten_metrics(value, prefix=name + "."))
+        elif key == "errors" and isinstance(value, list):
+            columns.setdefault(prefix + "num_errors", float(len(value)))
+        elif isinstance(value, (bool, int, float)):
+            columns[name] = float(value)
+        elif isinstance(value, str):
+            columns[name] = value
+    return columns
+
+
+def event_row(event: dict) -> dict:
+    """Return the columns of an event."""
+    job_version = event.get("job_version")
+    row = dict(
+        event_id=event.get("event_id") or "",
+        timestamp=event.get("timestamp") or "",
+        event_type=event.get("event_type") or "",
+        setting_hash=setting_hash(event.get("job_setting")),
+        job_version=-1 if job_version is None else int(job_version),
+    )
+    row.update(flatten_metrics(event.get("event_metrics")))
+    return row
+
+
+class EventLogExporter(FileOperations):
+
+    def __init__(
+            self,
+            log_path: Path,
+            output_dir: Path = None,
+            format: str = None,
+            part_rows: int = 100_000,
+            max_parts: int = 32,
+    ):
+        """Incremental columnar export of an event log.
+
+        Args:
+            log_path (Path): Path of the event log (jsonl).
+            output_dir (Path, optional): Directory of the parts. Defaults to `analytics/event_log` in the job dir.
+            format (str, optional): "parquet" or "npy". Defaults to the format of an existing export, else parquet
+                if pyarrow is installed.
+            part_rows (int): Max rows per part.
+            max_parts (int): Merge the parts when an export exceeds this number of parts.
+        """
+        self.log_path = Path(log_path)
+        self.output_dir = Path(output_dir) if output_dir else self.log_path.parent / ANALYTICS_DIR / self.log_path.stem
+        self.manifest_path = self.output_dir / "manifest.json"
+        self.part_rows = part_rows
+        self.max_parts = max_parts
+
+        manifest_format = self._read_json_file(self.manifest_path).get("format")
+        self.format = format or manifest_format or ("parquet" if pyarrow is not None else "npy")
+        if self.format not in _FORMATS:
+            raise ValueError(f"Unknown format '{self.format}'. Choose from {list(_FORMATS)}.")
+        if self.format == "parquet" and pyarrow is None:
+            raise ImportError("The parquet format requires pyarrow. Install it or use format='npy'.")
+
+    @classmethod
+    def for_job(cls, base_path: str, job_id: str, **kwargs) -> "EventLogExporter":
+        """Return the exporter of a job of the file storage (JobStorage)."""
+        return cls(Path(base_path) / job_id / "event_log.jsonl", **kwargs)
+
+    # === Export ===
+
+    def export(self) -> int:
+        """Export the events appended since the last export. Returns the number of exported events."""
+        with self._file_lock(self.manifest_path):
+            manifest = self._read_json_file(self.manifest_path)
+            if not self._is_continuation(manifest):
+                self._clear()
+                manifest = {}
+            manifest = {"format": self.format, "size": 0, "tail": None, "parts": [], "next_id": 0, **manifest}
+
+            num_rows = 0
+            for rows, size, tail in self._iter_new_rows(manifest["size"]):
+                self._write_part(manifest, rows)
+                manifest.update(size=size, tail=tail)
+                num_rows += len(rows)
+
+            if len(manifest["parts"]) > self.max_parts:
+                self._merge_parts(manifest)
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._write_json_file(self.manifest_path, manifest)
+        return num_rows
+
+    def compact(self) -> None:
+        """Merge the parts into parts of part_rows rows."""
+        with self._file_lock(self.manifest_path):
+            manifest = self._read_json_file(self.manifest_path)
+            if manifest.get("parts"):
+                self._merge_parts(manifest)
+                self._write_json_file(self.manifest_path, manifest)
+
+    # === Read ===
+
+    def load(self, columns: Sequence[str] = None, export: bool = True) -> dict:
+        """Load the exported events as numpy arrays ({column: array}).
+
+        Args:
+            columns (Sequence[str], optional): Columns to load. Defaults to all columns.
+            export (bool): Export new events first.
+        """
+        if export:
+            self.export()
+        manifest = self._read_json_file(self.manifest_path)
+        parts = [self._read_part(part["name"], columns) for part in manifest.get("parts", [])]
+        return concat_columns(parts, manifest_rows=[part["rows"] for part in manifest.get("parts", [])])
+
+    # === Private ===
+
+    def _is_continuation(self, manifest: dict) -> bool:
+        """Whether the log starts with the exported lines (appends only since the last export)."""
+        if not manifest:
+            return True
+        if manifest.get("format") != self.format:
+            return False
+        if not self.log_path.exists() or self.log_path.stat().st_size < manifest["size"]:
+            return False
+        if manifest["tail"] is None:
+            return True
+        with self.log_path.open('rb') as f:
+            f.seek(max(manifest["size"] - 2 ** 16, 0))
+            lines = f.read(manifest["size"] - f.tell()).rstrip(b"\r\n").rsplit(b"\n", 1)
+        return _checksum(lines[-1]) == manifest["tail"]
+
+    def _iter_new_rows(self, offset: int) -> Iterator[tuple[list[dict], int, str]]:
+        """Yield chunks of new rows with the log size and checksum of the last line after the chunk."""
+        if not self.log_path.exists():
+            return
+        rows, tail = [], None
+        with self.log_path.open('rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                rows.append(event_row(self.serializer.loads(line)))
+                tail = _checksum(line)
+                if len(rows) >= self.part_rows:
+                    yield rows, offset, tail
+                    rows = []
+        if rows:
+            yield rows, offset, tail
+
+    def _write_part(self, manifest: dict, rows: list[dict]) -> None:
+        name = f"part-{manifest['next_id']:06d}"
+        self._write_columns(name, rows_to_columns(rows))
+        manifest["parts"].append(dict(name=name, rows=len(rows)))
+        manifest["next_id"] += 1
+
+    def _merge_parts(self, manifest: dict) -> None:
+        old_parts = manifest["parts"]
+        columns = concat_columns(
+            [self._read_part(part["name"]) for part in old_parts], manifest_rows=[part["rows"] for part in old_parts]
+        )
+        num_rows = sum(part["rows"] for part in old_parts)
+
+        manifest["parts"] = []
+        for start in range(0, num_rows, self.part_rows):
+            name = f"part-{manifest['next_id']:06d}"
+            self._write_columns(name, {key: values[start:start + self.part_rows] for key, values in columns.items()})
+            manifest["parts"].append(dict(name=name, rows=min(self.part_rows, num_rows - start)))
+            manifest["next_id"] += 1
+        for part in old_parts:
+            self._remove_part(part["name"])
+
+    def _write_columns(self, name: str, columns: dict) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.format == "parquet":
+            table = pyarrow.table({key: pyarrow.array(values) for key, values in columns.items()})
+            pyarrow.parquet.write_table(table, self.output_dir / f"{name}.parquet")
+            return
+        tmp_dir = self.output_dir / f".{name}.tmp"
+        tmp_dir.mkdir(exist_ok=True)
+        for key, values in columns.items():
+            np.save(tmp_dir / f"{key}.npy", values, allow_pickle=False)
+        tmp_dir.rename(self.output_dir / name)
+
+    def _read_part(self, name: str, columns: Sequence[str] = None) -> dict:
+        if self.format == "parquet":
+            path = self.output_dir / f"{name}.parquet"
+            available = pyarrow.parquet.read_schema(path).names
+            table = pyarrow.parquet.read_table(path, columns=[c for c in columns or available if c in available])
+            string_names = {field.name for field in table.schema if pyarrow.types.is_string(field.type)}
+            part = {}
+            for key, column in zip(table.column_names, table.columns):
+                values = column.to_numpy(zero_copy_only=False)
+                part[key] = values.astype(str) if key in string_names else values
+            return part
+        part_dir = self.output_dir / name
+        files = sorted(part_dir.glob("*.npy"))
+        return {
+            file.stem: np.load(file, allow_pickle=False)
+            for file in files if columns is None or file.stem in columns
+        }
+
+    def _remove_part(self, name: str, format: str = None) -> None:
+        if (format or self.format) == "parquet":
+            (self.output_dir / f"{name}.parquet").unlink(missing_ok=True)
+        else:
+            shutil.rmtree(self.output_dir / name, ignore_errors=True)
+
+    def _clear(self) -> None:
+        manifest = self._read_json_file(self.manifest_path)
+        for part in manifest.get("parts", []):
+            self._remove_part(part["name"], manifest.get("format"))
+
+
+# === Columns ===
+
+
+def rows_to_columns(rows: list[dict]) -> dict:
+    """Convert rows to typed numpy columns (see the module docstring for the types and fill values)."""
+    keys = {}
+    for row in rows:
+        for key, value in row.items():
+            is_string = keys.get(key, False) or isinstance(value, str)
+            keys[key] = is_string
+
+    columns = {}
+    for key, is_string in keys.items():
+        if key == "job_version":
+            columns[key] = np.fromiter((row.get(key, -1) for row in rows), dtype=np.int64, count=len(rows))
+        elif is_string:
+            columns[key] = np.array([_as_str(row.get(key)) for row in rows], dtype=str)
+        else:
+            columns[key] = np.fromiter((_as_float(row.get(key)) for row in rows), dtype=np.float64, count=len(rows))
+    return columns
+
+
+def concat_columns(parts: list[dict], manifest_rows: list[int] = None) -> dict:
+    """Concatenate column parts. Columns missing in a part are filled (NaN, "" or -1)."""
+    if not parts:
+        return {}
+    rows = manifest_rows or [len(next(iter(part.values()), [])) for part in parts]
+    names = list(dict.fromkeys(name for part in parts for name in part))
+
+    columns = {}
+    for name in names:
+        arrays = [part.get(name) for part in parts]
+        is_string = any(array is not None and array.dtype.kind in "US" for array in arrays)
+        filled = []
+        for array, num_rows in zip(arrays, rows):
+            if array is None:
+                array = _empty_column(name, num_rows, is_string)
+            elif is_string and array.dtype.kind not in "US":
+                array = array.astype(str)
+            filled.append(array)
+        columns[name] = np.concatenate(filled)
+    return columns
+
+
+def select(columns: dict, **filters) -> dict:
+    """Return the rows whose columns equal the filter values (or are in a list/tuple/set of values)."""
+    mask = _mask(columns, **filters)
+    return {name: values[mask] for name, values in columns.items()}
+
+
+# === Aggregates ===
+
+
+def aggregate(
+        columns: dict,
+        metrics: Sequence[str] = DEFAULT_METRICS,
+        by: Sequence[str] = ("job_version", "setting_hash"),
+        event_type: Union[str, Iterable[str], None] = EventType.GENERATION.value,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> list[dict]:
+    """Aggregate the metrics of events per group (default: per job version and setting).
+
+    Args:
+        columns (dict): Exported event columns (EventLogExporter.load).
+        metrics (Sequence[str]): Metric names (without the "metrics." prefix). Missing metrics are skipped.
+        by (Sequence[str]): Group columns.
+        event_type (str|Iterable[str], optional): Only aggregate events of this type (None for all events).
+        percentiles (Sequence[float]): Percentiles of the metrics.
+
+    Returns:
+        list[dict]: One dict per group with the group values, the count, the failure rate (share of events with
+            retries or errors, like llmp.services.metrics) and {mean, p<percentile>...} per metric.
+    """
+    if not columns:
+        return []
+    if event_type is not None:
+        columns = select(columns, event_type=event_type if isinstance(event_type, str) else list(event_type))
+    num_rows = len(columns["event_id"])
+    if num_rows == 0:
+        return []
+
+    keys, inverse = _group(columns, by)
+    num_groups = len(keys)
+    counts = np.bincount(inverse, minlength=num_groups)
+
+    failed = np.zeros(num_rows, dtype=bool)
+    for name in ("failure_rate", "num_errors"):
+        values = columns.get(METRIC_PREFIX + name)
+        if values is not None and values.dtype.kind == "f":
+            failed |= np.nan_to_num(values) > 0
+    failure_rates = np.bincount(inverse, weights=failed, minlength=num_groups) / counts
+
+    results = [
+        {**dict(zip(by, _python(key))), "count": int(count), "failure_rate": float(rate)}
+        for key, count, rate in zip(keys, counts, failure_rates)
+    ]
+    for metric in metrics:
+        values = columns.get(METRIC_PREFIX + metric)
+        if values is None or values.dtype.kind != "f":
+            continue
+        for result, stats in zip(results, _group_stats(values, inverse, num_groups, percentiles)):
+            result[metric] = stats
+    return results
+
+
+def _group(columns: dict, by: Sequence[str]) -> tuple[list[tuple], "np.ndarray"]:
+    """Return the distinct keys of the group columns and the group index of each row."""
+    uniques, codes = [], []
+    for name in by:
+        unique, code = np.unique(columns[name], return_inverse=True)
+        uniques.append(unique)
+        codes.append(code)
+    group_codes, inverse = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+    keys = [tuple(unique[code] for unique, code in zip(uniques, row)) for row in group_codes]
+    return keys, inverse.reshape(-1)
+
+
+def _group_stats(values, inverse, num_groups: int, percentiles: Sequence[float]) -> list[dict]:
+    means = group_mean(values, inverse, num_groups)
+    quantiles = group_percentiles(values, inverse, num_groups, percentiles)
+    return [
+        dict(mean=_value(mean), **{f"p{p:g}": _value(q) for p, q in zip(percentiles, group_quantiles)})
+        for mean, group_quantiles in zip(means, quantiles)
+    ]
+
+
+def _mask(columns: dict, **filters):
+    num_rows = len(next(iter(columns.values()), []))
+    mask = np.ones(num_rows, dtype=bool)
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set, frozenset)):
+            mask &= np.isin(columns[name], list(value))
+        else:
+            mask &= columns[name] == value
+    return mask
+
+
+def _empty_column(name: str, num_rows: int, is_string: bool):
+    if is_string:
+        return np.full(num_rows, "", dtype=str)
+    if name == "job_version":
+        return np.full(num_rows, -1, dtype=np.int64)
+    return np.full(num_rows, np.nan)
+
+
+def _python(key: tuple) -> tuple:
+    return tuple(value.item() if hasattr(value, "item") else value for value in key)
+
+
+def _as_str(value) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def _value(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _as_float(value) -> float:
+    return float("nan") if value is None else float(value)
+
+
+def _checksum(line: bytes) -> str:
+    return hashlib.md5(line.rstrip(b"\r\n")).hexdigest()
@@ -0,0 +1,118 @@
+"""Incremental example store.
+
+examples.jsonl is an append-only log of example records:
+    - an added or updated example appends its full record (a later line supersedes earlier lines of the same idx),
+    - a deleted example appends a tombstone `{"idx": ..., "_deleted": true}`.
+
+Loading folds the log (latest record per idx, in order of first insertion, tombstoned records dropped), so files
+written by older llmp versions (one line per example) are read as is. Superseded lines and tombstones are removed
+by compaction, which rewrites the folded log once they exceed a share of the live records.
+"""
+import hashlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from llmp.utils.encoder import dumps_encoder
+from llmp.utils.filesystem import FileOperations
+from llmp.utils.serializer import JSONSerializer
+
+TOMBSTONE_KEY = "_deleted"
+
+
+def example_fingerprints(records: Iterable) -> dict[str, str]:
+    """Fingerprint records by their content, so replaced, updated and edited in place records are detected."""
+    return {record.idx: hashlib.md5(dumps_encoder(record.dict()).encode()).hexdigest() for record in records}
+
+
+def diff_examples(records: list, stored: Optional[dict[str, str]]) -> tuple[list, list[str], dict[str, str]]:
+    """Return the added/updated records and deleted ids since the stored fingerprints, and the new fingerprints.
+
+    Without stored fingerprints (nothing persisted yet) all records are returned as changed.
+    """
+    fingerprints = example_fingerprints(records)
+    if stored is None:
+        return list(records), [], fingerprints
+    changed = [record for record in records if stored.get(record.idx) != fingerprints[record.idx]]
+    deleted = [idx for idx in stored if idx not in fingerprints]
+    return changed, deleted, fingerprints
+
+
+class ExampleStore(FileOperations):
+
+    def __init__(
+            self,
+            file_path: Path,
+            max_garbage_ratio: float = 0.5,
+            min_garbage_lines: int = 100,
+            serializer: JSONSerializer = None
+    ):
+        """Example store on a jsonl file.
+
+        Args:
+            file_path (Path): The path of examples.jsonl.
+            max_garbage_ratio (float): Compact when superseded lines and tombstones exceed this share of live records.
+            min_garbage_lines (int): Don't compact below this number of garbage lines.
+            serializer (JSONSerializer, optional): The serializer. Defaults to the fastest installed one.
+        """
+        self.file_path = Path(file_path)
+        self.max_garbage_ratio = max_garbage_ratio
+        self.min_garbage_lines = min_garbage_lines
+        self._serializer = serializer
+
+    # === Write ===
+
+    def write(self, records: Iterable) -> None:
+        """Replace all records."""
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock(self.file_path):
+            self._write_jsonl_file(self.file_path, records)
+
+    def append(self, records: Iterable = (), deleted_ids: Iterable[str] = ()) -> None:
+        """Append added/updated records and tombstones for deleted ids with a single write."""
+        lines = list(records) + [{"idx": idx, TOMBSTONE_KEY: True} for idx in deleted_ids]
+        if not lines:
+            return
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock(self.file_path):
+            self._append_jsonl_file(self.file_path, lines)
+
+    def compact(self) -> bool:
+        """Rewrite the folded log if it contains garbage. Returns True if the file was rewritten."""
+        if not self.file_path.exists():
+            return False
+        with self._file_lock(self.file_path):
+            num_lines, records = self._fold(self._iter_jsonl_file(self.file_path))
+            if num_lines == len(records):
+                return False
+            self._write_jsonl_file(self.file_path, records.values())
+            return True
+
+    # === Read ===
+
+    def load(self, example_ids: Iterable[str] = None) -> list[dict]:
+        """Return the latest record of each (live) example, optionally only of example_ids."""
+        return self.read(example_ids)[2]
+
+    def read(self, example_ids: Iterable[str] = None) -> tuple[int, int, list[dict]]:
+        """Return the number of garbage lines (superseded lines and tombstones), of live records and the records."""
+        num_lines, records = self._fold(self._iter_jsonl_file(self.file_path))
+        num_live = len(records)
+        if example_ids is not None:
+            example_ids = set(example_ids)
+            return num_lines - num_live, num_live, [record for idx, record in records.items() if idx in example_ids]
+        return num_lines - num_live, num_live, list(records.values())
+
+    def needs_compaction(self, num_garbage: int, num_live: int) -> bool:
+        """Check if the garbage exceeds the compaction thresholds."""
+        return num_garbage >= self.min_garbage_lines and num_garbage > self.max_garbage_ratio * num_live
+
+    @staticmethod
+    def _fold(lines: Iterator[dict]) -> tuple[int, dict[str, dict]]:
+        num_lines, records = 0, {}
+        for line in lines:
+            num_lines += 1
+            if line.get(TOMBSTONE_KEY):
+                records.pop(line["idx"], None)
+            else:
+                records[line["idx"]] = line
+        return num_lines, records
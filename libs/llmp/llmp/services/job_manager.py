@@ -1,15 +1,24 @@
-from typing import Dict, Any
+import weakref
+from datetime import datetime
+from typing import Dict, Any, Union
 
 from llmp.components.job_factory import job_factory
 from llmp.components.instruction.generation import InstructionGenerator
 from llmp.components.settings.program_settings import ProgramSettings
 from llmp.data_model.events import Event
 from llmp.services.job_storage import JobStorage
-from llmp.components.generator import Generator, MajorVoteGenerator
+from llmp.services.log_writer import BackgroundLogWriter
+from llmp.services.metrics import QUANTILES
+from llmp.services.sqlite_storage import SQLiteJobStorage
+from llmp.components.generator import Generator, MajorVoteGenerator, PackedGenerator, CascadeGenerator
+from llmp.components.generator.cascade import get_cascade_hit_rates
 from llmp.data_model import JobRecord, ExampleRecord
-from llmp.types import EventType, IOModelDefinition
+from llmp.data_model.job_record import load_engine_from_job
+from llmp.integration.structgenie import AsyncEngine
+from llmp.types import EventType, IOModelDefinition, VerificationType
 from llmp.utils.io_model import hash_from_io_models
 from llmp.utils.signature import safe_job_name
+from llmp.utils.singleflight import SingleFlight, coalescing_key
 
 
 def load_generator_cls(generator_type: str):
@@ -18,17 +27,47 @@ def load_generator_cls(generator_type: str):
         return Generator
     elif generator_type == "consensus":
         raise MajorVoteGenerator
+    elif generator_type == "cascade":
+        return CascadeGenerator
+    elif generator_type == "packed":
+        return PackedGenerator
     elif generator_type == "async":
         raise NotImplementedError
     else:
         raise ValueError(f"Generator type '{generator_type}' not supported.")
 
 
+def load_job_storage(base_path: str, storage_backend: str = "file"):
+    """Load a job storage by backend type."""
+    if storage_backend == "file":
+        return JobStorage(base_path)
+    elif storage_backend == "sqlite":
+        return SQLiteJobStorage(base_path)
+    else:
+        raise ValueError(f"Storage backend '{storage_backend}' not supported.")
+
+
 class JobManager:
-    def __init__(self, base_path: str = None):
+    def __init__(
+            self,
+            base_path: str = None,
+            storage_backend: str = "file",
+            background_logging: bool = True,
+            max_buffered_logs: int = 500):
         if base_path is None:
             base_path = "./data/jobs"
-        self.job_storage = JobStorage(base_path)
+        self.max_buffered_logs = max_buffered_logs
+        self.job_storage = load_job_storage(base_path, storage_backend)
+        self.log_writer = BackgroundLogWriter.acquire(self.job_storage) if background_logging else None
+        # release the shared log writer when the manager is closed or garbage collected
+        self._release_log_writer = weakref.finalize(self, self.log_writer.release) if self.log_writer else None
+        self._in_flight = SingleFlight()
+
+    def close(self):
+        """Flush the queued logs and release the log writer."""
+        if self._release_log_writer is not None:
+            self._release_log_writer()
+            self.log_writer = None
 
     def create_job(
             self,
@@ -55,6 +94,7 @@ class JobManager:
                 io_hash=hash_from_io_models(job.input_model, job.output_model, job.instruction, config=config)
             )
             print(f"Job with identical InputModel and OutputModel already exists. Using existing {job.job_name} instead.")
+            job.set_log_sink(self.store_logs, self.max_buffered_logs)
             return job
 
         # check if job_name already exists
@@ -86,28 +126,82 @@ class JobManager:
 
         # save job
         self.job_storage.store_job(job)
+        job.set_log_sink(self.store_logs, self.max_buffered_logs)
 
         return job
 
-    def get_job(self, idx: str = None, name: str = None, io_hash: str = None) -> JobRecord:
-        """Retrieve details for a specific job."""
-        return self.job_storage.get(idx=idx, name=name, io_hash=io_hash)
+    def get_job(
+            self,
+            idx: str = None,
+            name: str = None,
+            io_hash: str = None,
+            example_ids: list[str] = None,
+            lazy: bool = True
+    ) -> JobRecord:
+        """Retrieve details for a specific job.
+
+        Example records are loaded on first access unless lazy is False, so metadata, logs and metrics can be
+        read without parsing the examples. Generating outputs builds the prompt from the examples and loads
+        them all. Pass example_ids to load only a subset, saving such a job keeps the other stored examples.
+        """
+        job = self.job_storage.get(idx=idx, name=name, io_hash=io_hash, example_ids=example_ids, lazy=lazy)
+        job.set_log_sink(self.store_logs, self.max_buffered_logs)
+        return job
 
     def update_job(self, job: JobRecord):
         """Update details of a specific job."""
+        self.flush_logs()
         self.job_storage.update_job(job)
 
     def delete_job(self, idx: str):
         """Delete a specific job."""
         return self.job_storage.delete_job(idx)
 
+    def rollback_job(self, job_id: str, version: int) -> JobRecord:
+        """Rollback a job to a previous version. The rollback is stored as a new version."""
+        job = self.get_job(idx=job_id)
+        job.version_history = self.job_storage.load_version_history(job)
+        job.rollback(version)
+        job.log_event(Event(
+            event_type=EventType.UPDATE_JOB,
+            job_setting=dict(instruction=job.instruction, example_id=[example.idx for example in job.example_records]),
+            job_version=job.version,
+            extra=dict(rollback_to=version),
+        ))
+        self.update_job(job)
+        return job
+
+    def diff_job_versions(self, job_id: str, old_version: int, new_version: int) -> dict:
+        """Return the changes (instruction, added/removed example ids, config) between two versions of a job."""
+        job = self.get_job(idx=job_id)
+        job.version_history = self.job_storage.load_version_history(job)
+        return job.diff_versions(old_version, new_version)
+
     def optimize_job(self, *args, **kwargs):
         """Run the optimization process for a job, including generating examples and refining instructions."""
         pass
 
-    # TODO: make self.job_storage.store_logs() multi-threaded
     def generate_output(self, job: JobRecord, input_data: dict, generator_type: str = "default", **kwargs):
-        """Generate output for a specific input."""
+        """Generate output for a specific input.
+
+        Concurrent identical calls (same job version, settings and input) share one generation.
+        """
+        key = coalescing_key(job, input_data, generator_type=generator_type, **kwargs)
+        return self._in_flight.do(key, self._generate_output, job, input_data, generator_type, **kwargs)
+
+    async def generate_output_async(self, job: JobRecord, input_data: dict, generator_type: str = "default", **kwargs):
+        """Generate output for a specific input with an AsyncEngine.
+
+        Concurrent identical async calls (same job version, settings and input) share one generation.
+        Async calls are not coalesced with sync calls: a sync caller waiting on an async leader would
+        block the event loop the leader runs on. Only the default generator is supported.
+        """
+        if generator_type != "default":
+            raise NotImplementedError(f"Generator type '{generator_type}' is not supported for async generation.")
+        key = coalescing_key(job, input_data, generator_type=generator_type, execution="async", **kwargs)
+        return await self._in_flight.do_async(key, self._generate_output_async, job, input_data, **kwargs)
+
+    def _generate_output(self, job: JobRecord, input_data: dict, generator_type: str = "default", **kwargs):
         generator = load_generator_cls(generator_type=generator_type)(job, **kwargs)
         result, run_metrics = generator.generate(input_data, **kwargs)
         event_metric = {
@@ -116,10 +210,67 @@ class JobManager:
             **kwargs
         }
         job.log_generation(input_data, result, event_metric)
-        self.job_storage.store_logs(job)
+        self.store_logs(job)
+
+        return result, run_metrics
+
+    async def _generate_output_async(self, job: JobRecord, input_data: dict, **kwargs):
+        engine = load_engine_from_job(job, engine_cls=AsyncEngine)
+        result, run_metrics = await engine.run(input_data, **kwargs)
+        event_metric = {
+            "verification_type": VerificationType.SINGLE_VOTE,
+            **run_metrics,
+            **kwargs
+        }
+        job.log_generation(input_data, result, event_metric)
+        self.store_logs(job)
 
         return result, run_metrics
 
+    def generate_outputs(self, job: JobRecord, input_list: list[dict], generator_type: str = "packed", **kwargs):
+        """Generate outputs for a list of inputs.
+
+        With the packed generator multiple inputs are sent in one prompt, each input gets an even share of
+        the tokens and time of its pack plus the metrics of its own retries. Logs are stored once for the
+        whole list.
+
+        Returns:
+            tuple[list, list[dict]]: The outputs and the run metrics of each input.
+        """
+        generator = load_generator_cls(generator_type=generator_type)(job, **kwargs)
+        if generator_type == "packed":
+            results, item_metrics = generator.generate(input_list, **kwargs)
+        else:
+            results, item_metrics = [], []
+            for input_data in input_list:
+                result, run_metrics = generator.generate(input_data, **kwargs)
+                results.append(result)
+                item_metrics.append(run_metrics)
+
+        for input_data, result, metrics in zip(input_list, results, item_metrics):
+            event_metric = {
+                "verification_type": generator.verification_type,
+                **metrics,
+                **kwargs
+            }
+            job.log_generation(input_data, result, event_metric)
+        self.store_logs(job)
+
+        return results, item_metrics
+
+    def store_logs(self, job: JobRecord):
+        """Store the logs of a job. With background logging the logs are queued and written by the log writer."""
+        if self.log_writer:
+            self.log_writer.submit(job)
+        else:
+            self.job_storage.store_logs(job)
+
+    def flush_logs(self, timeout: float = None) -> bool:
+        """Write all queued logs."""
+        if self.log_writer:
+            return self.log_writer.flush(timeout)
+        return True
+
     def generate_instruction(self, job: JobRecord, **kwargs) -> str:
         """Generate an instruction for a specific job."""
         generator = InstructionGenerator(job, **kwargs)
@@ -130,12 +281,47 @@ class JobManager:
         pass
 
     def evaluate_job_performance(self, job_id: str) -> Dict[str, float]:
-        """Evaluate the performance metrics for a specific job."""
-        pass
+        """Evaluate the performance of the current version of a job from its metric rollup.
 
-    def get_job_metrics(self, job_id: str) -> Dict[str, Any]:
-        """Retrieve metrics for a specific job."""
-        pass
+        Returns:
+            Dict[str, float]: The number of generations, failure rate, latency percentiles (latency_p50,
+                latency_p95, latency_p99), mean token usage and mean retries of the current job version.
+                Values without generations are None.
+        """
+        self.flush_logs()
+        job = self.job_storage.get(idx=job_id)
+        metrics = self.job_storage.load_job_metrics(job).summary(job.version)
+        return {
+            "count": metrics["count"],
+            "failure_rate": metrics["failure_rate"],
+            **{f"latency_{name}": metrics["execution_time"][name] for name in QUANTILES},
+            "token_usage": metrics["token_usage"]["mean"],
+            "retries": metrics["retries"]["mean"],
+        }
+
+    def get_job_metrics(self, job_id: str, version: int = None, by_version: bool = False) -> Dict[str, Any]:
+        """Retrieve the generation metrics of a job from its metric rollup.
+
+        Metrics are the count, failure rate and histogram summaries (mean, p50, p95, p99, max) of the
+        execution time, token usage and retries of the generations.
+
+        Args:
+            job_id (str): The job id.
+            version (int, optional): Only the metrics of this job version. Defaults to all versions merged.
+            by_version (bool): Return the metrics per job version instead ({version: metrics}).
+        """
+        self.flush_logs()
+        job = self.job_storage.get(idx=job_id)
+        rollup = self.job_storage.load_job_metrics(job)
+        if by_version:
+            return rollup.summaries()
+        return rollup.summary(version)
+
+    def get_cascade_hit_rates(self, job_id: str) -> Dict[str, float]:
+        """Return the share of generations served by each tier of the job's model cascade."""
+        self.flush_logs()
+        job = self.job_storage.get(idx=job_id)
+        return get_cascade_hit_rates(job, self.job_storage.load_event_log(job))
 
     def human_verify_example(self, example: ExampleRecord) -> bool:
         """Submit an example for human verification and get the result."""
@@ -149,7 +335,9 @@ class JobManager:
             config: dict = None
     ) -> JobRecord:
         """Retrieve a job by input/output model."""
-        return self.job_storage.get(io_hash=hash_from_io_models(input_model, output_model, instruction, config=config))
+        job = self.job_storage.get(io_hash=hash_from_io_models(input_model, output_model, instruction, config=config))
+        job.set_log_sink(self.store_logs, self.max_buffered_logs)
+        return job
 
 
     def log_action(self, action: str, job_id: str):
@@ -158,13 +346,31 @@ class JobManager:
 
     def get_event_log(self, job_id: str):
         """Retrieve the event log for a specific job."""
+        self.flush_logs()
         job = self.job_storage.get(idx=job_id)
         return self.job_storage.load_event_log(job)
 
-    def get_generation_log(self, job_id: str):
-        """Retrieve the generation log for a specific job."""
+    def get_event_errors(self, job_id: str, event_id: str) -> list:
+        """Retrieve the errors of an event, the full list if the event log keeps only the latest errors."""
+        self.flush_logs()
+        job = self.job_storage.get(idx=job_id)
+        event_errors = self.job_storage.load_event_errors(job)
+        if event_id in event_errors:
+            return event_errors[event_id]
+        event = next((event for event in self.job_storage.load_event_log(job) if event.event_id == event_id), None)
+        return (event.event_metrics or {}).get("errors", []) if event else []
+
+    def get_generation_log(self, job_id: str, start: Union[str, datetime] = None, end: Union[str, datetime] = None):
+        """Retrieve the generation log for a specific job, optionally within a time range [start, end]."""
+        self.flush_logs()
+        job = self.job_storage.get(idx=job_id)
+        return self.job_storage.load_generation_log(job, start=start, end=end)
+
+    def update_generation_log(self, job_id: str, entries: list[dict]):
+        """Update logged generations of a job by event_id, e.g. human corrections of the output."""
+        self.flush_logs()
         job = self.job_storage.get(idx=job_id)
-        return self.job_storage.load_generation_log(job)
+        self.job_storage.update_generation_log(job, entries)
 
     # # === Private methods ===
     #
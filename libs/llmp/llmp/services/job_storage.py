@@ -1,26 +1,63 @@
+import hashlib
+import logging
 import shutil
+import threading
 from pathlib import Path
-from typing import Union
+from datetime import datetime
+from typing import Iterator, Union
 
 from llmp.data_model import JobRecord, ExampleRecord
-from llmp.data_model.events import Event
+from llmp.data_model.example_record import LazyExampleRecords
+from llmp.data_model.events import Event, ERROR_LOG, error_entries
+from llmp.services.example_store import ExampleStore, diff_examples, example_fingerprints
+from llmp.services.log_segments import SegmentedLog, DEFAULT_SEGMENT_BYTES
+from llmp.services.metrics import MetricsRollup, METRICS_FILE
 from llmp.utils.filesystem import FileOperations
 from llmp.utils.io_model import hash_from_io_models
+from llmp.utils.serializer import get_serializer
 from llmp.utils.signature import is_valid_uuid, safe_job_name
 
+logger = logging.getLogger(__name__)
+
 
 class JobStorage(FileOperations):
 
-    def __init__(self, base_path: str = None):
+    def __init__(
+            self,
+            base_path: str = None,
+            json_backend: str = None,
+            log_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+            log_segment_age: float = None,
+            max_log_segments: int = None,
+            log_compression: str = None,
+    ):
         self.base_path = base_path or "./data/jobs"
+        self._serializer = get_serializer(json_backend) if json_backend else None
+        self._state_key = f"file:{Path(self.base_path).resolve()}"
+        self._compacting = set()
+        self._compaction_lock = threading.Lock()
+        self.log_segment_settings = dict(
+            max_segment_bytes=log_segment_bytes,
+            max_segment_age=log_segment_age,
+            max_segments=max_log_segments,
+            compression=log_compression,
+        )
 
     def store_job(self, job: JobRecord) -> None:
         self._save_job(job)
 
-    def get(self, idx: str = None, name: str = None, io_hash: str = None) -> JobRecord:
+    def get(
+            self,
+            idx: str = None,
+            name: str = None,
+            io_hash: str = None,
+            example_ids: list[str] = None,
+            lazy: bool = True
+    ) -> JobRecord:
         """Load a job by idx, name, or io_hash.
 
         Only one of idx, name, or io_hash should be provided.
+        Example records are loaded on first access (lazy) and can be restricted to example_ids.
         """
 
         assert sum([idx is not None, name is not None,
@@ -37,7 +74,7 @@ class JobStorage(FileOperations):
         if not idx:
             raise ValueError("No job found.")
 
-        return self._load_job(idx)
+        return self._load_job(idx, example_ids=example_ids, lazy=lazy)
 
     def update_job(self, job: JobRecord) -> None:
         new_io_hash = hash_from_io_models(job.input_model, job.output_model, job.instruction)
@@ -65,15 +102,16 @@ class JobStorage(FileOperations):
 
     def register_job(self, job: JobRecord):
         """Register a job in the registry."""
-        registry = self._load_registry()
-        assert job.io_hash not in registry.keys(), f"Job with io_hash '{job.io_hash}' already exists."
-        assert job.job_name not in registry.keys(), f"Job with name '{job.job_name}' already exists."
+        registry_file = Path(self.base_path) / "job_register.json"
+        with self._file_lock(registry_file):
+            registry = self._load_registry()
+            assert job.io_hash not in registry.keys(), f"Job with io_hash '{job.io_hash}' already exists."
+            assert job.job_name not in registry.keys(), f"Job with name '{job.job_name}' already exists."
 
-        registry[job.job_name] = job.idx
-        registry[job.io_hash] = job.idx
+            registry[job.job_name] = job.idx
+            registry[job.io_hash] = job.idx
 
-        registry_file = Path(self.base_path) / "job_register.json"
-        self._write_json_file(registry_file, registry)
+            self._write_json_file(registry_file, registry)
 
     def get_idx_by_name(self, name: str) -> Union[str, None]:
         """Retrieve the idx of a job by its name."""
@@ -86,16 +124,39 @@ class JobStorage(FileOperations):
     # ==== Log Methods ====
 
     def store_generation_log(self, job: JobRecord, generation: list[dict]) -> None:
-        job_dir = self._get_job_directory(job)
-        self._write_jsonl_file(job_dir / "generation_log.jsonl", generation)
+        generation_log = self._get_generation_log(job)
+        generation_log.clear()
+        generation_log.append(generation, dedupe_key=None)
+
+    def update_generation_log(self, job: JobRecord, entries: list[dict]) -> None:
+        """Update logged generations by event_id (fields are merged), via the update overlay of the log."""
+        self._get_generation_log(job).update(entries)
+
+    def load_generation_log(
+            self,
+            job: JobRecord,
+            start: Union[str, datetime] = None,
+            end: Union[str, datetime] = None
+    ) -> list[dict]:
+        return list(self.iter_generation_log(job, start=start, end=end))
+
+    def iter_generation_log(
+            self,
+            job: JobRecord,
+            start: Union[str, datetime] = None,
+            end: Union[str, datetime] = None
+    ) -> Iterator[dict]:
+        """Stream the generation log across segments, optionally within a time range [start, end]."""
+        return self._get_generation_log(job).iter_entries(start=start, end=end)
 
-    def load_generation_log(self, job: JobRecord) -> list[dict]:
+    def load_event_log(self, job: JobRecord) -> list[Event]:
         job_dir = self._get_job_directory(job)
-        return self._read_jsonl_file(job_dir / "generation_log.jsonl")
+        return [Event.parse_obj(entry) for entry in self._iter_jsonl_file(job_dir / "event_log.jsonl")]
 
-    def load_event_log(self, job: JobRecord) -> list[Event]:
+    def load_event_errors(self, job: JobRecord) -> dict[str, list[str]]:
+        """Load the full error lists of events with compacted errors by event_id."""
         job_dir = self._get_job_directory(job)
-        return [Event.parse_obj(entry) for entry in self._read_jsonl_file(job_dir / "event_log.jsonl")]
+        return {entry["event_id"]: entry["errors"] for entry in self._iter_jsonl_file(job_dir / f"{ERROR_LOG}.jsonl")}
 
     def load_version_history(self, job: JobRecord) -> list[dict]:
         job_dir = self._get_job_directory(job)
@@ -103,57 +164,164 @@ class JobStorage(FileOperations):
 
     def store_event_log(self, job: JobRecord, events: list[Event]) -> None:
         job_dir = self._get_job_directory(job)
-        self._write_jsonl_file(job_dir / "event_log.jsonl", [event.dict() for event in events])
+        with self._file_lock(job_dir / "event_log.jsonl"):
+            self._write_jsonl_file(job_dir / "event_log.jsonl", events)
+            self._append_jsonl_file(job_dir / f"{ERROR_LOG}.jsonl", error_entries(events))
+            self._write_json_file(job_dir / METRICS_FILE, MetricsRollup.from_events(events).to_dict())
+
+    def load_job_metrics(self, job: JobRecord) -> MetricsRollup:
+        """Load the metric rollup of a job (built from the event log once if missing)."""
+        job_dir = self._get_job_directory(job)
+        with self._file_lock(job_dir / "event_log.jsonl"):
+            return self._read_metrics_rollup(job_dir)
 
     def store_logs(self, job: JobRecord):
         if len(job.event_log) > 0 or len(job.generation_log) > 0:
             self._save_logs(job)
 
+    def compact_examples(self, job: JobRecord) -> bool:
+        """Remove superseded records and tombstones from examples.jsonl. Returns True if the file was rewritten."""
+        return self._get_example_store(self._get_job_directory(job)).compact()
+
     # ==== Private Methods ====
 
     def _save_job(self, job: JobRecord) -> None:
         job_dir = self._get_job_directory(job)
         job_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save Metadata
+        state = job._storage_state.setdefault(self._state_key, {})
+
+        # Save Metadata (skipped if unchanged since the last save)
         exclude_metadata = {"example_records", "version_history", "event_log", "generation_log"}
-        self._write_json_file(job_dir / "metadata.json", job.dict(exclude=exclude_metadata))
+        metadata = self.serializer.dumps(job.dict(exclude=exclude_metadata))
+        metadata_hash = hashlib.md5(metadata).hexdigest()
+        if state.get("metadata") != metadata_hash:
+            self._atomic_write(job_dir / "metadata.json", metadata)
+            state["metadata"] = metadata_hash
 
         # Save Examples
-        self._write_jsonl_file(job_dir / "examples.jsonl", [example.dict() for example in job.example_records])
+        self._save_examples(job, job_dir, state)
 
         # Save Version History
-        self._append_jsonl_file(job_dir / "version_history.jsonl", [version for version in job.version_history])
+        with self._file_lock(job_dir / "version_history.jsonl"):
+            stored = {entry.get("version") for entry in self._iter_jsonl_file(job_dir / "version_history.jsonl")}
+            new_versions = [entry for entry in job.version_history if entry.get("version") not in stored]
+            self._append_jsonl_file(job_dir / "version_history.jsonl", new_versions)
 
         # Save/append logs
         self._save_logs(job)
 
+    def _save_examples(self, job: JobRecord, job_dir: Path, state: dict) -> None:
+        """Append added/updated examples and tombstones of deleted examples since the last load/save.
+
+        Examples that were never accessed (lazy loading) are skipped. Jobs loaded with a subset of their
+        examples are always merged into the stored examples, never replace them. Compaction runs in the
+        background once superseded records and tombstones exceed the thresholds of the ExampleStore.
+        """
+        records = job.example_records
+        if isinstance(records, LazyExampleRecords) and not records.is_loaded:
+            return
+
+        store = self._get_example_store(job_dir)
+        partial = job._storage_state.get("partial_examples", False)
+        if not partial and ("examples" not in state or not store.file_path.exists()):
+            store.write(records)
+            state.update(examples=example_fingerprints(records), example_garbage=0, example_live=len(records))
+            return
+
+        stored = state.setdefault("examples", {})
+        state.setdefault("example_garbage", 0)
+        state.setdefault("example_live", 0)
+        changed, deleted, state["examples"] = diff_examples(records, stored)
+        store.append(changed, deleted)
+
+        num_updated = sum(1 for record in changed if record.idx in stored)
+        state["example_garbage"] += num_updated + 2 * len(deleted)
+        state["example_live"] += len(changed) - num_updated - len(deleted)
+        if store.needs_compaction(state["example_garbage"], state["example_live"]):
+            state["example_garbage"] = 0
+            self._compact_in_background(store)
+
+    def _compact_in_background(self, store: ExampleStore) -> None:
+        key = str(store.file_path)
+        with self._compaction_lock:
+            if key in self._compacting:
+                return
+            self._compacting.add(key)
+
+        def compact():
+            try:
+                store.compact()
+            except Exception:
+                logger.exception("Error while compacting %s", store.file_path)
+            finally:
+                with self._compaction_lock:
+                    self._compacting.discard(key)
+
+        threading.Thread(target=compact, name="llmp-example-compaction", daemon=True).start()
+
     def _save_logs(self, job: JobRecord) -> None:
         job_dir = self._get_job_directory(job)
         job_dir.mkdir(parents=True, exist_ok=True)
 
         # Save/Append Event History
-        event_log = self._read_jsonl_file(job_dir / "event_log.jsonl")
-        event_ids = [event["event_id"] for event in event_log]
-        new_events = [event.dict() for event in job.event_log if event.event_id not in event_ids]
-        self._append_jsonl_file(job_dir / "event_log.jsonl", new_events)
+        with self._file_lock(job_dir / "event_log.jsonl"):
+            event_ids = {event["event_id"] for event in self._iter_jsonl_file(job_dir / "event_log.jsonl")}
+            new_events = [event for event in job.event_log if event.event_id not in event_ids]
+            rollup = self._read_metrics_rollup(job_dir)
+            self._append_jsonl_file(job_dir / "event_log.jsonl", new_events)
+            self._append_jsonl_file(job_dir / f"{ERROR_LOG}.jsonl", error_entries(new_events))
+            if rollup.update(new_events):
+                self._write_json_file(job_dir / METRICS_FILE, rollup.to_dict())
         job.event_log = []
 
-        # Save/Append Generation History
-        generation_log = self._read_jsonl_file(job_dir / "generation_log.jsonl")
-        event_ids = [event["event_id"] for event in generation_log]
-        new_events = [event for event in job.generation_log if event["event_id"] not in event_ids]
-        self._append_jsonl_file(job_dir / "generation_log.jsonl", new_events)
+        # Save/Append Generation History (deduplicated against the active segment)
+        if job.generation_log:
+            self._get_generation_log(job).append(job.generation_log)
         job.generation_log = []
 
-    def _load_job(self, job_idx: str) -> "JobRecord":
+    def _read_metrics_rollup(self, job_dir: Path) -> MetricsRollup:
+        """Read the metric rollup. The caller must hold the event log lock."""
+        data = self._read_json_file(job_dir / METRICS_FILE)
+        if data:
+            return MetricsRollup.from_dict(data)
+        # event logs of older llmp versions have no rollup yet
+        rollup = MetricsRollup.from_events(self._iter_jsonl_file(job_dir / "event_log.jsonl"))
+        if rollup.num_events:
+            self._write_json_file(job_dir / METRICS_FILE, rollup.to_dict())
+        return rollup
+
+    def _load_job(self, job_idx: str, example_ids: list[str] = None, lazy: bool = False) -> "JobRecord":
         job_dir = Path(self.base_path) / job_idx
         # Load Metadata
         metadata = self._read_json_file(job_dir / "metadata.json")
 
+        job = JobRecord(**metadata)
+        job._storage_state["partial_examples"] = example_ids is not None
+
         # Load Examples
-        metadata["example_records"] = [ExampleRecord.parse_obj(example) for example in self._read_jsonl_file(job_dir / "examples.jsonl")]
-        return JobRecord(**metadata)
+        def load_examples():
+            return self._load_example_records(job, job_dir, example_ids)
+
+        if lazy:
+            job.__dict__["example_records"] = LazyExampleRecords(loader=load_examples)
+        else:
+            job.__dict__["example_records"] = load_examples()
+        return job
+
+    def _load_example_records(
+            self,
+            job: JobRecord,
+            job_dir: Path,
+            example_ids: list[str] = None
+    ) -> list[ExampleRecord]:
+        """Load example records written by the storage via the trusted fast path (no validation)."""
+        num_garbage, num_live, examples = self._get_example_store(job_dir).read(example_ids)
+        records = [ExampleRecord.from_storage(example) for example in examples]
+        job._storage_state.setdefault(self._state_key, {}).update(
+            examples=example_fingerprints(records), example_garbage=num_garbage, example_live=num_live
+        )
+        return records
 
 
     def io_hash_in_register(self, io_hash: str):
@@ -164,25 +332,37 @@ class JobStorage(FileOperations):
     def _get_job_directory(self, job: JobRecord) -> Path:
         return Path(self.base_path) / job.idx
 
+    def _get_example_store(self, job_dir: Path) -> ExampleStore:
+        return ExampleStore(job_dir / "examples.jsonl", serializer=self.serializer)
+
+    def _get_generation_log(self, job: JobRecord) -> SegmentedLog:
+        return SegmentedLog(
+            self._get_job_directory(job) / "generation_log.jsonl",
+            serializer=self.serializer,
+            **self.log_segment_settings
+        )
+
     def _delete_from_registry(self, idx: str):
         registry_file = Path(self.base_path) / "job_register.json"
-        registry = self._load_registry()
+        with self._file_lock(registry_file):
+            registry = self._load_registry()
 
-        del_keys = [key for key, value in registry.items() if value == idx]
-        for key in del_keys:
-            del registry[key]
-        self._write_json_file(registry_file, registry)
+            del_keys = [key for key, value in registry.items() if value == idx]
+            for key in del_keys:
+                del registry[key]
+            self._write_json_file(registry_file, registry)
 
     def _update_registry(self, idx: str, new_name: str, new_hash: str):
         registry_file = Path(self.base_path) / "job_register.json"
-        job_names = self._read_json_file(registry_file) if registry_file.exists() else {}
-
-        del_keys = [key for key, value in job_names.items() if value == idx]
-        for key in del_keys:
-            del job_names[key]
-        job_names[new_name] = idx
-        job_names[new_hash] = idx
-        self._write_json_file(registry_file, job_names)
+        with self._file_lock(registry_file):
+            job_names = self._read_json_file(registry_file) if registry_file.exists() else {}
+
+            del_keys = [key for key, value in job_names.items() if value == idx]
+            for key in del_keys:
+                del job_names[key]
+            job_names[new_name] = idx
+            job_names[new_hash] = idx
+            self._write_json_file(registry_file, job_names)
 
     def _load_registry(self) -> dict:
         """Retrieve the keys of the registry."""
@@ -0,0 +1,192 @@
+"""Byte-offset index of jsonl logs.
+
+The index stores the byte offset of every line of a log and the values of a few fields (e.g. event_type and
+job_version), so pages and filtered selections are read with seeks instead of parsing the whole file. It is
+persisted next to the log (`<name>.idx`) and extended incrementally when the log grows:
+
+    {"size": 40960, "tail": "<md5 of the last indexed line>", "offsets": [0, 312, ...],
+     "fields": {"event_type": ["generation", ...], "job_version": [0, ...]}}
+
+A log that was rewritten (its last indexed line changed or it shrank) is indexed again. A trailing line
+without newline (append in progress) is indexed once it is complete.
+"""
+import hashlib
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence
+
+from llmp.utils.filesystem import FileOperations
+from llmp.utils.serializer import JSONSerializer
+
+DEFAULT_FIELDS = ("event_id", "event_type", "job_version")
+
+
+class LogIndex(FileOperations):
+
+    def __init__(
+            self,
+            file_path: Path,
+            fields: Sequence[str] = DEFAULT_FIELDS,
+            persist: bool = True,
+            serializer: JSONSerializer = None,
+    ):
+        """Byte-offset index of a jsonl log.
+
+        Args:
+            file_path (Path): Path of the log.
+            fields (Sequence[str]): Entry fields stored in the index (for filtering). No fields means the lines
+                are not parsed while indexing.
+            persist (bool): Store the index next to the log.
+            serializer (JSONSerializer, optional): The serializer. Defaults to the fastest installed one.
+        """
+        self.file_path = Path(file_path)
+        self.index_path = self.file_path.with_name(self.file_path.name + ".idx")
+        self.fields = tuple(fields)
+        self.persist = persist
+        self._serializer = serializer
+
+        self.size = 0
+        self.offsets: list[int] = []
+        self.values: dict[str, list] = {field: [] for field in self.fields}
+        self._tail: Optional[str] = None
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    # === Index ===
+
+    def refresh(self) -> "LogIndex":
+        """Bring the index up to date with the log (loads the stored index on first use)."""
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+
+        if not self.file_path.exists():
+            self._reset()
+            return self
+        file_size = self.file_path.stat().st_size
+        if file_size == self.size:
+            return self
+        if file_size < self.size or not self._tail_matches():
+            self._reset()
+
+        if self._index_from(self.size) and self.persist:
+            self._store()
+        return self
+
+    def positions(self, **filters: Any) -> list[int]:
+        """Return the positions (line numbers) of the entries matching all filters.
+
+        Filters compare an indexed field with a value, or a list/tuple/set of values. None means no filter.
+        """
+        self.refresh()
+        selected = range(len(self.offsets))
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in self.values:
+                raise ValueError(f"Field '{field}' is not indexed. Indexed fields: {list(self.fields)}.")
+            column = self.values[field]
+            if isinstance(value, (list, tuple, set, frozenset)):
+                value = set(value)
+                selected = [i for i in selected if column[i] in value]
+            else:
+                selected = [i for i in selected if column[i] == value]
+        return list(selected)
+
+    def distinct(self, field: str) -> list:
+        """Return the distinct values of an indexed field (sorted, None excluded)."""
+        self.refresh()
+        values = {value for value in self.values[field] if value is not None}
+        return sorted(values, key=str)
+
+    # === Read ===
+
+    def read(self, positions: Iterable[int]) -> list[dict]:
+        """Read the entries at the given positions (in the given order)."""
+        positions = list(positions)
+        if not positions:
+            return []
+        entries = []
+        with self.file_path.open('rb') as f:
+            for position in positions:
+                start = self.offsets[position]
+                end = self.offsets[position + 1] if position + 1 < len(self.offsets) else self.size
+                f.seek(start)
+                entries.append(self.serializer.loads(f.read(end - start)))
+        return entries
+
+    def page(self, page: int, page_size: int, reverse: bool = False, **filters: Any) -> tuple[list[dict], int]:
+        """Return the entries of a page (0-based) and the number of matching entries.
+
+        Args:
+            page (int): The page number.
+            page_size (int): Entries per page.
+            reverse (bool): Newest entries first.
+            **filters: Filters on indexed fields (see positions).
+        """
+        positions = self.positions(**filters)
+        if reverse:
+            positions = positions[::-1]
+        return self.read(positions[page * page_size:(page + 1) * page_size]), len(positions)
+
+    # === Private ===
+
+    def _index_from(self, offset: int) -> bool:
+        """Index the complete lines after offset. Returns whether lines were added."""
+        added = False
+        last_line = None
+        with self.file_path.open('rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    self.offsets.append(offset)
+                    if self.fields:
+                        entry = self.serializer.loads(line)
+                        for field in self.fields:
+                            self.values[field].append(entry.get(field))
+                    last_line = line
+                    added = True
+                offset += len(line)
+        self.size = offset
+        if last_line is not None:
+            self._tail = _checksum(last_line)
+        return added
+
+    def _tail_matches(self) -> bool:
+        if not self.offsets:
+            return True
+        start = self.offsets[-1]
+        with self.file_path.open('rb') as f:
+            f.seek(start)
+            return _checksum(f.read(self.size - start)) == self._tail
+
+    def _reset(self) -> None:
+        self.size = 0
+        self.offsets = []
+        self.values = {field: [] for field in self.fields}
+        self._tail = None
+
+    def _load(self) -> None:
+        if not self.persist:
+            return
+        try:
+            data = self._read_json_file(self.index_path)
+        except ValueError:
+            return
+        if not data or set(data.get("fields", {})) != set(self.fields):
+            return
+        self.size, self._tail, self.offsets = data["size"], data["tail"], data["offsets"]
+        self.values = data["fields"]
+
+    def _store(self) -> None:
+        self._write_json_file(
+            self.index_path,
+            dict(size=self.size, tail=self._tail, offsets=self.offsets, fields=self.values)
+        )
+
+
+def _checksum(line: bytes) -> str:
+    return hashlib.md5(line.rstrip(b"\r\n")).hexdigest()
@@ -0,0 +1,341 @@
+"""Segmented generation logs.
+
+New entries are appended to the active segment, which keeps the original path (e.g. generation_log.jsonl).
+The active segment is rotated when it exceeds max_segment_bytes or when its first entry is older than
+max_segment_age seconds. Rotated segments are compressed (zstd if zstandard is installed, else gzip) into
+`<name>_segments/` and listed in `<name>_segments/manifest.json` with their entry count and time range:
+
+    {"segments": [{"file": "segment-000000.jsonl.gz", "codec": "gzip", "count": 1000,
+                   "start": "20240101120000", "end": "20240101130000", "bytes": 20480}], "next_id": 1}
+
+Readers stream the segments in order, followed by the active segment. Time-range queries skip (and don't
+decompress) segments whose range doesn't overlap the query. Pages (read_range) skip segments by their entry
+count and read the active segment via its byte-offset index (llmp.services.log_index). Timestamps use the
+format of llmp.utils.helper.get_timestamp, entries without a timestamp are only returned by unbounded queries.
+
+Edits of logged entries are appended to an update overlay (`<name>_updates.jsonl`) instead of rewriting the
+log. Readers merge the corrections into the entries with the same event_id (later corrections win). The
+overlay is compacted into the segments when it exceeds max_update_bytes.
+"""
+import gzip
+import io
+import itertools
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Union
+
+from llmp.services.log_index import LogIndex
+from llmp.utils.filesystem import FileOperations
+from llmp.utils.serializer import JSONSerializer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+DEFAULT_SEGMENT_BYTES = 32 * 1024 * 1024
+DEFAULT_UPDATE_BYTES = 1024 * 1024
+UPDATE_KEY = "event_id"
+
+_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def to_timestamp(value: Union[str, datetime, None]) -> Union[str, None]:
+    """Convert a datetime to the log timestamp format. Strings are returned as is."""
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return value
+
+
+class SegmentedLog(FileOperations):
+
+    def __init__(
+            self,
+            file_path: Path,
+            max_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+            max_segment_age: float = None,
+            max_segments: int = None,
+            compression: str = None,
+            max_update_bytes: int = DEFAULT_UPDATE_BYTES,
+            serializer: JSONSerializer = None,
+    ):
+        """Segmented jsonl log.
+
+        Args:
+            file_path (Path): Path of the active segment.
+            max_segment_bytes (int): Rotate the active segment above this size.
+            max_segment_age (float, optional): Rotate the active segment when its first entry is older (seconds).
+            max_segments (int, optional): Keep at most this many rotated segments (oldest are deleted).
+            compression (str, optional): "zstd" or "gzip". Defaults to zstd if installed, else gzip.
+            max_update_bytes (int): Compact the update overlay above this size.
+            serializer (JSONSerializer, optional): The serializer. Defaults to the fastest installed one.
+        """
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Unknown compression '{compression}'. Choose from {list(_EXTENSIONS)}.")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("Compression 'zstd' requires the zstandard package (extra 'compression').")
+
+        self.file_path = Path(file_path)
+        self.segments_dir = self.file_path.with_name(self.file_path.stem + "_segments")
+        self.manifest_path = self.segments_dir / "manifest.json"
+        self.updates_path = self.file_path.with_name(self.file_path.stem + "_updates.jsonl")
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.max_segments = max_segments
+        self.compression = compression
+        self.max_update_bytes = max_update_bytes
+        self._serializer = serializer
+
+    # === Write ===
+
+    def append(self, entries: list[dict], dedupe_key: str = "event_id") -> None:
+        """Append entries to the active segment and rotate it if due.
+
+        Entries whose dedupe_key is already in the active segment are skipped.
+        """
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock(self.file_path):
+            if dedupe_key is not None:
+                keys = {entry.get(dedupe_key) for entry in self._iter_jsonl_file(self.file_path)}
+                entries = [entry for entry in entries if entry.get(dedupe_key) not in keys]
+            self._append_jsonl_file(self.file_path, entries)
+            if self._rotation_due():
+                self._rotate()
+
+    def update(self, entries: list[dict]) -> None:
+        """Record corrections of logged entries (matched by event_id, fields are merged into the entry).
+
+        The corrections are appended to the update overlay, the overlay is compacted when it is due.
+        """
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock(self.file_path):
+            self._append_jsonl_file(self.updates_path, entries)
+            if self.updates_path.stat().st_size >= self.max_update_bytes:
+                self._compact()
+
+    def compact(self) -> None:
+        """Merge the update overlay into the segments and delete it."""
+        with self._file_lock(self.file_path):
+            self._compact()
+
+    def rotate(self) -> None:
+        """Close the active segment (if not empty)."""
+        with self._file_lock(self.file_path):
+            self._rotate()
+
+    def clear(self) -> None:
+        """Delete all segments incl. the active segment."""
+        with self._file_lock(self.file_path):
+            if self.segments_dir.exists():
+                shutil.rmtree(self.segments_dir)
+            if self.file_path.exists():
+                os.remove(self.file_path)
+            LogIndex(self.file_path).index_path.unlink(missing_ok=True)
+            self.updates_path.unlink(missing_ok=True)
+
+    # === Read ===
+
+    def segments(self) -> list[dict]:
+        """Return the manifest entries of the rotated segments (oldest first)."""
+        return self._read_json_file(self.manifest_path).get("segments", [])
+
+    def iter_entries(
+            self,
+            start: Union[str, datetime] = None,
+            end: Union[str, datetime] = None
+    ) -> Iterator[dict]:
+        """Stream the entries across all segments, optionally within [start, end]."""
+        start, end = to_timestamp(start), to_timestamp(end)
+        is_bounded = start is not None or end is not None
+        updates = self.updates()
+
+        for segment in self.segments():
+            if is_bounded and not self._overlaps(segment, start, end):
+                continue
+            entries = self._iter_segment(self.segments_dir / segment["file"], segment["codec"])
+            entries = self._apply_updates(entries, updates)
+            yield from self._filter(entries, start, end) if is_bounded else entries
+
+        entries = self._apply_updates(self._iter_jsonl_file(self.file_path), updates)
+        yield from self._filter(entries, start, end) if is_bounded else entries
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter_entries()
+
+    def count(self) -> int:
+        """Return the number of entries (from the manifest and the index of the active segment)."""
+        return sum(segment["count"] for segment in self.segments()) + len(self.active_index())
+
+    def active_index(self) -> LogIndex:
+        """Return the (refreshed) byte-offset index of the active segment."""
+        return LogIndex(self.file_path, fields=(), serializer=self._serializer).refresh()
+
+    def read_range(self, start: int, stop: int) -> list[dict]:
+        """Return the entries [start, stop) of the log (positions across all segments, oldest first).
+
+        Only the segments overlapping the range are decompressed.
+        """
+        entries = []
+        offset = 0
+        for segment in self.segments():
+            count = segment["count"]
+            if offset < stop and start < offset + count:
+                segment_entries = self._iter_segment(self.segments_dir / segment["file"], segment["codec"])
+                entries.extend(itertools.islice(segment_entries, max(start - offset, 0), min(stop - offset, count)))
+            offset += count
+            if offset >= stop:
+                return list(self._apply_updates(entries, self.updates()))
+
+        index = self.active_index()
+        entries += index.read(range(max(start - offset, 0), min(stop - offset, len(index))))
+        return list(self._apply_updates(entries, self.updates()))
+
+    def updates(self) -> dict[str, dict]:
+        """Return the pending corrections of the update overlay by event_id (merged in order)."""
+        updates = {}
+        for correction in self._iter_jsonl_file(self.updates_path):
+            key = correction.get(UPDATE_KEY)
+            updates[key] = {**updates.get(key, {}), **correction}
+        return updates
+
+    # === Private ===
+
+    def _rotation_due(self) -> bool:
+        if not self.file_path.exists():
+            return False
+        if self.file_path.stat().st_size >= self.max_segment_bytes:
+            return True
+        if self.max_segment_age is not None:
+            first = next(self._iter_jsonl_file(self.file_path), None)
+            timestamp = first and first.get("timestamp")
+            if timestamp:
+                age = time.time() - datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+                return age >= self.max_segment_age
+        return False
+
+    def _rotate(self) -> None:
+        """Compress the active segment into the segments dir. The caller must hold the lock."""
+        if not self.file_path.exists() or self.file_path.stat().st_size == 0:
+            return
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_json_file(self.manifest_path) or {"segments": [], "next_id": 0}
+
+        count, start, end = 0, None, None
+        for entry in self._iter_jsonl_file(self.file_path):
+            count += 1
+            timestamp = entry.get("timestamp")
+            if timestamp:
+                start = timestamp if start is None else min(start, timestamp)
+                end = timestamp if end is None else max(end, timestamp)
+
+        file_name = f"segment-{manifest['next_id']:06d}.jsonl{_EXTENSIONS[self.compression]}"
+        segment_path = self.segments_dir / file_name
+        tmp_path = segment_path.with_name(f".{file_name}.tmp")
+        with self.file_path.open("rb") as src, self._open_segment(tmp_path, self.compression, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, segment_path)
+
+        manifest["segments"].append(dict(
+            file=file_name,
+            codec=self.compression,
+            count=count,
+            start=start,
+            end=end,
+            bytes=segment_path.stat().st_size,
+        ))
+        manifest["next_id"] += 1
+
+        if self.max_segments is not None:
+            while len(manifest["segments"]) > self.max_segments:
+                dropped = manifest["segments"].pop(0)
+                (self.segments_dir / dropped["file"]).unlink(missing_ok=True)
+
+        self._write_json_file(self.manifest_path, manifest)
+        os.remove(self.file_path)
+        LogIndex(self.file_path).index_path.unlink(missing_ok=True)
+
+    def _compact(self) -> None:
+        """Rewrite the segments with pending corrections and delete the overlay. The caller must hold the lock."""
+        updates = self.updates()
+        if not updates:
+            self.updates_path.unlink(missing_ok=True)
+            return
+
+        manifest = self._read_json_file(self.manifest_path)
+        for segment in manifest.get("segments", []):
+            segment_path = self.segments_dir / segment["file"]
+            entries = list(self._iter_segment(segment_path, segment["codec"]))
+            if not any(entry.get(UPDATE_KEY) in updates for entry in entries):
+                continue
+            entries = list(self._apply_updates(entries, updates))
+            tmp_path = segment_path.with_name(f".{segment['file']}.tmp")
+            with self._open_segment(tmp_path, segment["codec"], "wb") as f:
+                f.write(self.serializer.dumps_lines(entries))
+            os.replace(tmp_path, segment_path)
+            timestamps = [entry["timestamp"] for entry in entries if entry.get("timestamp")]
+            segment.update(
+                start=min(timestamps, default=None),
+                end=max(timestamps, default=None),
+                bytes=segment_path.stat().st_size,
+            )
+        if manifest:
+            self._write_json_file(self.manifest_path, manifest)
+
+        entries = self._read_jsonl_file(self.file_path)
+        if any(entry.get(UPDATE_KEY) in updates for entry in entries):
+            self._write_jsonl_file(self.file_path, self._apply_updates(entries, updates))
+            # the offsets of the rewritten lines changed, a stale tail check could still accept the index
+            LogIndex(self.file_path).index_path.unlink(missing_ok=True)
+        os.remove(self.updates_path)
+
+    @staticmethod
+    def _apply_updates(entries: Iterable[dict], updates: dict[str, dict]) -> Iterator[dict]:
+        if not updates:
+            yield from entries
+            return
+        for entry in entries:
+            correction = updates.get(entry.get(UPDATE_KEY))
+            yield {**entry, **correction} if correction else entry
+
+    def _iter_segment(self, segment_path: Path, codec: str) -> Iterator[dict]:
+        if not segment_path.exists():
+            return
+        with self._open_segment(segment_path, codec, "rb") as f:
+            yield from self.serializer.iter_lines(f)
+
+    @staticmethod
+    def _open_segment(segment_path: Path, codec: str, mode: str):
+        if codec == "gzip":
+            return gzip.open(segment_path, mode)
+        if codec == "zstd":
+            if zstandard is None:
+                raise ValueError(f"Reading {segment_path} requires the zstandard package (extra 'compression').")
+            stream = zstandard.open(segment_path, mode)
+            # the decompression reader doesn't support line iteration
+            return io.BufferedReader(stream) if mode == "rb" else stream
+        raise ValueError(f"Unknown compression '{codec}'.")
+
+    @staticmethod
+    def _overlaps(segment: dict, start: Union[str, None], end: Union[str, None]) -> bool:
+        if segment.get("start") is None:
+            return False
+        if start is not None and segment["end"] < start:
+            return False
+        if end is not None and segment["start"] > end:
+            return False
+        return True
+
+    @staticmethod
+    def _filter(entries: Iterator[dict], start: Union[str, None], end: Union[str, None]) -> Iterator[dict]:
+        for entry in entries:
+            timestamp = entry.get("timestamp")
+            if timestamp is None:
+                continue
+            if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+                yield entry
@@ -0,0 +1,222 @@
+"""Background log writer.
+
+Moves the event and generation log writes of the JobManager off the generation path. Logs are queued in a
+bounded queue and written by a worker thread, coalesced per job into batched appends. Pending logs are
+flushed when a batch is full, after flush_interval seconds, on flush() and at interpreter shutdown.
+
+JobManagers of the same storage share one writer (see acquire/release), the worker is stopped when the last
+owner releases it. When the queue is full, submit() blocks until the writer catches up (backpressure).
+Blocked submits and their waiting time are reported in metrics(). Failed writes are retried with the next
+batch, logs that fail max_write_attempts times are dropped and reported via logging.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+
+from llmp.data_model import JobRecord
+from llmp.data_model.events import Event
+
+logger = logging.getLogger(__name__)
+
+# shared writers by storage, see BackgroundLogWriter.acquire
+_writers: dict[str, "BackgroundLogWriter"] = {}
+_writers_lock = threading.Lock()
+# running writers, closed at interpreter shutdown
+_running_writers: "weakref.WeakSet[BackgroundLogWriter]" = weakref.WeakSet()
+
+
+@dataclass
+class _LogBatch:
+    """Pending logs of one job. Duck-types the log attributes of JobRecord for JobStorage.store_logs."""
+    idx: str
+    event_log: list[Event] = field(default_factory=list)
+    generation_log: list[dict] = field(default_factory=list)
+    attempts: int = 0
+
+    def __len__(self):
+        return len(self.event_log) + len(self.generation_log)
+
+
+class BackgroundLogWriter:
+
+    def __init__(
+            self,
+            job_storage,
+            max_queue_size: int = 1000,
+            batch_size: int = 100,
+            flush_interval: float = 1.0,
+            max_write_attempts: int = 3,
+    ):
+        self.job_storage = job_storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_write_attempts = max_write_attempts
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._pending: dict[str, _LogBatch] = {}
+        self._metrics = dict(
+            submitted=0,
+            written=0,
+            write_batches=0,
+            write_errors=0,
+            dropped=0,
+            blocked_submits=0,
+            blocked_time=0.0,
+            max_queue_depth=0,
+        )
+        self._metrics_lock = threading.Lock()
+        self._closed = False
+        self._key = None
+        self._refs = 0
+
+        self._thread = threading.Thread(target=self._run, name="llmp-log-writer", daemon=True)
+        self._thread.start()
+        _running_writers.add(self)
+
+    @classmethod
+    def acquire(cls, job_storage, **kwargs) -> "BackgroundLogWriter":
+        """Return the shared writer of a storage (created on first use). Call release() when done."""
+        key = getattr(job_storage, "_state_key", None) or str(id(job_storage))
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None or writer._closed:
+                writer = cls(job_storage, **kwargs)
+                writer._key = key
+                _writers[key] = writer
+            writer._refs += 1
+            return writer
+
+    def release(self, timeout: float = None):
+        """Release a writer returned by acquire(). The last release flushes and stops the writer."""
+        with _writers_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if _writers.get(self._key) is self:
+                del _writers[self._key]
+        self.close(timeout)
+
+    # === Public ===
+
+    def submit(self, job: JobRecord):
+        """Queue the in-memory logs of a job and clear them on the job (like JobStorage.store_logs)."""
+        if len(job.event_log) == 0 and len(job.generation_log) == 0:
+            return
+        if self._closed:
+            self.job_storage.store_logs(job)
+            return
+
+        batch = _LogBatch(job.idx, *job.take_logs())
+
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            start = time.time()
+            self._queue.put(batch)
+            with self._metrics_lock:
+                self._metrics["blocked_submits"] += 1
+                self._metrics["blocked_time"] += time.time() - start
+
+        with self._metrics_lock:
+            self._metrics["submitted"] += len(batch)
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], self._queue.qsize())
+
+    def flush(self, timeout: float = None) -> bool:
+        """Write all queued logs. Returns False if the writer didn't finish within timeout."""
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None):
+        """Flush all queued logs and stop the worker."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        _running_writers.discard(self)
+
+    def metrics(self) -> dict:
+        """Return the writer metrics incl. current queue depth."""
+        with self._metrics_lock:
+            return dict(
+                **self._metrics,
+                queue_depth=self._queue.qsize(),
+                max_queue_size=self._queue.maxsize,
+                unwritten=self._metrics["submitted"] - self._metrics["written"],
+            )
+
+    # === Worker ===
+
+    def _run(self):
+        last_write = time.time()
+        while True:
+            timeout = max(self.flush_interval - (time.time() - last_write), 0.01)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                # retried batches stay pending until written or dropped
+                while self._pending:
+                    self._write_pending()
+                return
+
+            if isinstance(item, threading.Event):
+                self._write_pending()
+                last_write = time.time()
+                item.set()
+                continue
+
+            if item:
+                self._coalesce(item)
+
+            is_due = time.time() - last_write >= self.flush_interval
+            is_full = sum(len(batch) for batch in self._pending.values()) >= self.batch_size
+            if self._pending and (is_due or is_full):
+                self._write_pending()
+                last_write = time.time()
+
+    def _coalesce(self, batch: _LogBatch):
+        pending = self._pending.setdefault(batch.idx, _LogBatch(batch.idx))
+        pending.event_log.extend(batch.event_log)
+        pending.generation_log.extend(batch.generation_log)
+        pending.attempts = max(pending.attempts, batch.attempts)
+
+    def _write_pending(self):
+        pending, self._pending = self._pending, {}
+        for batch in pending.values():
+            num_items = len(batch)
+            try:
+                # store_logs clears the logs of the batch, keep them for a retry
+                self.job_storage.store_logs(_LogBatch(batch.idx, list(batch.event_log), list(batch.generation_log)))
+                with self._metrics_lock:
+                    self._metrics["written"] += num_items
+                    self._metrics["write_batches"] += 1
+            except Exception as e:
+                batch.attempts += 1
+                with self._metrics_lock:
+                    self._metrics["write_errors"] += 1
+                if batch.attempts < self.max_write_attempts:
+                    logger.warning("Error while writing logs of job %s (attempt %d): %s", batch.idx, batch.attempts, e)
+                    self._coalesce(batch)
+                    continue
+                logger.error("Dropped %d log entries of job %s after %d failed writes: %s",
+                             num_items, batch.idx, batch.attempts, e)
+                with self._metrics_lock:
+                    self._metrics["dropped"] += num_items
+
+
+@atexit.register
+def _close_writers():
+    for writer in list(_running_writers):
+        writer.close()
+
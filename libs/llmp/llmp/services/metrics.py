@@ -0,0 +1,224 @@
+"""Streaming metric rollups of generation events.
+
+Each storage keeps a rollup per job with one VersionRollup per job version. Rollups are updated with the
+events appended to the event log, so reading metrics doesn't scan the log. The file storage persists the rollup
+as `metrics_rollup.json` next to event_log.jsonl:
+
+    {"num_events": 1200, "versions": {"0": {"count": 1000, "failures": 12,
+        "execution_time": {<histogram>}, "token_usage": {<histogram>}, "retries": {<histogram>}}}}
+
+Histograms are log-bucketed (bucket bounds grow by a constant factor), so quantiles have a bounded relative
+error, their size only depends on the value range and they can be merged across versions.
+"""
+import math
+from typing import Any, Iterable, Optional, Union
+
+from llmp.types import EventType
+
+METRICS_FILE = "metrics_rollup.json"
+DEFAULT_RELATIVE_ACCURACY = 0.01
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+class StreamingHistogram:
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """Log-bucketed histogram.
+
+        Args:
+            relative_accuracy (float): Max relative error of the quantiles (e.g. 0.01 = 1%).
+        """
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        if value is None:
+            return
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "StreamingHistogram") -> None:
+        """Add the values of another histogram (with the same relative accuracy)."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only histograms with the same relative accuracy can be merged.")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the q-quantile (0-1), None if empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return min(self.min, 0.0)
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Return count, mean, p50/p95/p99 and max."""
+        summary = dict(count=self.count, mean=self.mean)
+        summary.update({name: self.quantile(q) for name, q in QUANTILES.items()})
+        summary["max"] = self.max
+        return summary
+
+    def to_dict(self) -> dict:
+        return dict(
+            relative_accuracy=self.relative_accuracy,
+            buckets={str(index): count for index, count in self.buckets.items()},
+            zero_count=self.zero_count,
+            count=self.count,
+            total=self.total,
+            min=self.min,
+            max=self.max,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StreamingHistogram":
+        histogram = cls(data.get("relative_accuracy", DEFAULT_RELATIVE_ACCURACY))
+        histogram.buckets = {int(index): count for index, count in data.get("buckets", {}).items()}
+        histogram.zero_count = data.get("zero_count", 0)
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+
+class VersionRollup:
+    """Metrics of the generations of one job version."""
+    HISTOGRAMS = ("execution_time", "token_usage", "retries")
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.histograms = {name: StreamingHistogram() for name in self.HISTOGRAMS}
+
+    def add(self, event_metrics: dict) -> None:
+        """Add the metrics of a generation event.
+
+        Retries are the failed calls of the run (structgenie failure_rate). A generation counts as failure if
+        it needed retries or logged errors.
+        """
+        event_metrics = event_metrics or {}
+        retries = event_metrics.get("failure_rate") or 0
+        num_errors = event_metrics.get("num_errors", len(event_metrics.get("errors") or []))
+
+        self.count += 1
+        self.failures += int(retries > 0 or num_errors > 0)
+        self.histograms["execution_time"].add(event_metrics.get("execution_time"))
+        self.histograms["token_usage"].add(event_metrics.get("token_usage"))
+        self.histograms["retries"].add(retries)
+
+    def merge(self, other: "VersionRollup") -> None:
+        self.count += other.count
+        self.failures += other.failures
+        for name, histogram in other.histograms.items():
+            self.histograms[name].merge(histogram)
+
+    def summary(self) -> dict:
+        summary = dict(count=self.count, failure_rate=self.failures / self.count if self.count else None)
+        summary.update({name: histogram.summary() for name, histogram in self.histograms.items()})
+        return summary
+
+    def to_dict(self) -> dict:
+        data = dict(count=self.count, failures=self.failures)
+        data.update({name: histogram.to_dict() for name, histogram in self.histograms.items()})
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VersionRollup":
+        rollup = cls()
+        rollup.count = data.get("count", 0)
+        rollup.failures = data.get("failures", 0)
+        for name in cls.HISTOGRAMS:
+            if name in data:
+                rollup.histograms[name] = StreamingHistogram.from_dict(data[name])
+        return rollup
+
+
+class MetricsRollup:
+    """Metric rollups of a job by job version."""
+
+    def __init__(self, versions: dict[int, VersionRollup] = None, num_events: int = 0):
+        self.versions = versions or {}
+        self.num_events = num_events
+
+    def update(self, events: Iterable[Union[dict, Any]]) -> int:
+        """Add the generation events of new events (models or dicts). Returns the number of added generations."""
+        num_added = 0
+        for event in events:
+            self.num_events += 1
+            if _get(event, "event_type") != EventType.GENERATION:
+                continue
+            version = _get(event, "job_version") or 0
+            if version not in self.versions:
+                self.versions[version] = VersionRollup()
+            self.versions[version].add(_get(event, "event_metrics"))
+            num_added += 1
+        return num_added
+
+    def summary(self, version: int = None) -> dict:
+        """Return the metrics of a version, or of all versions merged."""
+        if version is not None:
+            return self.versions.get(version, VersionRollup()).summary()
+        total = VersionRollup()
+        for rollup in self.versions.values():
+            total.merge(rollup)
+        return total.summary()
+
+    def summaries(self) -> dict[int, dict]:
+        """Return the metrics of each version."""
+        return {version: rollup.summary() for version, rollup in sorted(self.versions.items())}
+
+    def to_dict(self) -> dict:
+        return dict(
+            num_events=self.num_events,
+            versions={str(version): rollup.to_dict() for version, rollup in self.versions.items()},
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MetricsRollup":
+        return cls(
+            versions={int(version): VersionRollup.from_dict(d) for version, d in data.get("versions", {}).items()},
+            num_events=data.get("num_events", 0),
+        )
+
+    @classmethod
+    def from_events(cls, events: Iterable[Union[dict, Any]]) -> "MetricsRollup":
+        rollup = cls()
+        rollup.update(events)
+        return rollup
+
+
+def _get(event, key: str):
+    return event.get(key) if isinstance(event, dict) else getattr(event, key, None)
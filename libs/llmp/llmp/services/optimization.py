@@ -1,5 +1,3 @@
-from tqdm import tqdm
-
 from llmp.components.base import BaseOptimizer
 from llmp.components.evaluation.engine import EvaluationEngine
 from llmp.components.example_manager import ExampleManager
@@ -104,6 +102,7 @@ class InstructionOptimizer(BaseOptimizer):
         return best_setting, result
 
     def evaluate(self, job_settings: list[dict], num_workers: int = 5, **kwargs):
+        import tqdm
 
         pbar = tqdm.tqdm(total=len(job_settings), dynamic_ncols=True, disable=not self.display_progress)
         pbar.set_description("Evaluating Instructions")
@@ -47,6 +47,7 @@ from typing import Type
 from llmp.utils.signature import is_valid_uuid
 
 from llmp.components.settings.program_settings import ProgramSettings, PromptType
+from llmp.components.generator.cascade import is_cascade
 from llmp.data_model import JobRecord
 from llmp.services.job_manager import JobManager
 from llmp.utils.helper import dotdict
@@ -127,7 +128,9 @@ class Program:
         """
         is_first_run = False
         generator_type = self.config.generator_type
-        if len(self.job.example_records) == 0 and not self.config.program_type == PromptType.ZERO_SHOT:
+        if is_cascade(self.job.config) and generator_type == "default":
+            generator_type = "cascade"
+        if not self.config.program_type == PromptType.ZERO_SHOT and len(self.job.example_records) == 0:
             is_first_run = True
             generator_type = "consensus"
 
@@ -143,6 +146,35 @@ class Program:
             dotdict_output.run_metrics = run_metrics
         return dotdict_output
 
+    async def acall(self, input_data: dict, return_metrics: bool = False, generator_type: str = "default", **kwargs):
+        """Generate output for a specific input (async).
+
+        Concurrent identical async calls share one generation. Only the default generator is supported.
+        """
+        output, run_metrics = await self.job_manager.generate_output_async(
+            self.job, input_data, generator_type=generator_type, **kwargs
+        )
+
+        dotdict_output = dotdict(output)
+        if return_metrics:
+            dotdict_output.run_metrics = run_metrics
+        return dotdict_output
+
+    def batch(self, input_list: list[dict], return_metrics: bool = False, **kwargs) -> list[dotdict]:
+        """Generate outputs for a list of inputs.
+
+        Inputs are packed into shared prompts, the number of inputs per prompt is chosen from the
+        context size of the job's model. With return_metrics the run metrics of each input are returned.
+        """
+        outputs, run_metrics = self.job_manager.generate_outputs(
+            self.job, input_list, generator_type="packed", **kwargs
+        )
+
+        dotdict_outputs = [dotdict(output) for output in outputs]
+        if return_metrics:
+            return dotdict_outputs, run_metrics
+        return dotdict_outputs
+
     def _load_by_signature(self, signature: str):
         try:
             if is_valid_uuid(signature):
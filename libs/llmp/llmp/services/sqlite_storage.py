@@ -0,0 +1,471 @@
+"""SQLite storage backend for jobs.
+
+Implements the JobStorage interface on a single SQLite database with indexed tables for the registry, jobs,
+examples, events, generations, version history and metric rollups. The database runs in WAL mode, so readers
+(e.g. llmp-monitor) don't block the writer. Logs are appended with batched inserts and deduplicated by event_id
+via the primary key instead of reading the whole log file.
+
+Migrate an existing directory storage with:
+    python -m llmp.services.sqlite_storage <base_path> [--db-path <db_path>]
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Iterator, Union
+
+from llmp.data_model import JobRecord, ExampleRecord
+from llmp.data_model.example_record import LazyExampleRecords
+from llmp.data_model.events import Event, error_entries
+from llmp.services.example_store import diff_examples, example_fingerprints
+from llmp.services.log_segments import to_timestamp
+from llmp.services.metrics import MetricsRollup
+from llmp.utils.encoder import dumps_encoder
+from llmp.utils.io_model import hash_from_io_models
+
+# host parameters per statement, below the limit of 999 of SQLite builds before 3.32
+MAX_VARIABLES = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registry (
+    key TEXT PRIMARY KEY,
+    idx TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS registry_idx ON registry (idx);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    idx TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS examples (
+    job_idx TEXT NOT NULL,
+    idx TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_idx, idx)
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT NOT NULL UNIQUE,
+    job_idx TEXT NOT NULL,
+    event_type TEXT,
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_job ON events (job_idx, id);
+
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT NOT NULL UNIQUE,
+    job_idx TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_job ON generations (job_idx, id);
+
+CREATE TABLE IF NOT EXISTS version_history (
+    job_idx TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_idx, position)
+);
+
+CREATE TABLE IF NOT EXISTS event_errors (
+    event_id TEXT PRIMARY KEY,
+    job_idx TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS event_errors_job ON event_errors (job_idx);
+
+CREATE TABLE IF NOT EXISTS metric_rollups (
+    job_idx TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SQLiteJobStorage:
+    """JobStorage backed by SQLite."""
+
+    def __init__(self, base_path: str = None, db_path: str = None):
+        self.base_path = base_path or "./data/jobs"
+        if db_path is None:
+            Path(self.base_path).mkdir(parents=True, exist_ok=True)
+            db_path = str(Path(self.base_path) / "jobs.db")
+        self.db_path = db_path
+        self._state_key = f"sqlite:{Path(self.db_path).resolve()}"
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException as e:
+                self._conn.execute("ROLLBACK")
+                raise e
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def store_job(self, job: JobRecord) -> None:
+        self._save_job(job)
+
+    def get(
+            self,
+            idx: str = None,
+            name: str = None,
+            io_hash: str = None,
+            example_ids: list[str] = None,
+            lazy: bool = True
+    ) -> JobRecord:
+        """Load a job by idx, name, or io_hash.
+
+        Only one of idx, name, or io_hash should be provided.
+        Example records are loaded on first access (lazy) and can be restricted to example_ids.
+        """
+
+        assert sum([idx is not None, name is not None,
+                    io_hash is not None]) == 1, "Only one of idx, name, or io_hash must be provided."
+
+        if idx is None:
+            idx = self._get_idx_from_register(name if name is not None else io_hash)
+
+        if not idx:
+            raise ValueError("No job found.")
+
+        return self._load_job(idx, example_ids=example_ids, lazy=lazy)
+
+    def update_job(self, job: JobRecord) -> None:
+        new_io_hash = hash_from_io_models(job.input_model, job.output_model, job.instruction)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM registry WHERE idx = ?", (job.idx,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO registry (key, idx) VALUES (?, ?)",
+                [(job.job_name, job.idx), (new_io_hash, job.idx)]
+            )
+            self._write_job(conn, job)
+
+    def delete_job(self, idx: str) -> None:
+        with self._transaction() as conn:
+            for table in ["examples", "events", "event_errors", "generations", "version_history", "metric_rollups"]:
+                conn.execute(f"DELETE FROM {table} WHERE job_idx = ?", (idx,))
+            conn.execute("DELETE FROM jobs WHERE idx = ?", (idx,))
+            conn.execute("DELETE FROM registry WHERE idx = ?", (idx,))
+
+    # ==== IDX Registry Methods ====
+
+    def get_registry_keys(self) -> list[str]:
+        """Retrieve the keys of the registry."""
+        return [row[0] for row in self._query("SELECT key FROM registry")]
+
+    def key_in_registry(self, key: str) -> bool:
+        """Check if key in registry."""
+        return bool(self._query("SELECT 1 FROM registry WHERE key = ?", (key,)))
+
+    def register_job(self, job: JobRecord):
+        """Register a job in the registry."""
+        assert not self.key_in_registry(job.io_hash), f"Job with io_hash '{job.io_hash}' already exists."
+        assert not self.key_in_registry(job.job_name), f"Job with name '{job.job_name}' already exists."
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO registry (key, idx) VALUES (?, ?)",
+                [(job.job_name, job.idx), (job.io_hash, job.idx)]
+            )
+
+    def get_idx_by_name(self, name: str) -> Union[str, None]:
+        """Retrieve the idx of a job by its name."""
+        return self._get_idx_from_register(name)
+
+    def get_idx_by_io_hash(self, io_hash: str) -> Union[str, None]:
+        """Retrieve the idx of a job by its io_hash."""
+        return self._get_idx_from_register(io_hash)
+
+    def io_hash_in_register(self, io_hash: str):
+        return self.key_in_registry(io_hash)
+
+    # ==== Log Methods ====
+
+    def store_generation_log(self, job: JobRecord, generation: list[dict]) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM generations WHERE job_idx = ?", (job.idx,))
+            self._insert_generations(conn, job.idx, generation)
+
+    def update_generation_log(self, job: JobRecord, entries: list[dict]) -> None:
+        """Update logged generations by event_id (fields are merged)."""
+        with self._transaction() as conn:
+            for entry in entries:
+                row = conn.execute(
+                    "SELECT data FROM generations WHERE job_idx = ? AND event_id = ?", (job.idx, entry["event_id"])
+                ).fetchone()
+                if row is None:
+                    continue
+                conn.execute(
+                    "UPDATE generations SET data = ? WHERE job_idx = ? AND event_id = ?",
+                    (dumps_encoder({**json.loads(row[0]), **entry}), job.idx, entry["event_id"])
+                )
+
+    def load_generation_log(
+            self,
+            job: JobRecord,
+            start: Union[str, datetime] = None,
+            end: Union[str, datetime] = None
+    ) -> list[dict]:
+        return list(self.iter_generation_log(job, start=start, end=end))
+
+    def iter_generation_log(
+            self,
+            job: JobRecord,
+            start: Union[str, datetime] = None,
+            end: Union[str, datetime] = None
+    ) -> Iterator[dict]:
+        """Return the generation log, optionally within a time range [start, end]."""
+        sql, params = "SELECT data FROM generations WHERE job_idx = ?", [job.idx]
+        for op, value in [(">=", to_timestamp(start)), ("<=", to_timestamp(end))]:
+            if value is not None:
+                sql += f" AND json_extract(data, '$.timestamp') {op} ?"
+                params.append(value)
+        rows = self._query(sql + " ORDER BY id", tuple(params))
+        return (json.loads(row[0]) for row in rows)
+
+    def load_event_log(self, job: JobRecord) -> list[Event]:
+        rows = self._query("SELECT data FROM events WHERE job_idx = ? ORDER BY id", (job.idx,))
+        return [Event.parse_obj(json.loads(row[0])) for row in rows]
+
+    def load_event_errors(self, job: JobRecord) -> dict[str, list[str]]:
+        """Load the full error lists of events with compacted errors by event_id."""
+        rows = self._query("SELECT event_id, data FROM event_errors WHERE job_idx = ?", (job.idx,))
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def load_version_history(self, job: JobRecord) -> list[dict]:
+        rows = self._query("SELECT data FROM version_history WHERE job_idx = ? ORDER BY position", (job.idx,))
+        return [json.loads(row[0]) for row in rows]
+
+    def store_event_log(self, job: JobRecord, events: list[Event]) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM events WHERE job_idx = ?", (job.idx,))
+            self._insert_events(conn, job.idx, [event.dict() for event in events])
+            self._insert_event_errors(conn, job.idx, events)
+            self._write_metrics_rollup(conn, job.idx, MetricsRollup.from_events(events))
+
+    def load_job_metrics(self, job: JobRecord) -> MetricsRollup:
+        """Load the metric rollup of a job (built from the events once if missing)."""
+        with self._transaction() as conn:
+            return self._read_metrics_rollup(conn, job.idx)
+
+    def store_logs(self, job: JobRecord):
+        if len(job.event_log) > 0 or len(job.generation_log) > 0:
+            with self._transaction() as conn:
+                self._write_logs(conn, job)
+
+    # ==== Private Methods ====
+
+    def _save_job(self, job: JobRecord) -> None:
+        with self._transaction() as conn:
+            self._write_job(conn, job)
+
+    def _write_job(self, conn: sqlite3.Connection, job: JobRecord) -> None:
+        # Save Metadata
+        exclude_metadata = {"example_records", "version_history", "event_log", "generation_log"}
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (idx, metadata) VALUES (?, ?)",
+            (job.idx, dumps_encoder(job.dict(exclude=exclude_metadata)))
+        )
+
+        # Save Examples (only added/updated/deleted since the last load/save)
+        self._write_examples(conn, job)
+
+        # Save Version History (append-only, one entry per version)
+        conn.executemany(
+            "INSERT OR IGNORE INTO version_history (job_idx, position, data) VALUES (?, ?, ?)",
+            [(job.idx, entry["version"], dumps_encoder(entry)) for entry in job.version_history]
+        )
+
+        # Save/append logs
+        self._write_logs(conn, job)
+
+    def _write_examples(self, conn: sqlite3.Connection, job: JobRecord) -> None:
+        records = job.example_records
+        if isinstance(records, LazyExampleRecords) and not records.is_loaded:
+            return
+
+        state = job._storage_state.setdefault(self._state_key, {})
+        stored = state.get("examples")
+        # a job loaded with a subset of its examples is merged into the stored examples
+        if stored is None and not job._storage_state.get("partial_examples", False):
+            conn.execute("DELETE FROM examples WHERE job_idx = ?", (job.idx,))
+        changed, deleted, fingerprints = diff_examples(records, stored)
+
+        conn.executemany("DELETE FROM examples WHERE job_idx = ? AND idx = ?", [(job.idx, idx) for idx in deleted])
+        position = conn.execute(
+            "SELECT COALESCE(MAX(position), -1) FROM examples WHERE job_idx = ?", (job.idx,)
+        ).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO examples (job_idx, idx, position, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (job_idx, idx) DO UPDATE SET data = excluded.data",
+            [(job.idx, example.idx, position + 1 + i, dumps_encoder(example.dict())) for i, example in enumerate(changed)]
+        )
+        state["examples"] = fingerprints
+
+    def _write_logs(self, conn: sqlite3.Connection, job: JobRecord) -> None:
+        if job.event_log:
+            rollup = self._read_metrics_rollup(conn, job.idx)
+            events = [event.dict() for event in job.event_log]
+            stored_ids = self._stored_event_ids(conn, [event["event_id"] for event in events])
+            self._insert_events(conn, job.idx, events)
+            self._insert_event_errors(conn, job.idx, job.event_log)
+            if rollup.update(event for event in events if event["event_id"] not in stored_ids):
+                self._write_metrics_rollup(conn, job.idx, rollup)
+        job.event_log = []
+
+        self._insert_generations(conn, job.idx, job.generation_log)
+        job.generation_log = []
+
+    @staticmethod
+    def _stored_event_ids(conn: sqlite3.Connection, event_ids: list[str]) -> set[str]:
+        """Return the event ids already in the database (queried in chunks of MAX_VARIABLES)."""
+        stored_ids = set()
+        for start in range(0, len(event_ids), MAX_VARIABLES):
+            chunk = event_ids[start:start + MAX_VARIABLES]
+            stored_ids.update(row[0] for row in conn.execute(
+                f"SELECT event_id FROM events WHERE event_id IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+        return stored_ids
+
+    def _read_metrics_rollup(self, conn: sqlite3.Connection, job_idx: str) -> MetricsRollup:
+        row = conn.execute("SELECT data FROM metric_rollups WHERE job_idx = ?", (job_idx,)).fetchone()
+        if row:
+            return MetricsRollup.from_dict(json.loads(row[0]))
+        # databases of older llmp versions have no rollups yet
+        rows = conn.execute("SELECT data FROM events WHERE job_idx = ? ORDER BY id", (job_idx,))
+        rollup = MetricsRollup.from_events(json.loads(row[0]) for row in rows)
+        if rollup.num_events:
+            self._write_metrics_rollup(conn, job_idx, rollup)
+        return rollup
+
+    @staticmethod
+    def _write_metrics_rollup(conn: sqlite3.Connection, job_idx: str, rollup: MetricsRollup) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO metric_rollups (job_idx, data) VALUES (?, ?)",
+            (job_idx, dumps_encoder(rollup.to_dict()))
+        )
+
+    @staticmethod
+    def _insert_event_errors(conn: sqlite3.Connection, job_idx: str, events: list[Event]) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO event_errors (event_id, job_idx, data) VALUES (?, ?, ?)",
+            [(entry["event_id"], job_idx, dumps_encoder(entry["errors"])) for entry in error_entries(events)]
+        )
+
+    @staticmethod
+    def _insert_events(conn: sqlite3.Connection, job_idx: str, events: list[dict]) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO events (event_id, job_idx, event_type, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+            [
+                (event["event_id"], job_idx, str(getattr(event["event_type"], "value", event["event_type"])),
+                 event.get("timestamp"), dumps_encoder(event))
+                for event in events
+            ]
+        )
+
+    @staticmethod
+    def _insert_generations(conn: sqlite3.Connection, job_idx: str, generations: list[dict]) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO generations (event_id, job_idx, data) VALUES (?, ?, ?)",
+            [(generation["event_id"], job_idx, dumps_encoder(generation)) for generation in generations]
+        )
+
+    def _load_job(self, job_idx: str, example_ids: list[str] = None, lazy: bool = False) -> "JobRecord":
+        rows = self._query("SELECT metadata FROM jobs WHERE idx = ?", (job_idx,))
+        if not rows:
+            raise ValueError(f"No job found with idx '{job_idx}'.")
+        metadata = json.loads(rows[0][0])
+
+        job = JobRecord(**metadata)
+        job._storage_state["partial_examples"] = example_ids is not None
+
+        # Load Examples
+        def load_examples():
+            records = self._load_example_records(job_idx, example_ids)
+            job._storage_state.setdefault(self._state_key, {})["examples"] = example_fingerprints(records)
+            return records
+
+        if lazy:
+            job.__dict__["example_records"] = LazyExampleRecords(loader=load_examples)
+        else:
+            job.__dict__["example_records"] = load_examples()
+        return job
+
+    def _load_example_records(self, job_idx: str, example_ids: list[str] = None) -> list[ExampleRecord]:
+        """Load example records written by the storage via the trusted fast path (no validation)."""
+        if example_ids is None:
+            rows = self._query("SELECT data FROM examples WHERE job_idx = ? ORDER BY position", (job_idx,))
+        else:
+            rows = [
+                row for example_id in example_ids
+                for row in self._query("SELECT data FROM examples WHERE job_idx = ? AND idx = ?", (job_idx, example_id))
+            ]
+        return [ExampleRecord.from_storage(json.loads(row[0])) for row in rows]
+
+    def _get_idx_from_register(self, key: str) -> Union[str, None]:
+        """Retrieve the idx of a job from the register using a key."""
+        rows = self._query("SELECT idx FROM registry WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+
+def migrate_directory_storage(base_path: str, db_path: str = None) -> SQLiteJobStorage:
+    """Migrate a directory based JobStorage into a SQLiteJobStorage.
+
+    Registry, jobs, examples, version history and logs are copied in one transaction per job.
+    Existing rows with the same keys are replaced (registry, jobs, examples) or skipped (logs),
+    so the migration can be re-run.
+    """
+    from llmp.services.job_storage import JobStorage
+
+    source = JobStorage(base_path)
+    target = SQLiteJobStorage(base_path, db_path=db_path)
+
+    registry = source._load_registry()
+    with target._transaction() as conn:
+        conn.executemany("INSERT OR REPLACE INTO registry (key, idx) VALUES (?, ?)", list(registry.items()))
+
+    for idx in sorted(set(registry.values())):
+        if not (Path(base_path) / idx / "metadata.json").exists():
+            continue
+        job = source._load_job(idx)
+        job.version_history = source.load_version_history(job)
+        job.event_log = source.load_event_log(job)
+        event_errors = source.load_event_errors(job)
+        for event in job.event_log:
+            event._full_errors = event_errors.get(event.event_id)
+        job.generation_log = source.load_generation_log(job)
+        target._save_job(job)
+
+    return target
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate a directory based job storage to SQLite.")
+    parser.add_argument("base_path", help="base path of the directory storage e.g. ./data/jobs")
+    parser.add_argument("--db-path", default=None, help="path of the SQLite database (default: <base_path>/jobs.db)")
+    args = parser.parse_args()
+
+    storage = migrate_directory_storage(args.base_path, db_path=args.db_path)
+    print(f"Migrated {len(set(storage._query('SELECT idx FROM jobs')))} jobs to {storage.db_path}")
@@ -34,6 +34,7 @@ class EventType(str, Enum):
     UPDATE_EXAMPLES: str = "example_update"
     UPDATE_JOB: str = "job_update"
     JOB_CREATION: str = "job_creation"
+    MODEL_ESCALATION: str = "model_escalation"
 
 class MajorVoteType(str, Enum):
     CONSENSUS = "consensus"
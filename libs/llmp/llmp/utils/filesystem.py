@@ -1,35 +1,98 @@
-import json
-import jsonlines
+import os
+import tempfile
+from contextlib import contextmanager
+
 from pathlib import Path
-from typing import Dict, List
-from llmp.utils.encoder import JSONEncoder, dumps_encoder
+from typing import Any, Dict, Iterable, Iterator, List
+from llmp.utils.serializer import JSONSerializer, get_serializer
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows
+    fcntl = None
 
 
 class FileOperations:
+    """File helpers for the job storage.
+
+    Writes of whole files are atomic (temp file + rename) and appends are written with a single write call,
+    so multiple processes can share one base_path. Read-modify-write sequences must hold `_file_lock`.
+
+    (De)serialization uses the fastest installed JSON backend (see llmp.utils.serializer) unless
+    `_serializer` is set. Entries can be dicts or pydantic models.
+    """
+    _serializer: JSONSerializer = None
+
+    @property
+    def serializer(self) -> JSONSerializer:
+        if self._serializer is None:
+            self._serializer = get_serializer()
+        return self._serializer
+
+    @contextmanager
+    def _file_lock(self, file_path: Path):
+        """Hold an advisory (inter-process) lock for a file. Uses a sidecar `.lock` file."""
+        lock_path = file_path.with_name(file_path.name + ".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with lock_path.open('a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
 
     def _read_json_file(self, file_path: Path) -> Dict:
         if not file_path.exists():
             return {}
-        with file_path.open('r') as f:
-            return json.load(f)
+        with file_path.open('rb') as f:
+            return self.serializer.loads(f.read())
 
     def _write_json_file(self, file_path: Path, data: Dict) -> None:
-        with file_path.open('w') as f:
-            json.dump(data, f, cls=JSONEncoder)
+        self._atomic_write(file_path, self.serializer.dumps(data))
 
     def _read_jsonl_file(self, file_path: Path) -> List[Dict]:
+        return list(self._iter_jsonl_file(file_path))
+
+    def _iter_jsonl_file(self, file_path: Path) -> Iterator[Dict]:
+        """Stream the entries of a jsonl file without loading the whole file."""
         if not file_path.exists():
-            return []
-        with jsonlines.open(file_path, mode='r') as reader:
-            return [entry for entry in reader]
-
-    def _write_jsonl_file(self, file_path: Path, data: List[Dict]) -> None:
-        with jsonlines.open(file_path, mode='w', dumps=dumps_encoder) as writer:
-            for entry in data:
-                writer.write(entry)
-
-    def _append_jsonl_file(self, file_path: Path, data: List[Dict]) -> None:
-        mode = 'a' if file_path.exists() else 'w'
-        with jsonlines.open(file_path, mode=mode, dumps=dumps_encoder) as writer:
-            for entry in data:
-                writer.write(entry)
+            return
+        with file_path.open('rb') as f:
+            yield from self.serializer.iter_lines(f)
+
+    def _write_jsonl_file(self, file_path: Path, data: Iterable[Any]) -> None:
+        self._atomic_write(file_path, self.serializer.dumps_lines(data))
+
+    def _append_jsonl_file(self, file_path: Path, data: List[Any]) -> None:
+        if not data:
+            return
+        lines = self.serializer.dumps_lines(data)
+        # single write on an O_APPEND descriptor, so concurrent appends don't interleave.
+        # A short write (e.g. interrupted by a signal or a full disk) is continued with the remaining bytes.
+        fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(lines)
+            while view:
+                written = os.write(fd, view)
+                if written <= 0:
+                    raise OSError(f"Failed to append to {file_path}")
+                view = view[written:]
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _atomic_write(file_path: Path, content: bytes) -> None:
+        """Write to a temp file in the same directory and rename it over the target."""
+        fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        except BaseException as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise e
@@ -0,0 +1,28 @@
+"""Lazy package exports (PEP 562): attributes are imported from their submodule on first access."""
+import importlib
+from typing import Callable
+
+
+def lazy_exports(exports: dict[str, str], module_globals: dict) -> tuple[Callable, Callable]:
+    """Return the module level `__getattr__` and `__dir__` of a package with lazily imported attributes.
+
+    Args:
+        exports (dict[str, str]): attribute name to the (relative) module it is imported from.
+        module_globals (dict): globals() of the package, imported attributes are cached there.
+
+    Example:
+        __getattr__, __dir__ = lazy_exports({"StructEngine": ".genie"}, globals())
+    """
+    package = module_globals["__name__"]
+
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        module_globals[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(module_globals) | set(exports))
+
+    return __getattr__, __dir__
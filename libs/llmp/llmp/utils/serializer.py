@@ -0,0 +1,141 @@
+"""JSON serializers for the file storage.
+
+The serializer backend is chosen by availability: orjson, then msgspec, then the stdlib json module with the
+JSONEncoder of llmp.utils.encoder. Set LLMP_JSON_BACKEND (json, orjson, msgspec) to force a backend.
+
+All backends serialize UUID, Enum and datetime values and pydantic models (shallow, via dict(model), so nested
+models are serialized without building intermediate dicts via .dict()). orjson and msgspec write UUIDs dashed
+and datetimes in ISO 8601, the stdlib backend writes UUID.hex and str(datetime). Both are parsed by the models.
+"""
+import json
+import os
+from enum import Enum
+from typing import Any, Iterable, Iterator, Union
+
+from llmp.utils.encoder import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _is_model(obj) -> bool:
+    return hasattr(obj, "__fields__") and hasattr(obj, "__iter__")
+
+
+class _ModelEncoder(JSONEncoder):
+    def default(self, obj):
+        if _is_model(obj):
+            return dict(obj)
+        return super().default(obj)
+
+
+class JSONSerializer:
+    """Stdlib json backend."""
+    name = "json"
+
+    def __init__(self):
+        self._encoder = _ModelEncoder()
+        self._decoder = json.JSONDecoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        return self._decoder.decode(data)
+
+    def dumps_lines(self, items: Iterable[Any]) -> bytes:
+        """Serialize items to JSON lines (incl. trailing newline)."""
+        return "".join(self._encoder.encode(item) + "\n" for item in items).encode("utf-8")
+
+    def iter_lines(self, file_obj) -> Iterator[Any]:
+        """Parse a JSON lines file (opened in binary mode) line by line, skipping blank lines."""
+        for line in file_obj:
+            if line.strip():
+                yield self.loads(line)
+
+
+class OrjsonSerializer(JSONSerializer):
+    name = "orjson"
+
+    def __init__(self):
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    @staticmethod
+    def _default(obj):
+        if _is_model(obj):
+            return dict(obj)
+        if isinstance(obj, Enum):
+            return obj.value
+        raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self._default, option=self._option)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps_lines(self, items: Iterable[Any]) -> bytes:
+        option = self._option | orjson.OPT_APPEND_NEWLINE
+        return b"".join(orjson.dumps(item, default=self._default, option=option) for item in items)
+
+
+class MsgspecSerializer(JSONSerializer):
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder(enc_hook=self._enc_hook)
+        self._decoder = msgspec.json.Decoder()
+
+    @staticmethod
+    def _enc_hook(obj):
+        if _is_model(obj):
+            return dict(obj)
+        raise NotImplementedError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._decoder.decode(data)
+
+    def dumps_lines(self, items: Iterable[Any]) -> bytes:
+        return self._encoder.encode_lines(list(items))
+
+
+_BACKENDS = {
+    "orjson": (OrjsonSerializer, lambda: orjson is not None),
+    "msgspec": (MsgspecSerializer, lambda: msgspec is not None),
+    "json": (JSONSerializer, lambda: True),
+}
+
+_serializers = {}
+
+
+def get_serializer(backend: str = None) -> JSONSerializer:
+    """Return the serializer for backend, or the fastest installed one.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    backend = backend or os.environ.get("LLMP_JSON_BACKEND")
+    if backend is None:
+        backend = next(name for name, (_, is_available) in _BACKENDS.items() if is_available())
+
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{backend}'. Choose from {list(_BACKENDS)}.")
+    serializer_cls, is_available = _BACKENDS[backend]
+    if not is_available():
+        raise ValueError(f"JSON backend '{backend}' is not installed.")
+
+    if backend not in _serializers:
+        _serializers[backend] = serializer_cls()
+    return _serializers[backend]
@@ -1,7 +1,11 @@
+import hashlib
+import json
 import uuid
 from uuid import UUID
 
-from typing import Sequence
+from typing import Sequence, Union
+
+from llmp.utils.encoder import JSONEncoder
 
 def is_valid_uuid(val):
     """
@@ -36,6 +40,14 @@ def safe_job_name(planned_name: str, existing_names: list, prefix: str = "_v") -
     return planned_name
 
 
+def setting_hash(job_setting: Union[dict, None]) -> str:
+    """Return a short hash of a job setting (instruction and example ids), "" if not set."""
+    if not job_setting:
+        return ""
+    data = json.dumps(job_setting, sort_keys=True, cls=JSONEncoder, default=str)
+    return hashlib.md5(data.encode()).hexdigest()[:12]
+
+
 
 
 
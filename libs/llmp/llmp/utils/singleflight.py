@@ -0,0 +1,85 @@
+"""Singleflight coalescing of identical in-flight requests.
+
+Concurrent calls with the same key share one execution: the first caller (leader) runs the function,
+all other callers wait for its result. Unlike a cache, the result is dropped as soon as the call finishes,
+so only requests that overlap in time are coalesced. The coalescer serves sync and async callers, which
+share an in-flight call if they use the same key.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Awaitable
+
+from llmp.utils.encoder import JSONEncoder
+
+
+def coalescing_key(job, input_data: dict, **settings) -> str:
+    """Create a key from job idx, job version, the generation settings and the canonical input."""
+    canonical = json.dumps(
+        dict(idx=job.idx, version=job.version, settings=settings, input=input_data),
+        sort_keys=True,
+        cls=JSONEncoder,
+        default=str,
+    )
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """In-process request coalescer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+
+    def _join(self, key: str) -> tuple[Future, bool]:
+        """Return the future for a key and whether the caller is the leader."""
+        with self._lock:
+            if key in self._calls:
+                return self._calls[key], False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _finish(self, key: str):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn once for all concurrent calls with the same key (sync)."""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise e
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run fn once for all concurrent calls with the same key (async)."""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return copy.deepcopy(await asyncio.wrap_future(future))
+
+        try:
+            result = await fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise e
+        finally:
+            self._finish(key)
+
+    def in_flight(self) -> int:
+        """Return the number of calls currently in flight."""
+        with self._lock:
+            return len(self._calls)
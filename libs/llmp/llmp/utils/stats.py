@@ -0,0 +1,71 @@
+"""Vectorised statistics of grouped values.
+
+Values are numpy arrays with a group index per value (0..num_groups-1, e.g. from np.unique(return_inverse=True)).
+NaN values are ignored. Groups without values get NaN statistics.
+"""
+from statistics import NormalDist
+from typing import Sequence
+
+import numpy as np
+
+
+def group_counts(values: np.ndarray, groups: np.ndarray, num_groups: int) -> np.ndarray:
+    return np.bincount(groups[~np.isnan(values)], minlength=num_groups)
+
+
+def group_mean(values: np.ndarray, groups: np.ndarray, num_groups: int) -> np.ndarray:
+    valid = ~np.isnan(values)
+    counts = np.bincount(groups[valid], minlength=num_groups)
+    sums = np.bincount(groups[valid], weights=values[valid], minlength=num_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def group_var(values: np.ndarray, groups: np.ndarray, num_groups: int, ddof: int = 1) -> np.ndarray:
+    """Variance per group (sample variance by default, NaN for groups with <= ddof values)."""
+    valid = ~np.isnan(values)
+    counts = np.bincount(groups[valid], minlength=num_groups)
+    means = group_mean(values, groups, num_groups)
+    deviations = values[valid] - means[groups[valid]]
+    squares = np.bincount(groups[valid], weights=deviations ** 2, minlength=num_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > ddof, squares / (counts - ddof), np.nan)
+
+
+def group_percentiles(
+        values: np.ndarray,
+        groups: np.ndarray,
+        num_groups: int,
+        percentiles: Sequence[float],
+) -> np.ndarray:
+    """Percentiles per group (linear interpolation like np.percentile). Returns shape (num_groups, len(percentiles))."""
+    valid = ~np.isnan(values)
+    values, groups = values[valid], groups[valid]
+    counts = np.bincount(groups, minlength=num_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    # sort by group, then value; the values of a group are contiguous
+    sorted_values = values[np.lexsort((values, groups))]
+
+    result = np.full((num_groups, len(percentiles)), np.nan)
+    has_values = counts > 0
+    if not has_values.any() or not len(percentiles):
+        return result
+    positions = starts[has_values, None] + np.asarray(percentiles) / 100 * (counts[has_values, None] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    fraction = positions - lower
+    result[has_values] = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    return result
+
+
+def confidence_interval(
+        means: np.ndarray,
+        variances: np.ndarray,
+        counts: np.ndarray,
+        confidence: float = 0.95,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Confidence interval of the means (normal approximation). Returns (lower, upper)."""
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        margin = z * np.sqrt(variances / counts)
+    return means - margin, means + margin
@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+import pytest
+
+from llmp.services import analytics
+from llmp.services.analytics import EventLogExporter, aggregate, event_row, select
+from llmp.utils.signature import setting_hash
+
+
+def _event(i, version=0, event_type="generation", **metrics):
+    return dict(
+        event_id=str(i),
+        timestamp="20240101120000",
+        event_type=event_type,
+        job_version=version,
+        job_setting={"instruction": f"v{version}", "example_id": ["a"]},
+        event_metrics={**dict(execution_time=float(i), token_usage=100, failure_rate=0, errors=[]), **metrics},
+    )
+
+
+def _write(path, events, mode="a"):
+    with open(path, mode) as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def test_event_row():
+    row = event_row(_event(1, model_config={"temperature": 0.5}, model_name="gpt-4", errors=["x", "y"]))
+    assert row["job_version"] == 0 and row["setting_hash"] == setting_hash({"instruction": "v0", "example_id": ["a"]})
+    assert row["metrics.model_config.temperature"] == 0.5
+    assert row["metrics.model_name"] == "gpt-4"
+    assert row["metrics.num_errors"] == 2.0
+    assert event_row({"event_id": "x", "event_type": "job_update"})["job_version"] == -1
+
+
+def test_incremental_export(tmp_path, mocker):
+    path = tmp_path / "event_log.jsonl"
+    _write(path, [_event(i) for i in range(5)])
+    exporter = EventLogExporter(path, format="npy", part_rows=3)
+    assert exporter.export() == 5
+    assert exporter.export() == 0
+
+    _write(path, [_event(5, version=1, accuracy=1.0), {"event_id": "6", "event_type": "job_update"}])
+    with open(path, "a") as f:
+        f.write('{"event_id": "7"')  # incomplete line
+    event_row_spy = mocker.spy(analytics, "event_row")
+    assert exporter.export() == 2
+    assert event_row_spy.call_count == 2
+
+    columns = exporter.load()
+    assert list(columns["event_id"]) == [str(i) for i in range(7)]
+    assert columns["job_version"].dtype == np.int64 and columns["job_version"][-1] == -1
+    assert columns["metrics.execution_time"].dtype == np.float64
+    assert np.isnan(columns["metrics.accuracy"][0]) and columns["metrics.accuracy"][5] == 1.0
+    assert (tmp_path / "analytics" / "event_log" / "part-000000" / "event_id.npy").exists()
+
+    # a rewritten log is exported again
+    _write(path, [_event(i) for i in range(2)], mode="w")
+    assert exporter.export() == 2
+    assert list(EventLogExporter(path).load(columns=["event_id"])) == ["event_id"]
+
+
+def test_merge_parts(tmp_path):
+    path = tmp_path / "event_log.jsonl"
+    exporter = EventLogExporter(path, format="npy", part_rows=4, max_parts=2)
+    for i in range(5):
+        _write(path, [_event(i, model_name="gpt-4") if i == 3 else _event(i)])
+        exporter.export()
+    manifest = json.loads(exporter.manifest_path.read_text())
+    assert [part["rows"] for part in manifest["parts"]] == [4, 1]
+    columns = exporter.load()
+    assert list(columns["metrics.model_name"]) == ["", "", "", "gpt-4", ""]
+
+
+def test_aggregate(tmp_path):
+    path = tmp_path / "event_log.jsonl"
+    events = [_event(i, version=0) for i in range(1, 5)] + [_event(i, version=1) for i in range(10, 12)]
+    events[0]["event_metrics"]["failure_rate"] = 1
+    events.append(_event(99, version=1, event_type="sample_evaluation", accuracy=0.5))
+    _write(path, events)
+    columns = EventLogExporter(path, format="npy").load()
+
+    results = aggregate(columns)
+    assert [(r["job_version"], r["count"], r["failure_rate"]) for r in results] == [(0, 4, 0.25), (1, 2, 0.0)]
+    assert results[0]["execution_time"] == {"mean": 2.5, "p50": 2.5, "p95": pytest.approx(3.85)}
+    assert "accuracy" in results[0] and results[0]["accuracy"]["mean"] is None
+
+    results = aggregate(columns, metrics=["accuracy"], by=["job_version"], event_type="sample_evaluation")
+    assert results == [
+        {"job_version": 1, "count": 1, "failure_rate": 0.0, "accuracy": {"mean": 0.5, "p50": 0.5, "p95": 0.5}}
+    ]
+    assert len(select(columns, job_version=[0, 1], event_type="generation")["event_id"]) == 6
+
+
+def test_parquet_export(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "event_log.jsonl"
+    _write(path, [_event(i) for i in range(3)])
+    exporter = EventLogExporter(path, format="parquet")
+    columns = exporter.load()
+    assert columns["event_id"].dtype.kind == "U" and list(columns["metrics.token_usage"]) == [100.0] * 3
+    assert (tmp_path / "analytics" / "event_log" / "part-000000.parquet").exists()
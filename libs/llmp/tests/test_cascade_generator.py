@@ -0,0 +1,86 @@
+from typing import Literal
+
+import pytest
+from structgenie.pydantic_v1 import BaseModel
+
+from tests.resources.fixtures import test_job
+from llmp.components.generator import CascadeGenerator
+from llmp.components.generator.cascade import get_cascade_hit_rates
+from llmp.components.settings.program_settings import ProgramSettings
+from llmp.services.job_manager import JobManager
+from llmp.types import EventType
+
+
+class Input(BaseModel):
+    text: str
+
+
+class Output(BaseModel):
+    sentiment: Literal["positive", "negative"]
+
+
+class FakeEngine:
+    def __init__(self, model_name, fail_models):
+        self.model_name = model_name
+        self.fail_models = fail_models
+
+    def run(self, input_data, **kwargs):
+        if self.model_name in self.fail_models:
+            raise ValueError("exceeded max retries")
+        return {"external_types": ["textual"], "internal_types": []}, {"token_usage": 10}
+
+
+@pytest.fixture
+def cascade_job(test_job):
+    test_job.config["cascade_models"] = ["cheap-model"]
+    test_job.event_log = []
+    return test_job
+
+
+def mock_engines(mocker, fail_models):
+    return mocker.patch(
+        "llmp.components.generator.cascade.load_engine_from_job",
+        side_effect=lambda job, job_settings, model_name=None, **kwargs: FakeEngine(model_name, fail_models)
+    )
+
+
+def test_cascade_serves_cheap_tier(mocker, cascade_job):
+    load_engine = mock_engines(mocker, fail_models=[])
+    output, run_metrics = CascadeGenerator(cascade_job).generate({"description": "a report", "sources": ["internal"]})
+
+    assert run_metrics["model_name"] == "cheap-model"
+    assert run_metrics["cascade_tier"] == 0
+    assert load_engine.call_count == 1
+    assert not [event for event in cascade_job.event_log if event.event_type == EventType.MODEL_ESCALATION]
+
+
+def test_cascade_escalates_on_failure(mocker, cascade_job):
+    mock_engines(mocker, fail_models=["cheap-model"])
+    output, run_metrics = CascadeGenerator(cascade_job).generate({"description": "a report", "sources": ["internal"]})
+
+    assert run_metrics["model_name"] == cascade_job.config["model_name"]
+    assert run_metrics["cascade_tier"] == 1
+
+    escalations = [event for event in cascade_job.event_log if event.event_type == EventType.MODEL_ESCALATION]
+    assert len(escalations) == 1
+    assert escalations[0].event_metrics["from_model"] == "cheap-model"
+    assert escalations[0].event_metrics["reason"] == "generation_failed"
+
+    cascade_job.log_generation({"description": "a report"}, output, run_metrics)
+    assert get_cascade_hit_rates(cascade_job, cascade_job.event_log) == {"cheap-model": 0.0, cascade_job.config["model_name"]: 1.0}
+
+
+def test_cascade_hit_rates_from_stored_events(mocker, tmp_path):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job = job_manager.create_job(
+        "cascade",
+        config=ProgramSettings(cascade_models=["cheap-model"]).dict(),
+        instruction="Classify the sentiment of the text.",
+        input_examples=[Input(text="great")],
+        output_examples=[Output(sentiment="positive")],
+    )
+    mock_engines(mocker, fail_models=[])
+
+    job_manager.generate_output(job, {"text": "bad"}, generator_type="cascade")
+    assert job.event_log == []
+    assert job_manager.get_cascade_hit_rates(job.idx) == {"cheap-model": 1.0, job.config["model_name"]: 0.0}
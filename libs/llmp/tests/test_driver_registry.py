@@ -0,0 +1,81 @@
+import sys
+from unittest import mock
+
+import pytest
+
+from llmp.components.settings.program_settings import ProgramSettings
+from llmp.data_model.job_record import load_driver_by_model, use_driver
+from llmp.integration import driver_registry as registry_module
+from llmp.integration.driver_registry import DEFAULT_CONTEXT_SIZE, DriverRegistry, driver_registry
+from llmp.integration.fake_driver import FakeDriver
+
+
+@pytest.fixture
+def registry():
+    return driver_registry.copy()
+
+
+def test_builtin_models(registry):
+    info = registry.get_model_info("gpt-4")
+    assert (info.provider, info.context_size, info.supports_n) == ("openai", 8192, True)
+    assert registry.get_model_info("gpt-4o").supports_json_schema
+    assert registry.get_model_info("open-mixtral-8x7b").provider == "mistral"
+
+    # unregistered models are served by the provider matching the name
+    info = registry.get_model_info("ft:gpt-4o-mini:org::abc")
+    assert (info.provider, info.context_size) == ("openai", DEFAULT_CONTEXT_SIZE)
+
+    with pytest.raises(ValueError, match="not supported"):
+        registry.get_model_info("llama-3")
+    assert registry.find_model_info("llama-3") is None
+    assert registry.context_size("llama-3") == DEFAULT_CONTEXT_SIZE
+
+
+def test_context_size_is_shared():
+    assert ProgramSettings.model_to_context_size("gpt-4-32k") == 32768
+    assert ProgramSettings.model_to_context_size("gpt-3.5-turbo-0125") == 16385
+    assert ProgramSettings.model_to_context_size("unknown") == DEFAULT_CONTEXT_SIZE
+
+
+def test_driver_is_imported_lazily(registry):
+    sys.modules.pop("llmp.integration.replay_driver", None)
+    registry.register_provider("replay", "llmp.integration.replay_driver:ReplayDriver", patterns=["replay/*"])
+    registry.register_model("replay/gpt-4", provider="replay", context_size=8192)
+    assert "llmp.integration.replay_driver" not in sys.modules
+
+    driver = registry.get_driver("replay/gpt-4")
+    assert driver.__name__ == "ReplayDriver"
+    assert registry.get_driver("replay/other") is driver
+
+    with pytest.raises(ValueError, match="Unknown provider"):
+        registry.register_model("x", provider="unknown")
+
+
+def test_plugins(registry):
+    def register(reg):
+        reg.register_provider("fake", FakeDriver, patterns=["fake-*", "*gpt-4*"], supports_json_schema=True)
+
+    def broken(reg):
+        raise ImportError("missing sdk")
+
+    entry_points = [mock.Mock(load=mock.Mock(return_value=register)), mock.Mock(load=mock.Mock(return_value=broken))]
+    entry_points[1].name = "broken"
+    registry._plugins_loaded = False
+
+    with mock.patch.object(registry_module, "_entry_points", return_value=entry_points) as loader:
+        with pytest.warns(UserWarning, match="broken"):
+            assert registry.get_driver("fake-large") is FakeDriver
+        registry.get_model_info("fake-small")
+    loader.assert_called_once_with("llmp.drivers")
+
+    # plugin patterns take precedence, registered models keep their provider
+    assert registry.get_model_info("ft:gpt-4o-x").provider == "fake"
+    assert registry.get_model_info("gpt-4").provider == "openai"
+    assert DriverRegistry(load_plugins=False).find_model_info("gpt-4") is None
+
+
+def test_load_driver_by_model():
+    with pytest.raises(ValueError, match="not supported"):
+        load_driver_by_model("llama-3")
+    with use_driver(FakeDriver):
+        assert load_driver_by_model("llama-3") is FakeDriver
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from tests.resources.fixtures import create_job_input
+from llmp.data_model import ExampleRecord
+from llmp.integration.structgenie import Example
+from llmp.services.example_store import ExampleStore
+from llmp.services.job_manager import JobManager
+
+
+def _record(i):
+    return ExampleRecord(example=Example(input={"i": i}, output={"o": i}))
+
+
+def test_example_store_fold_and_compact(tmp_path):
+    store = ExampleStore(tmp_path / "examples.jsonl", min_garbage_lines=1)
+    records = [_record(i).dict() for i in range(3)]
+    store.write(records)
+
+    updated = dict(records[1], version=1)
+    store.append([updated, _record(3).dict()], deleted_ids=[records[0]["idx"]])
+
+    num_garbage, num_live, loaded = store.read()
+    assert [record["idx"] for record in loaded] == [records[1]["idx"], records[2]["idx"], loaded[2]["idx"]]
+    assert loaded[0]["version"] == 1
+    assert (num_garbage, num_live) == (3, 3)
+
+    assert store.compact()
+    assert store.read() == (0, 3, loaded)
+    assert not store.compact()
+
+
+@pytest.mark.parametrize("storage_backend", ["file", "sqlite"])
+def test_incremental_example_saves(tmp_path, create_job_input, storage_backend):
+    job_manager = JobManager(str(tmp_path), storage_backend=storage_backend)
+    job = job_manager.create_job(**create_job_input)
+    removed, updated = job.example_records[0], job.example_records[1]
+
+    job.add_example(_record(100))
+    job.remove_example(removed.idx)
+    job.update_example(updated.idx, Example(input=updated.input, output={"updated": True}))
+    job_manager.update_job(job)
+
+    loaded = job_manager.get_job(idx=job.idx)
+    assert [record.idx for record in loaded.example_records] == [record.idx for record in job.example_records]
+    assert loaded.example_records[0].output == {"updated": True}
+    assert loaded.example_records[0].version == 1
+
+    if storage_backend == "file":
+        lines = (tmp_path / job.idx / "examples.jsonl").read_text().splitlines()
+        assert len(lines) == len(create_job_input["input_examples"]) + 3
+
+
+@pytest.mark.parametrize("storage_backend", ["file", "sqlite"])
+def test_in_place_example_edits_are_saved(tmp_path, create_job_input, storage_backend):
+    job_manager = JobManager(str(tmp_path), storage_backend=storage_backend)
+    job = job_manager.create_job(**create_job_input)
+
+    job.example_records[0].reliability = 0.25
+    job_manager.update_job(job)
+
+    loaded = job_manager.get_job(idx=job.idx)
+    assert loaded.example_records[0].reliability == 0.25
+
+
+def test_unchanged_examples_are_not_written(tmp_path, create_job_input, mocker):
+    job_manager = JobManager(str(tmp_path))
+    job = job_manager.create_job(**create_job_input)
+
+    append = mocker.spy(job_manager.job_storage, "_append_jsonl_file")
+    atomic_write = mocker.spy(job_manager.job_storage, "_atomic_write")
+    job_manager.update_job(job)
+    job_manager.update_job(job_manager.get_job(idx=job.idx))
+    written = [call.args[0].name for call in append.call_args_list + atomic_write.call_args_list]
+    assert "examples.jsonl" not in written
+
+
+def test_background_compaction(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path))
+    job = job_manager.create_job(**create_job_input)
+    num_examples = len(job.example_records)
+
+    for i in range(120):
+        record = job.example_records[-1]
+        job.update_example(record.idx, Example(input=record.input, output={"n": i}))
+        job_manager.update_job(job)
+
+    file_path = tmp_path / job.idx / "examples.jsonl"
+    for _ in range(50):
+        if len(file_path.read_text().splitlines()) < 100:
+            break
+        time.sleep(0.1)
+    assert len(file_path.read_text().splitlines()) < 100
+    assert len(job_manager.get_job(idx=job.idx).example_records) == num_examples
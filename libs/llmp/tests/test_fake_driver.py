@@ -0,0 +1,124 @@
+import asyncio
+from typing import Literal
+from unittest import mock
+
+import pytest
+from structgenie.pydantic_v1 import BaseModel
+
+from llmp.integration.fake_driver import FakeDriver, FakeDriverError, FakeScript
+from llmp.services.job_manager import JobManager
+
+
+class Input(BaseModel):
+    text: str
+
+
+class Output(BaseModel):
+    sentiment: Literal["positive", "negative"]
+
+
+def test_scripted_responses():
+    driver = FakeDriver.configure(responses=["a", {"sentiment": "positive"}], token_usage=7)
+    executor = driver.load_driver("Text: {text}")
+
+    assert executor.predict(text="x") == "a"
+    output, metrics = executor.predict_and_measure(text="y")
+    assert output == "sentiment: positive\n"
+    assert metrics["token_usage"] == 7
+    assert metrics["model_name"] == "fake-model"
+    assert executor.predict(text="z") == "a"
+    assert driver.script.num_calls == 3
+
+    # configured drivers don't share their scripts
+    assert FakeDriver.configure(responses=["b"]).script is not driver.script
+    with pytest.raises(ValueError):
+        FakeDriver.load_driver("Text: {text}")
+
+
+def test_responder_and_async():
+    driver = FakeDriver.configure(responder=lambda prompt, inputs: prompt.upper(), latency=0.001)
+    executor = driver.load_driver("Text: {text}")
+
+    async def run():
+        return await asyncio.gather(*[executor.predict_async(text=str(i)) for i in range(5)])
+
+    assert asyncio.run(run()) == [f"TEXT: {i}" for i in range(5)]
+
+
+def test_error_injection_is_seeded():
+    def failures(seed):
+        script = FakeScript(responses=["a"], error_rate=0.3, seed=seed)
+        return [script.next_call("", {})[2] for _ in range(200)]
+
+    assert failures(1) == failures(1)
+    assert 30 < sum(failures(1)) < 90
+
+    driver = FakeDriver.configure(responses=["a"], error_rate=1.0)
+    with pytest.raises(FakeDriverError):
+        driver.load_driver("Text: {text}").predict(text="x")
+    assert driver.script.num_errors == 1
+
+
+def test_generate_with_fake_driver(tmp_path):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job = job_manager.create_job(
+        "fake",
+        instruction="Classify the sentiment of the text.",
+        input_examples=[Input(text="great")],
+        output_examples=[Output(sentiment="positive")],
+    )
+    driver = FakeDriver.configure(responses=["Mood: negative", "Sentiment: negative"])
+
+    with mock.patch("llmp.data_model.job_record.load_driver_by_model", return_value=driver), \
+            mock.patch("structgenie.base.count_tokens", return_value=10), \
+            mock.patch("structgenie.utils.helper.count_tokens", return_value=10):
+        output, _ = job_manager.generate_output(job, {"text": "bad"})
+
+    # the first output misses the sentiment and is regenerated
+    assert output["sentiment"] == "negative"
+    assert driver.script.num_calls == 2
+
+
+def test_generate_outputs_returns_metrics_per_input(tmp_path):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job = job_manager.create_job(
+        "fake",
+        instruction="Classify the sentiment of the text.",
+        input_examples=[Input(text="great")],
+        output_examples=[Output(sentiment="positive")],
+    )
+    driver = FakeDriver.configure(responses=["Sentiment: negative", "Sentiment: positive"], token_usage=7)
+
+    with mock.patch("llmp.data_model.job_record.load_driver_by_model", return_value=driver), \
+            mock.patch("structgenie.base.count_tokens", return_value=10), \
+            mock.patch("structgenie.utils.helper.count_tokens", return_value=10):
+        outputs, run_metrics = job_manager.generate_outputs(
+            job, [{"text": "bad"}, {"text": "good"}], generator_type="default"
+        )
+
+    assert [output["sentiment"] for output in outputs] == ["negative", "positive"]
+    assert len(run_metrics) == 2
+    assert all(metrics["token_usage"] > 0 for metrics in run_metrics)
+
+
+def test_generate_outputs_logs_metrics_per_packed_input(tmp_path):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job = job_manager.create_job(
+        "fake",
+        instruction="Classify the sentiment of the text.",
+        input_examples=[Input(text="great")],
+        output_examples=[Output(sentiment="positive")],
+    )
+    item_metrics = [
+        {"token_usage": 50, "execution_time": 1.0, "failure_rate": 0, "errors": []},
+        {"token_usage": 90, "execution_time": 1.5, "failure_rate": 1, "errors": ["invalid sentiment"]},
+    ]
+    outputs = [{"sentiment": "negative"}, {"sentiment": "positive"}]
+
+    with mock.patch("llmp.components.generator.packed.PackedGenerator.generate", return_value=(outputs, item_metrics)):
+        _, run_metrics = job_manager.generate_outputs(job, [{"text": "bad"}, {"text": "good"}])
+
+    assert run_metrics == item_metrics
+    metrics = job_manager.get_job_metrics(job.idx)
+    assert metrics["failure_rate"] == 0.5
+    assert metrics["token_usage"]["max"] == pytest.approx(90, rel=0.02)
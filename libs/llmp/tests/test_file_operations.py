@@ -0,0 +1,81 @@
+import os
+from multiprocessing import Pool
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from llmp.data_model.events import Event
+from llmp.services.job_storage import JobStorage
+from llmp.types import EventType
+from llmp.utils.filesystem import FileOperations
+from llmp.utils.serializer import get_serializer, orjson, msgspec
+
+
+def _register(args):
+    base_path, i = args
+    storage = JobStorage(base_path)
+    registry_file = Path(base_path) / "job_register.json"
+    with storage._file_lock(registry_file):
+        registry = storage._load_registry()
+        registry[f"job_{i}"] = str(i)
+        storage._write_json_file(registry_file, registry)
+
+
+def _append(args):
+    file_path, i = args
+    FileOperations()._append_jsonl_file(Path(file_path), [{"event_id": f"{i}_{j}", "data": "x" * 1000} for j in range(20)])
+
+
+def test_concurrent_registry_updates(tmp_path):
+    with Pool(4) as pool:
+        pool.map(_register, [(str(tmp_path), i) for i in range(20)])
+    assert len(JobStorage(str(tmp_path)).get_registry_keys()) == 20
+
+
+def test_concurrent_appends(tmp_path):
+    file_path = tmp_path / "event_log.jsonl"
+    with Pool(4) as pool:
+        pool.map(_append, [(str(file_path), i) for i in range(20)])
+    assert len(FileOperations()._read_jsonl_file(file_path)) == 400
+
+
+def test_append_continues_short_writes(tmp_path, mocker):
+    write = os.write
+    mocker.patch("llmp.utils.filesystem.os.write", side_effect=lambda fd, data: write(fd, bytes(data[:100])))
+    file_path = tmp_path / "event_log.jsonl"
+    FileOperations()._append_jsonl_file(file_path, [{"event_id": str(i), "data": "x" * 1000} for i in range(3)])
+    assert [entry["event_id"] for entry in FileOperations()._read_jsonl_file(file_path)] == ["0", "1", "2"]
+
+    mocker.patch("llmp.utils.filesystem.os.write", return_value=0)
+    with pytest.raises(OSError):
+        FileOperations()._append_jsonl_file(file_path, [{"event_id": "3"}])
+
+
+def test_atomic_write_leaves_no_temp_files(tmp_path):
+    file_path = tmp_path / "metadata.json"
+    FileOperations()._write_json_file(file_path, {"a": 1})
+    FileOperations()._write_json_file(file_path, {"a": 2})
+    assert FileOperations()._read_json_file(file_path) == {"a": 2}
+    assert [p.name for p in tmp_path.iterdir()] == ["metadata.json"]
+
+
+@pytest.mark.parametrize("backend", [
+    "json",
+    pytest.param("orjson", marks=pytest.mark.skipif(orjson is None, reason="orjson not installed")),
+    pytest.param("msgspec", marks=pytest.mark.skipif(msgspec is None, reason="msgspec not installed")),
+])
+def test_serializer_backends(tmp_path, backend):
+    file_ops = FileOperations()
+    file_ops._serializer = get_serializer(backend)
+    file_path = tmp_path / "event_log.jsonl"
+
+    events = [Event(event_type=EventType.GENERATION, event_metrics={"n": i}) for i in range(3)]
+    file_ops._write_jsonl_file(file_path, events)
+    file_ops._append_jsonl_file(file_path, [{"event_id": uuid4(), "version_history": {1: "a"}}])
+
+    entries = file_ops._iter_jsonl_file(file_path)
+    assert not isinstance(entries, list)
+    entries = list(entries)
+    assert [Event.parse_obj(entry) for entry in entries[:3]] == events
+    assert entries[3]["version_history"] == {"1": "a"}
@@ -0,0 +1,129 @@
+import random
+from typing import Literal
+from unittest import mock
+
+import pytest
+from structgenie.pydantic_v1 import BaseModel
+
+from tests.resources.fixtures import create_job_input
+from llmp.integration.fake_driver import FakeDriver
+from llmp.services.job_manager import JobManager
+from llmp.services.metrics import METRICS_FILE, MetricsRollup, StreamingHistogram
+
+
+def _log_generations(job, num):
+    for i in range(num):
+        job.log_generation(
+            {"i": i},
+            {"o": i},
+            {"execution_time": 0.1 * (i + 1), "token_usage": 100 + i, "failure_rate": int(i % 10 == 0)},
+        )
+
+
+def test_streaming_histogram():
+    values = [random.lognormvariate(0, 1) for _ in range(10000)]
+    histogram = StreamingHistogram(relative_accuracy=0.01)
+    for value in values:
+        histogram.add(value)
+
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert histogram.quantile(q) == pytest.approx(exact, rel=0.02)
+
+    restored = StreamingHistogram.from_dict(histogram.to_dict())
+    restored.merge(histogram)
+    assert restored.count == 20000
+    assert restored.quantile(0.5) == histogram.quantile(0.5)
+
+
+@pytest.mark.parametrize("storage_backend", ["file", "sqlite"])
+def test_job_metrics(tmp_path, create_job_input, storage_backend):
+    job_manager = JobManager(str(tmp_path), storage_backend=storage_backend, background_logging=False)
+    job = job_manager.create_job(**create_job_input)
+
+    _log_generations(job, 20)
+    job_manager.store_logs(job)
+    job.version += 1
+    _log_generations(job, 10)
+    job_manager.store_logs(job)
+    # storing the same logs again doesn't count twice
+    job_manager.store_logs(job)
+
+    metrics = job_manager.get_job_metrics(job.idx)
+    assert metrics["count"] == 30
+    assert metrics["failure_rate"] == pytest.approx(3 / 30)
+    assert metrics["token_usage"]["max"] == 119
+    assert metrics["execution_time"]["p50"] == pytest.approx(0.8, rel=0.02)
+
+    by_version = job_manager.get_job_metrics(job.idx, by_version=True)
+    assert {version: m["count"] for version, m in by_version.items()} == {0: 20, 1: 10}
+    assert job_manager.get_job_metrics(job.idx, version=1)["retries"]["max"] == 1
+
+
+def test_evaluate_job_performance(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job = job_manager.create_job(**create_job_input)
+    _log_generations(job, 10)
+    job_manager.store_logs(job)
+    job.version += 1
+    job_manager.update_job(job)
+    assert job_manager.evaluate_job_performance(job.idx)["count"] == 0
+
+    _log_generations(job, 20)
+    job_manager.store_logs(job)
+    performance = job_manager.evaluate_job_performance(job.idx)
+    assert performance["count"] == 20
+    assert performance["failure_rate"] == pytest.approx(2 / 20)
+    assert performance["latency_p50"] == pytest.approx(1.0, rel=0.02)
+    assert performance["latency_p99"] == pytest.approx(1.9, rel=0.02)
+    assert performance["token_usage"] == pytest.approx(109.5)
+    assert performance["retries"] == pytest.approx(0.1)
+
+
+def test_job_metrics_of_engine_runs(tmp_path):
+    class Input(BaseModel):
+        text: str
+
+    class Output(BaseModel):
+        sentiment: Literal["positive", "negative"]
+
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job = job_manager.create_job(
+        "fake",
+        instruction="Classify the sentiment of the text.",
+        input_examples=[Input(text="great")],
+        output_examples=[Output(sentiment="positive")],
+    )
+    driver = FakeDriver.configure(responses=["Sentiment: negative"], token_usage=100)
+
+    with mock.patch("llmp.data_model.job_record.load_driver_by_model", return_value=driver), \
+            mock.patch("structgenie.base.count_tokens", return_value=10), \
+            mock.patch("structgenie.utils.helper.count_tokens", return_value=10):
+        for text in ["bad", "awful", "terrible"]:
+            job_manager.generate_output(job, {"text": text})
+
+    metrics = job_manager.get_job_metrics(job.idx)
+    assert driver.script.num_calls == 3
+    assert metrics["count"] == 3
+    assert metrics["failure_rate"] == 0
+    assert metrics["retries"]["p50"] == 0
+    assert metrics["token_usage"]["mean"] == 100
+
+
+def test_job_metrics_rebuilt_from_event_log(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job = job_manager.create_job(**create_job_input)
+    _log_generations(job, 5)
+    job_manager.store_logs(job)
+
+    # event logs written before rollups existed
+    (tmp_path / job.idx / METRICS_FILE).unlink()
+    assert job_manager.get_job_metrics(job.idx)["count"] == 5
+    assert (tmp_path / job.idx / METRICS_FILE).exists()
+
+    _log_generations(job, 5)
+    job_manager.store_logs(job)
+    rollup = job_manager.job_storage.load_job_metrics(job)
+    assert rollup.summary()["count"] == 10
+    assert rollup.summary()["count"] == MetricsRollup.from_events(job_manager.get_event_log(job.idx)).summary()["count"]
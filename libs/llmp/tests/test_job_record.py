@@ -1,6 +1,7 @@
 import pytest
 from tests.resources.fixtures import test_job
 from llmp.data_model.job_record import (input_in_records, get_record_by_input)
+from llmp.integration.structgenie import Example
 
 
 @pytest.fixture
@@ -18,3 +19,26 @@ def test_example_in_job(test_job, input_example):
 def test_record_by_input(test_job, input_example):
     record = get_record_by_input(test_job, input_example)
     assert record.input["description"] == input_example["description"], "Record was not found by input"
+
+
+def test_input_index(test_job, input_example):
+    record = get_record_by_input(test_job, input_example)
+    assert get_record_by_input(test_job, dict(reversed(list(input_example.items())))) is record
+
+    test_job.remove_example(record.idx)
+    assert not input_in_records(test_job, input_example)
+
+    test_job.example_records.append(record)
+    assert get_record_by_input(test_job, input_example) is record
+
+
+def test_input_index_after_record_update(test_job, input_example):
+    record = get_record_by_input(test_job, input_example)
+    new_input = {**input_example, "sources": ["internal"]}
+    if input_in_records(test_job, new_input):
+        test_job.remove_example(get_record_by_input(test_job, new_input).idx)
+
+    # the record is changed without JobRecord.update_example
+    record.update(Example(input=new_input, output=record.output))
+    assert get_record_by_input(test_job, new_input) is record
+    assert get_record_by_input(test_job, input_example) is None
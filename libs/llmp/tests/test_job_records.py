@@ -64,7 +64,7 @@ def test_job_record_methods():
     assert job_record.event_log == [event]
 
     event = job_record.log_generation({}, {}, {}, {})
-    generation_log = {"event_id": event.event_id, "input": {}, "output": {}}
+    generation_log = {"event_id": event.event_id, "timestamp": event.timestamp, "input": {}, "output": {}}
     assert job_record.generation_log == [generation_log]
 
     examples = job_record.get_examples()
@@ -0,0 +1,55 @@
+import pytest
+
+from tests.resources.fixtures import create_job_input
+from llmp.data_model import ExampleRecord
+from llmp.services.job_manager import JobManager
+
+
+@pytest.mark.parametrize("storage_backend", ["file", "sqlite"])
+def test_lazy_example_records(tmp_path, create_job_input, storage_backend):
+    job_manager = JobManager(str(tmp_path), storage_backend=storage_backend)
+    job = job_manager.create_job(**create_job_input)
+
+    loaded_job = job_manager.get_job(idx=job.idx)
+    assert not loaded_job.example_records.is_loaded
+    assert loaded_job.job_name == job.job_name
+    assert not loaded_job.example_records.is_loaded
+
+    assert len(loaded_job.example_records) == len(job.example_records)
+    assert loaded_job.example_records.is_loaded
+    for loaded, example in zip(loaded_job.example_records, job.example_records):
+        assert isinstance(loaded, ExampleRecord)
+        assert loaded.example.input == example.example.input
+        assert loaded.version_history.keys() == example.version_history.keys()
+        assert loaded.verification_type == example.verification_type
+
+    eager_job = job_manager.get_job(idx=job.idx, lazy=False)
+    assert isinstance(eager_job.example_records, list)
+    assert [e.idx for e in eager_job.example_records] == [e.idx for e in job.example_records]
+
+
+@pytest.mark.parametrize("storage_backend", ["file", "sqlite"])
+def test_load_example_subset(tmp_path, create_job_input, storage_backend):
+    job_manager = JobManager(str(tmp_path), storage_backend=storage_backend)
+    job = job_manager.create_job(**create_job_input)
+    example_ids = [job.example_records[-1].idx, job.example_records[0].idx]
+
+    loaded_job = job_manager.get_job(idx=job.idx, example_ids=example_ids)
+    assert sorted(e.idx for e in loaded_job.example_records) == sorted(example_ids)
+
+
+@pytest.mark.parametrize("storage_backend", ["file", "sqlite"])
+def test_save_example_subset(tmp_path, create_job_input, storage_backend):
+    job_manager = JobManager(str(tmp_path), storage_backend=storage_backend)
+    job = job_manager.create_job(**create_job_input)
+    example_ids = [job.example_records[0].idx]
+
+    loaded_job = job_manager.get_job(idx=job.idx, example_ids=example_ids)
+    assert len(loaded_job.example_records) == 1
+    job_manager.update_job(loaded_job)
+    # without fingerprints of the loaded examples the subset is merged as well
+    loaded_job._storage_state.pop(job_manager.job_storage._state_key)
+    job_manager.update_job(loaded_job)
+
+    reloaded_job = JobManager(str(tmp_path), storage_backend=storage_backend).get_job(idx=job.idx)
+    assert [e.idx for e in reloaded_job.example_records] == [e.idx for e in job.example_records]
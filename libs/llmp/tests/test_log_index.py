@@ -0,0 +1,61 @@
+import json
+
+from llmp.services.log_index import LogIndex
+
+
+def _write(path, events, mode="a"):
+    with open(path, mode) as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def _events(start, num, event_type="generation", job_version=0):
+    return [{"event_id": str(i), "event_type": event_type, "job_version": job_version} for i in range(start, start + num)]
+
+
+def test_page_and_filter(tmp_path):
+    path = tmp_path / "event_log.jsonl"
+    _write(path, _events(0, 5) + _events(5, 3, "sample_evaluation") + _events(8, 4, job_version=1))
+    index = LogIndex(path).refresh()
+    assert len(index) == 12
+
+    entries, total = index.page(1, 4)
+    assert total == 12 and [e["event_id"] for e in entries] == ["4", "5", "6", "7"]
+    entries, total = index.page(0, 3, reverse=True, event_type="generation", job_version=[1])
+    assert total == 4 and [e["event_id"] for e in entries] == ["11", "10", "9"]
+    assert index.positions(event_type="sample_evaluation") == [5, 6, 7]
+    assert index.distinct("job_version") == [0, 1]
+
+
+def test_incremental_and_persisted(tmp_path, mocker):
+    path = tmp_path / "event_log.jsonl"
+    _write(path, _events(0, 3))
+    LogIndex(path).refresh()
+    assert (tmp_path / "event_log.jsonl.idx").exists()
+
+    # appends (incl. an incomplete line) are indexed without reading the indexed part
+    with open(path, "a") as f:
+        f.write(json.dumps(_events(3, 1)[0]) + "\n" + '{"event_id": "4"')
+    index = LogIndex(path)
+    loads = mocker.spy(index.serializer, "loads")
+    index.refresh()
+    # the stored index and the new line
+    assert len(index) == 4 and loads.call_count == 2
+
+    with open(path, "a") as f:
+        f.write(', "event_type": "generation", "job_version": 0}\n')
+    assert [e["event_id"] for e in index.refresh().read([4, 0])] == ["4", "0"]
+
+
+def test_rewritten_log_is_reindexed(tmp_path):
+    path = tmp_path / "event_log.jsonl"
+    _write(path, _events(0, 4))
+    LogIndex(path).refresh()
+
+    _write(path, _events(0, 3, job_version=2) + [{"event_id": "x" * 50, "event_type": "job_update"}], mode="w")
+    index = LogIndex(path).refresh()
+    assert index.positions(job_version=2) == [0, 1, 2]
+    assert index.read([3])[0]["event_type"] == "job_update"
+
+    path.unlink()
+    assert len(LogIndex(path).refresh()) == 0
@@ -0,0 +1,135 @@
+from tests.resources.fixtures import create_job_input
+from llmp.services.job_manager import JobManager
+from llmp.services.job_storage import JobStorage
+from llmp.services.log_segments import SegmentedLog
+
+
+def _entries(start, num, timestamp):
+    return [{"event_id": str(i), "timestamp": timestamp, "input": {"i": i}} for i in range(start, start + num)]
+
+
+def test_segment_rotation(tmp_path):
+    log = SegmentedLog(tmp_path / "generation_log.jsonl", max_segment_bytes=500, compression="gzip")
+    log.append(_entries(0, 10, "20240101120000"))
+    log.append(_entries(10, 10, "20240102120000"))
+    log.append(_entries(20, 2, "20240103120000"))
+
+    segments = log.segments()
+    assert len(segments) == 2
+    assert segments[0]["count"] == 10 and segments[0]["start"] == segments[0]["end"] == "20240101120000"
+    assert all(segment["file"].endswith(".gz") for segment in segments)
+    assert [entry["input"]["i"] for entry in log] == list(range(22))
+
+    # duplicates of the active segment are skipped
+    log.append(_entries(20, 2, "20240103120000"))
+    assert len(list(log)) == 22
+
+
+def test_time_range_skips_segments(tmp_path, mocker):
+    log = SegmentedLog(tmp_path / "generation_log.jsonl", max_segment_bytes=500, compression="gzip")
+    log.append(_entries(0, 10, "20240101120000"))
+    log.append(_entries(10, 10, "20240102120000"))
+    log.append(_entries(20, 2, "20240103120000"))
+
+    iter_segment = mocker.spy(log, "_iter_segment")
+    entries = list(log.iter_entries(start="20240102000000", end="20240102235959"))
+    assert [entry["input"]["i"] for entry in entries] == list(range(10, 20))
+    assert iter_segment.call_count == 1
+
+
+def test_max_segments(tmp_path):
+    log = SegmentedLog(tmp_path / "generation_log.jsonl", max_segment_bytes=1, max_segments=2, compression="gzip")
+    for i in range(4):
+        log.append(_entries(i, 1, "20240101120000"))
+    assert [segment["file"] for segment in log.segments()] == ["segment-000002.jsonl.gz", "segment-000003.jsonl.gz"]
+    assert len(list(tmp_path.glob("generation_log_segments/segment-*"))) == 2
+
+
+def test_job_storage_generation_log_segments(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    job_manager.job_storage = JobStorage(str(tmp_path), log_segment_bytes=1, log_compression="gzip")
+    job = job_manager.create_job(**create_job_input)
+
+    for i in range(3):
+        job.generation_log.append({"event_id": str(i), "timestamp": f"2024010{i + 1}120000", "input": {}, "output": {}})
+        job_manager.store_logs(job)
+
+    assert len(job_manager.get_generation_log(job.idx)) == 3
+    assert [e["event_id"] for e in job_manager.get_generation_log(job.idx, start="20240102000000")] == ["1", "2"]
+
+
+def test_read_range_across_segments(tmp_path, mocker):
+    log = SegmentedLog(tmp_path / "generation_log.jsonl", max_segment_bytes=500, compression="gzip")
+    log.append(_entries(0, 10, "20240101120000"))
+    log.append(_entries(10, 10, "20240102120000"))
+    log.append(_entries(20, 5, "20240103120000"))
+    assert log.count() == 25
+
+    iter_segment = mocker.spy(log, "_iter_segment")
+    assert [entry["input"]["i"] for entry in log.read_range(12, 22)] == list(range(12, 22))
+    assert iter_segment.call_count == 1
+    assert [entry["input"]["i"] for entry in log.read_range(23, 40)] == [23, 24]
+    assert log.read_range(30, 40) == []
+
+    # the index of the active segment is dropped on rotation
+    assert (tmp_path / "generation_log.jsonl.idx").exists()
+    log.rotate()
+    assert not (tmp_path / "generation_log.jsonl.idx").exists()
+    assert [entry["input"]["i"] for entry in log.read_range(20, 25)] == list(range(20, 25))
+
+
+def test_update_overlay_and_compaction(tmp_path):
+    log = SegmentedLog(tmp_path / "generation_log.jsonl", max_segment_bytes=500, compression="gzip")
+    log.append(_entries(0, 10, "20240101120000"))
+    log.append(_entries(10, 3, "20240102120000"))
+    active = (tmp_path / "generation_log.jsonl").read_bytes()
+
+    log.update([{"event_id": "2", "output": {"a": 1}}, {"event_id": "11", "verified": True}])
+    log.update([{"event_id": "2", "verified": True}])
+    # the log itself is not rewritten
+    assert (tmp_path / "generation_log.jsonl").read_bytes() == active
+    entries = {entry["event_id"]: entry for entry in log}
+    assert entries["2"] == {**_entries(2, 1, "20240101120000")[0], "output": {"a": 1}, "verified": True}
+    assert entries["11"]["verified"] and entries["11"]["input"] == {"i": 11}
+    assert [entry.get("verified") for entry in log.read_range(1, 3)] == [None, True]
+
+    log.compact()
+    assert not log.updates_path.exists()
+    assert {entry["event_id"]: entry for entry in log} == entries
+    assert log.segments()[0]["count"] == 10
+
+
+def test_compaction_of_active_segment_resets_index(tmp_path):
+    log = SegmentedLog(tmp_path / "generation_log.jsonl")
+    log.append(_entries(0, 5, "20240101120000"))
+    assert len(log.read_range(0, 5)) == 5
+
+    log.update([{"event_id": "1", "output": {"text": "a much longer corrected output"}}])
+    log.compact()
+    assert not (tmp_path / "generation_log.jsonl.idx").exists()
+    assert [entry["event_id"] for entry in log.read_range(0, 5)] == [str(i) for i in range(5)]
+    assert log.read_range(1, 2)[0]["output"] == {"text": "a much longer corrected output"}
+
+
+def test_update_overlay_is_compacted_when_due(tmp_path):
+    log = SegmentedLog(tmp_path / "generation_log.jsonl", max_update_bytes=100, compression="gzip")
+    log.append(_entries(0, 3, "20240101120000"))
+    log.update([{"event_id": "0", "verified": True}])
+    assert log.updates_path.exists()
+    log.update([{"event_id": str(i), "output": {"text": "corrected"}} for i in range(3)])
+    assert not log.updates_path.exists()
+    assert [entry["output"] for entry in log] == [{"text": "corrected"}] * 3
+    assert next(iter(log))["verified"]
+
+
+def test_job_storage_update_generation_log(tmp_path, create_job_input):
+    for storage_backend in ["file", "sqlite"]:
+        job_manager = JobManager(str(tmp_path / storage_backend), storage_backend=storage_backend)
+        job = job_manager.create_job(**create_job_input)
+        job.generation_log.append({"event_id": "0", "timestamp": "20240101120000", "input": {}, "output": {"a": 0}})
+        job_manager.store_logs(job)
+
+        job_manager.update_generation_log(job.idx, [{"event_id": "0", "output": {"a": 1}, "verified": True}])
+        assert job_manager.get_generation_log(job.idx) == [
+            {"event_id": "0", "timestamp": "20240101120000", "input": {}, "output": {"a": 1}, "verified": True}
+        ]
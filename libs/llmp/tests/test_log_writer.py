@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.resources.fixtures import create_job_input
+from llmp.data_model.events import Event
+from llmp.services.job_manager import JobManager
+from llmp.types import EventType
+
+
+def test_background_log_writer(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path))
+    job = job_manager.create_job(**create_job_input)
+    event_log = job_manager.get_event_log(job.idx)
+
+    for _ in range(10):
+        job.log_event(Event(event_type=EventType.SAMPLE_EVAL))
+        job_manager.store_logs(job)
+    assert job.event_log == []
+
+    assert job_manager.flush_logs(timeout=5)
+    assert len(job_manager.job_storage.load_event_log(job)) == len(event_log) + 10
+
+    metrics = job_manager.log_writer.metrics()
+    assert metrics["submitted"] == 10
+    assert metrics["written"] == 10
+    assert metrics["write_errors"] == 0
+    job_manager.log_writer.close()
+
+
+def test_log_writer_after_close(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path))
+    job = job_manager.create_job(**create_job_input)
+    job_manager.log_writer.close()
+
+    # after close logs are written synchronously
+    job.log_event(Event(event_type=EventType.SAMPLE_EVAL))
+    job_manager.store_logs(job)
+    assert job.event_log == []
+    assert any(event.event_type == EventType.SAMPLE_EVAL for event in job_manager.get_event_log(job.idx))
+
+
+def test_log_buffer_spills_to_storage(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path), background_logging=False, max_buffered_logs=5)
+    job = job_manager.create_job(**create_job_input)
+    event_log = job_manager.get_event_log(job.idx)
+
+    for _ in range(12):
+        errors = [ValueError(f"e{i}") for i in range(20)]
+        job.log_event(Event(event_type=EventType.SAMPLE_EVAL, event_metrics={"errors": errors}))
+        assert len(job.event_log) < 5
+
+    stored_events = job_manager.get_event_log(job.idx)
+    assert len(stored_events) + len(job.event_log) == len(event_log) + 12
+    assert stored_events[-1].event_metrics == {
+        "errors": [f"e{i}" for i in range(15, 20)], "num_errors": 20, "errors_ref": "event_errors"
+    }
+    # the full error list is kept in the error log
+    errors = job_manager.get_event_errors(job.idx, stored_events[-1].event_id)
+    assert errors == [f"e{i}" for i in range(20)]
+
+
+def test_log_writer_shared_per_storage(tmp_path):
+    job_manager = JobManager(str(tmp_path))
+    other_job_manager = JobManager(str(tmp_path))
+    assert other_job_manager.log_writer is job_manager.log_writer
+    assert JobManager(str(tmp_path / "other")).log_writer is not job_manager.log_writer
+
+    log_writer = job_manager.log_writer
+    job_manager.close()
+    assert log_writer._thread.is_alive()
+    other_job_manager.close()
+    assert not log_writer._thread.is_alive()
+    assert JobManager(str(tmp_path)).log_writer is not log_writer
+
+
+def test_log_writer_retries_failed_writes(tmp_path, create_job_input, mocker):
+    job_manager = JobManager(str(tmp_path))
+    job = job_manager.create_job(**create_job_input)
+    assert job_manager.flush_logs(timeout=5)
+    event_log = job_manager.get_event_log(job.idx)
+
+    store_logs = job_manager.job_storage.store_logs
+    failures = [OSError("disk full")]
+
+    def fail_once(batch):
+        if failures:
+            raise failures.pop()
+        store_logs(batch)
+
+    mocker.patch.object(job_manager.job_storage, "store_logs", side_effect=fail_once)
+    job.log_event(Event(event_type=EventType.SAMPLE_EVAL))
+    job_manager.store_logs(job)
+    job_manager.close()
+
+    assert len(job_manager.job_storage.load_event_log(job)) == len(event_log) + 1
+
+
+def test_log_writer_concurrent_logging(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path))
+    job = job_manager.create_job(**create_job_input)
+    assert job_manager.flush_logs(timeout=5)
+    event_log = job_manager.get_event_log(job.idx)
+
+    def log_events(_):
+        for _ in range(50):
+            job.log_event(Event(event_type=EventType.SAMPLE_EVAL))
+            job_manager.store_logs(job)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(log_events, range(4)))
+    job_manager.store_logs(job)
+    job_manager.close()
+    assert len(job_manager.job_storage.load_event_log(job)) == len(event_log) + 200
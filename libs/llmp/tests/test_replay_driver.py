@@ -0,0 +1,141 @@
+import time
+from typing import Literal
+from unittest import mock
+
+import pytest
+from structgenie.pydantic_v1 import BaseModel
+
+from llmp.data_model.job_record import use_driver
+from llmp.integration.fake_driver import FakeDriver
+from llmp.integration.replay_driver import (
+    RecordingDriver,
+    ReplayArchive,
+    ReplayDriver,
+    ReplayMissError,
+    render_messages,
+)
+from llmp.services.job_manager import JobManager
+
+PROMPT = """<%system%>
+Classify the sentiment.
+</%system%>
+<%user%>
+Text: {text}
+</%user%>"""
+
+
+def retry_prompt(error: str) -> str:
+    # the engine adds the remarks of a retry to the prompt template
+    return PROMPT + f"""
+<%last_output%>
+Mood: negative
+</%last_output%>
+<%user_error%>
+{error}
+</%user_error%>"""
+
+
+class Input(BaseModel):
+    text: str
+
+
+class Output(BaseModel):
+    sentiment: Literal["positive", "negative"]
+
+
+@pytest.fixture(autouse=True)
+def offline_token_count():
+    with mock.patch("structgenie.base.count_tokens", return_value=10), \
+            mock.patch("structgenie.utils.helper.count_tokens", return_value=10):
+        yield
+
+
+def test_record_and_replay(tmp_path):
+    archive_path = tmp_path / "traffic.jsonl.gz"
+    fake = FakeDriver.configure(responses=["a", "b", "c"], latency=0.02)
+
+    with ReplayArchive(archive_path, flush_every=2) as archive:
+        recorder = RecordingDriver.wrap(fake, archive)
+        executor = recorder.load_driver(PROMPT, model_name="gpt-3.5-turbo", temperature=0.9)
+        assert executor.predict(text="x") == "a"
+        assert executor.predict(text="x") == "b"
+        assert executor.predict_and_measure(text="y")[0] == "c"
+
+    archive = ReplayArchive(archive_path)
+    assert len(archive) == 3
+    # the system message is stored once
+    assert len(archive._contents) == 3
+
+    replay = ReplayDriver.configure(archive).load_driver(PROMPT, model_name="gpt-3.5-turbo", temperature=0.9)
+    assert [replay.predict(text="x") for _ in range(3)] == ["a", "b", "a"]
+    text, metrics = replay.predict_and_measure(text="y")
+    assert text == "c"
+    assert metrics["model_name"] == "gpt-3.5-turbo"
+    assert fake.script.num_calls == 3
+
+    with pytest.raises(ReplayMissError):
+        replay.predict(text="z")
+    with pytest.raises(ReplayMissError):
+        ReplayDriver.configure(archive).load_driver(PROMPT, model_name="gpt-4", temperature=0.9).predict(text="y")
+
+
+def test_replay_timing(tmp_path):
+    archive = ReplayArchive(tmp_path / "traffic.jsonl.gz")
+    RecordingDriver.wrap(FakeDriver.configure(responses=["a"], latency=0.05), archive).load_driver(PROMPT).predict(
+        text="x"
+    )
+
+    start = time.perf_counter()
+    ReplayDriver.configure(archive).load_driver(PROMPT).predict(text="x")
+    assert time.perf_counter() - start < 0.05
+
+    replay = ReplayDriver.configure(archive, timing="original").load_driver(PROMPT)
+    _, metrics = replay.predict_and_measure(text="x")
+    assert metrics["execution_time"] >= 0.05
+
+
+def test_fuzzy_retry_match(tmp_path):
+    archive = ReplayArchive(tmp_path / "traffic.jsonl.gz")
+    recorder = RecordingDriver.wrap(FakeDriver.configure(responses=["Sentiment: negative"]), archive)
+    recorder.load_driver(retry_prompt("Key 'sentiment' missing in output.")).predict(text="bad")
+
+    replay = ReplayDriver.configure(archive)
+    executor = replay.load_driver(retry_prompt("Key 'sentiment' is missing in the output."))
+    assert executor.predict(text="bad") == "Sentiment: negative"
+
+    # only retries of the same request are matched
+    with pytest.raises(ReplayMissError):
+        replay.load_driver(retry_prompt("Key 'sentiment' missing in output.")).predict(text="good")
+    with pytest.raises(ReplayMissError):
+        ReplayDriver.configure(archive, min_similarity=0.9).load_driver(
+            retry_prompt("Unknown value 'neutral'.")
+        ).predict(text="bad")
+
+
+def test_render_messages():
+    messages = render_messages(retry_prompt("Key {sentiment} missing"), text="bad")
+    assert [message["role"] for message in messages] == ["system", "user", "assistant", "user"]
+    assert messages[1]["content"] == "Text: bad"
+    assert messages[3]["content"] == "Key {sentiment} missing"
+    assert render_messages("Text: {text}", text="bad") == [{"role": "user", "content": "Text: bad"}]
+
+
+def test_replay_generations(tmp_path):
+    job_manager = JobManager(str(tmp_path / "jobs"), background_logging=False)
+    job = job_manager.create_job(
+        "replay",
+        instruction="Classify the sentiment of the text.",
+        input_examples=[Input(text="great")],
+        output_examples=[Output(sentiment="positive")],
+    )
+    archive = ReplayArchive(tmp_path / "traffic.jsonl.gz")
+    fake = FakeDriver.configure(responses=["Mood: negative", "Sentiment: negative", "Sentiment: positive"])
+
+    with use_driver(RecordingDriver.wrap(fake, archive)):
+        recorded = [job_manager.generate_output(job, {"text": text})[0] for text in ("bad", "fine")]
+    assert fake.script.num_calls == 3
+
+    with use_driver(ReplayDriver.configure(archive)):
+        replayed = [job_manager.generate_output(job, {"text": text})[0] for text in ("bad", "fine")]
+    assert replayed == recorded
+    assert fake.script.num_calls == 3
@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from tests.resources.fixtures import create_job_input
+from llmp.components.evaluation import metrics
+from llmp.components.evaluation.engine import EvaluationEngine
+from llmp.components.evaluation.run_metrics import RunMetrics
+from llmp.components.generator.verification import _merge_metrics
+from llmp.services.job_manager import JobManager
+from llmp.utils.stats import group_percentiles
+
+
+def _run(execution_time, failure_rate=0, token_usage=100, errors=None):
+    return dict(
+        execution_time=execution_time,
+        failure_rate=failure_rate,
+        token_usage=token_usage,
+        model_name="gpt-4",
+        model_config={"temperature": 0.5},
+        errors=errors or [],
+    )
+
+
+def test_add_runs_grows():
+    run_metrics = RunMetrics(capacity=2)
+    assert run_metrics.add_runs([_run(1), _run(2), _run(3)], setting={"a": 1}, accuracy=[1, 0, 1]) == range(0, 3)
+    assert run_metrics.add(_run(4, errors=["timeout"]), setting={"a": 2}, sample=1) == 3
+    assert len(run_metrics) == 4
+    assert list(run_metrics.records.execution_time) == [1, 2, 3, 4]
+    assert list(run_metrics.records.setting) == [0, 0, 0, 1]
+    assert np.isnan(run_metrics.records.accuracy[3])
+    assert run_metrics.errors == {3: ["timeout"]}
+    assert run_metrics.setting_id({"a": 1}) == 0
+
+
+def test_extend():
+    run_metrics = RunMetrics()
+    run_metrics.add_runs([_run(1)], setting="b")
+    other = RunMetrics()
+    other.add_runs([_run(2), _run(3, errors=["x"])], setting="a", sample=1, accuracy=[1, 0])
+    other.add(_run(4), setting="b")
+
+    assert run_metrics.extend(other) == range(1, 4)
+    assert run_metrics.settings == ["b", "a"]
+    assert list(run_metrics.records.setting) == [0, 1, 1, 0]
+    assert list(run_metrics.records.execution_time) == [1, 2, 3, 4]
+    assert list(run_metrics.records.sample) == [0, 1, 1, 0]
+    assert run_metrics.errors == {2: ["x"]}
+    assert run_metrics.extend(RunMetrics()) == range(4, 4)
+
+
+def test_evaluate_summarizes_each_call(tmp_path, create_job_input, mocker):
+    job = JobManager(str(tmp_path), background_logging=False).create_job(**create_job_input)
+    job.is_explicit = True
+    records = job.example_records[:1]
+    generator = mocker.patch("llmp.components.evaluation.engine.SequentialAsyncGenerator")
+    run_metrics = RunMetrics()
+    engine = EvaluationEngine(job, num_runs=2, run_metrics=run_metrics)
+
+    generator.return_value.generate.return_value = [[(records[0].output, _run(1)), (records[0].output, _run(3))]]
+    assert engine.evaluate(records)["execution_time"] == 2.0
+    generator.return_value.generate.return_value = [[({}, _run(5)), ({}, _run(7))]]
+    summary = engine.evaluate(records)
+    assert (summary["execution_time"], summary["accuracy"], summary["num_runs"]) == (6.0, 0.0, 2)
+
+    summary = EvaluationEngine(job, num_runs=2, run_metrics=run_metrics).evaluate(records, {"instruction": "other"})
+    assert (summary["execution_time"], summary["num_runs"]) == (6.0, 2)
+    assert [stats["count"] for stats in run_metrics.stats().values()] == [4, 2]
+
+
+def test_summaries_match_legacy_metrics():
+    settings = {"example_ids": ["a", "b"]}
+    samples = [
+        ([_run(1, errors=["x"]), _run(3, failure_rate=1)], [1, 0]),
+        ([_run(2, token_usage=50), _run(4), _run(6)], [1, 1, 0]),
+    ]
+    run_metrics = RunMetrics()
+    for sample, (runs, accuracy) in enumerate(samples):
+        run_metrics.add_runs(runs, setting=settings, sample=sample, accuracy=accuracy)
+    run_metrics.add_runs([_run(100)], setting={"other": 1}, accuracy=[0])
+
+    legacy = [
+        {
+            "accuracy": float(np.mean(accuracy)),
+            "execution_time": metrics.avg_efficiency(runs),
+            "failure_rate": metrics.avg_failure_rate(runs),
+            "token_usage": metrics.avg_token_usage(runs),
+            "num_runs": len(runs),
+            "model_name": "gpt-4",
+            "model_config": {"temperature": 0.5},
+            "errors": [e for m in runs for e in m["errors"]],
+        }
+        for runs, accuracy in samples
+    ]
+    assert run_metrics.sample_summaries(settings) == pytest.approx(legacy)
+
+    summary = run_metrics.setting_summary(settings)
+    assert summary["accuracy"] == pytest.approx(metrics.avg_accuracy(legacy))
+    assert summary["execution_time"] == pytest.approx(3.0)
+    assert summary["num_runs"] == metrics.avg_num_runs(legacy) == 2.5
+    assert summary["errors"] == ["x"]
+
+
+def test_stats():
+    rng = np.random.default_rng(0)
+    values = rng.normal(10, 2, size=200)
+    run_metrics = RunMetrics()
+    run_metrics.add_runs([_run(v) for v in values[:150]], setting="a", accuracy=1.0)
+    run_metrics.add_runs([_run(v) for v in values[150:]], setting="b", sample=1)
+
+    stats = run_metrics.stats(percentiles=(5, 50, 95))
+    assert stats["a"]["count"] == 150 and stats["b"]["count"] == 50
+    execution_time = stats["a"]["execution_time"]
+    assert execution_time["mean"] == pytest.approx(values[:150].mean())
+    assert execution_time["var"] == pytest.approx(values[:150].var(ddof=1))
+    for p in (5, 50, 95):
+        assert execution_time[f"p{p}"] == pytest.approx(np.percentile(values[:150], p))
+    margin = 1.959964 * values[:150].std(ddof=1) / np.sqrt(150)
+    assert execution_time["ci_low"] == pytest.approx(values[:150].mean() - margin)
+    assert execution_time["ci_high"] == pytest.approx(values[:150].mean() + margin)
+    assert stats["a"]["accuracy"]["mean"] == 1.0 and stats["a"]["accuracy"]["var"] == 0.0
+    assert stats["b"]["accuracy"] == dict(
+        mean=None, var=None, p5=None, p50=None, p95=None, ci_low=None, ci_high=None
+    )
+
+    assert list(run_metrics.stats(by="sample", fields=["token_usage"])) == [0, 1]
+    with pytest.raises(ValueError):
+        run_metrics.stats(by="model")
+
+
+def test_group_percentiles():
+    values = np.array([5.0, 1.0, np.nan, 3.0, 2.0, 7.0])
+    groups = np.array([0, 0, 0, 2, 2, 2])
+    result = group_percentiles(values, groups, 3, (0, 25, 100))
+    assert np.allclose(result[0], np.percentile([1, 5], (0, 25, 100)))
+    assert np.isnan(result[1]).all()
+    assert np.allclose(result[2], np.percentile([3, 2, 7], (0, 25, 100)))
+
+
+def test_merge_metrics():
+    merged = _merge_metrics([_run(1, errors=["x"]), _run(2, failure_rate=1)])
+    assert merged == dict(
+        execution_time=1.5,
+        failure_rate=0.5,
+        token_usage=100.0,
+        num_runs=2,
+        model_name="gpt-4",
+        model_config={"temperature": 0.5},
+        errors=["x"],
+    )
+
+
+def test_explicit_accuracy():
+    outputs = [{"a": 1}, {"a": 2}, {"a": 1}, {"a": 1}]
+    assert list(metrics.explicit_matches(outputs, {"a": 1})) == [1, 0, 1, 1]
+    assert metrics.explicit_accuracy(outputs, {"a": 1}) == 0.75
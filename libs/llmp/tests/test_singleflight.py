@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llmp.services.job_manager import JobManager
+from llmp.utils.singleflight import SingleFlight, coalescing_key
+
+
+class Job:
+    idx = "job"
+    version = 0
+
+
+def test_coalescing_key():
+    assert coalescing_key(Job, {"a": 1, "b": 2}) == coalescing_key(Job, {"b": 2, "a": 1})
+    assert coalescing_key(Job, {"a": 1}) != coalescing_key(Job, {"a": 1}, generator_type="consensus")
+
+
+def test_singleflight_sync():
+    single_flight = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def generate():
+        with lock:
+            calls.append(1)
+        time.sleep(0.2)
+        return {"genre": "fantasy"}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: single_flight.do("key", generate), range(5)))
+
+    assert len(calls) == 1
+    assert results == [{"genre": "fantasy"}] * 5
+    assert single_flight.in_flight() == 0
+
+
+def test_singleflight_async():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"genre": "fantasy"}
+
+    async def run():
+        return await asyncio.gather(*[single_flight.do_async("key", generate) for _ in range(5)])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{"genre": "fantasy"}] * 5
+
+
+def test_async_generation_rejects_unsupported_generator(tmp_path):
+    job_manager = JobManager(str(tmp_path), background_logging=False)
+    with pytest.raises(NotImplementedError):
+        asyncio.run(job_manager.generate_output_async(Job, {"a": 1}, generator_type="consensus"))
@@ -0,0 +1,65 @@
+from tests.resources.fixtures import create_job_input
+from llmp.data_model.events import Event
+from llmp.services.job_manager import JobManager
+from llmp.services import sqlite_storage
+from llmp.services.sqlite_storage import migrate_directory_storage
+from llmp.types import EventType
+
+
+def test_sqlite_job_storage(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path), storage_backend="sqlite")
+    job = job_manager.create_job(**create_job_input)
+
+    loaded_job = job_manager.get_job(name=job.job_name)
+    assert loaded_job.idx == job.idx
+    assert len(loaded_job.example_records) == len(job.example_records)
+
+    event_log = job_manager.get_event_log(job.idx)
+    job.log_event(Event(event_type=EventType.EVAL_RUN))
+    job_manager.update_job(job)
+    job_manager.update_job(job)
+    assert len(job_manager.get_event_log(job.idx)) == len(event_log) + 1
+
+    job_manager.delete_job(job.idx)
+    assert not job_manager.job_storage.key_in_registry(job.job_name)
+
+
+def test_migrate_directory_storage(tmp_path, create_job_input):
+    job = JobManager(str(tmp_path)).create_job(**create_job_input)
+    event_log = JobManager(str(tmp_path)).get_event_log(job.idx)
+
+    storage = migrate_directory_storage(str(tmp_path))
+    loaded_job = storage.get(io_hash=job.io_hash)
+    assert loaded_job.idx == job.idx
+    assert len(storage.load_event_log(loaded_job)) == len(event_log)
+
+    # re-running the migration does not duplicate logs
+    storage = migrate_directory_storage(str(tmp_path))
+    assert len(storage.load_event_log(loaded_job)) == len(event_log)
+
+
+def test_store_events_in_chunks(tmp_path, create_job_input, monkeypatch):
+    monkeypatch.setattr(sqlite_storage, "MAX_VARIABLES", 2)
+    job_manager = JobManager(str(tmp_path), storage_backend="sqlite", background_logging=False)
+    job = job_manager.create_job(**create_job_input)
+    num_events = len(job_manager.get_event_log(job.idx))
+
+    events = [Event(event_type=EventType.GENERATION, event_metrics={"token_usage": 10}) for _ in range(5)]
+    job.event_log = list(events)
+    job_manager.update_job(job)
+    job.event_log = events[:3] + [Event(event_type=EventType.GENERATION, event_metrics={"token_usage": 10})]
+    job_manager.update_job(job)
+
+    assert len(job_manager.get_event_log(job.idx)) == num_events + 6
+    assert job_manager.get_job_metrics(job.idx)["count"] == 6
+
+
+def test_sqlite_event_errors(tmp_path, create_job_input):
+    job = JobManager(str(tmp_path), background_logging=False).create_job(**create_job_input)
+    event = Event(event_type=EventType.SAMPLE_EVAL, event_metrics={"errors": [f"e{i}" for i in range(8)]})
+    job.log_event(event)
+    JobManager(str(tmp_path), background_logging=False).store_logs(job)
+
+    storage = migrate_directory_storage(str(tmp_path))
+    loaded_job = storage.get(idx=job.idx)
+    assert storage.load_event_errors(loaded_job) == {event.event_id: [f"e{i}" for i in range(8)]}
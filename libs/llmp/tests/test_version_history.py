@@ -0,0 +1,83 @@
+import pytest
+
+from tests.resources.fixtures import create_job_input
+from llmp.data_model import JobRecord, ExampleRecord
+from llmp.data_model.version_history import CHECKPOINT_INTERVAL, state_at
+from llmp.integration.structgenie import InputModel, OutputModel, Example
+from llmp.services.job_manager import JobManager
+
+
+def _record(i):
+    return ExampleRecord(example=Example(input={"i": i}, output={"o": i}))
+
+
+@pytest.fixture
+def job():
+    return JobRecord(
+        input_model=InputModel(),
+        output_model=OutputModel(),
+        example_records=[_record(0), _record(1)],
+        instruction="v0",
+        config={"model": "a"},
+    )
+
+
+def test_add_version_stores_deltas(job):
+    removed, kept = job.example_records
+    added = _record(2)
+    job.add_version("v1", [kept, added])
+
+    base, entry = job.version_history
+    assert base["version"] == 0 and base["delta"] is None and base["checkpoint"]["instruction"] == "v0"
+    assert entry["version"] == 1
+    assert entry["delta"]["instruction"] == ["v0", "v1"]
+    assert entry["delta"]["examples"] == {"added": [added.idx], "removed": [removed.idx]}
+    assert set(entry["delta"]["records"]) == {added.idx, removed.idx}
+    assert "checkpoint" not in entry
+
+
+def test_rollback_and_diff(job):
+    records = list(job.example_records)
+    job.add_version("v1", records[1:])
+    job.add_version("v2", records[1:] + [_record(2)], config={"model": "b"})
+
+    assert job.diff_versions(0, 2) == {
+        "instruction": ["v0", "v2"],
+        "examples": {"added": [job.example_records[-1].idx], "removed": [records[0].idx]},
+        "config": {"model": {"old": "a", "new": "b"}},
+    }
+
+    job.rollback(0)
+    assert job.version == 3
+    assert job.version_history[-1]["rollback_to"] == 0
+    assert job.instruction == "v0"
+    assert job.config == {"model": "a"}
+    assert sorted(record.idx for record in job.example_records) == sorted(record.idx for record in records)
+    assert job.diff_versions(0, 3) == {}
+
+    with pytest.raises(ValueError):
+        job.rollback(3)
+
+
+def test_checkpoints(job):
+    for v in range(1, CHECKPOINT_INTERVAL + 3):
+        job.add_version(f"v{v}", job.example_records)
+    assert "checkpoint" in job.version_history[CHECKPOINT_INTERVAL]
+    assert state_at(job.version_history, CHECKPOINT_INTERVAL + 1)["instruction"] == f"v{CHECKPOINT_INTERVAL + 1}"
+
+
+def test_version_history_storage(tmp_path, create_job_input):
+    job_manager = JobManager(str(tmp_path))
+    job = job_manager.create_job(**create_job_input)
+    instruction = job.instruction
+
+    job.add_version("new instruction", job.example_records[1:])
+    job_manager.update_job(job)
+    job_manager.update_job(job)
+    assert len(job_manager.job_storage.load_version_history(job)) == 2
+
+    job = job_manager.rollback_job(job.idx, 0)
+    assert job.instruction == instruction
+    assert len(job_manager.get_job(idx=job.idx).example_records) == len(create_job_input["input_examples"])
+    assert len(job_manager.job_storage.load_version_history(job)) == 3
+    assert job_manager.diff_job_versions(job.idx, 1, 2)["instruction"] == ["new instruction", instruction]
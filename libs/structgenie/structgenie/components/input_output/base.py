@@ -91,6 +91,13 @@ class IOModel(BaseIOModel):
             return [attribute for attribute in self.lines if attribute.key.startswith(f"{key}.")]
         return [attribute for attribute in self.lines if attribute.key.startswith(key)]
 
+    def partial(self, keys: list[str]) -> "IOModel":
+        """Return a sub model containing only the given top level keys and their nested attributes."""
+        return self.__class__(lines=[
+            attribute for attribute in self.lines
+            if attribute.key in keys or any(attribute.key.startswith(f"{key}.") for key in keys)
+        ])
+
     def get_default(self, key: str, **kwargs):
         attr = self.get(key)
         if attr:
@@ -1,8 +1,9 @@
 import re
 
 from structgenie.components.input_output import OutputModel
-from structgenie.errors import ParsingPartialError, ParsingFixingError, MultilineParsingError
+from structgenie.errors import ParsingPartialError, ParsingFixingError, MultilineParsingError, DeadlineExceededError
 from structgenie.utils.parsing import parse_multi_line_string, format_as_key, parse_yaml_string
+from structgenie.utils.tracing import current_tracer
 
 
 def fix_multiline_output(text: str, output_model) -> dict:
@@ -57,15 +58,10 @@ def fix_split_output(text: str, output_model: OutputModel) -> dict:
 def llm_output_fixing_partial(error_msg: str, key: str, output_model: OutputModel, debug: bool = False) -> dict:
     from structgenie.engine import StructEngine
 
-    partial_output_model = OutputModel(lines=[
-        line for line in output_model.lines if line.key == key or line.key.startswith(f"{key}.")
-    ])
-
-    engine = StructEngine.from_defaults("fix_partial_parsing", output_model=partial_output_model, debug=debug)
-    engine.fix_parsing_by_llm = False
-    engine.return_metrics = True
+    engine = _partial_fixing_engine(StructEngine, key, output_model, debug)
     try:
-        return engine.run(inputs=dict(error_str=error_msg))
+        with current_tracer().span("fix_parsing_partial", key=key):
+            return engine.run(inputs=dict(error_str=error_msg))
     except Exception as e:
         raise ParsingFixingError(f"Error while fixing partial parsing error for key '{key}'. Error: {e}")
 
@@ -73,11 +69,48 @@ def llm_output_fixing_partial(error_msg: str, key: str, output_model: OutputMode
 def llm_output_fixing(text: str, output_model: OutputModel, debug: bool = False) -> dict:
     from structgenie.engine import StructEngine
 
-    fixing_engine = StructEngine.from_defaults("fix_parsing_error", output_model=output_model, debug=debug)
-    fixing_engine.fix_parsing_by_llm = False
-    fixing_engine.return_metrics = True
+    fixing_engine = _fixing_engine(StructEngine, "fix_parsing_error", output_model, debug)
+    try:
+        with current_tracer().span("fix_parsing"):
+            return fixing_engine.run(inputs=dict(last_output=text))
+    except Exception as e:
+        raise ParsingFixingError(f"Error while fixing parsing by llm error: {e}")
+
+
+async def llm_output_fixing_partial_async(error_msg: str, key: str, output_model: OutputModel, debug: bool = False):
+    """Fix a partial parsing error with an AsyncEngine, which keeps the deadline of the calling run."""
+    from structgenie.engine.async_engine import AsyncEngine
+
+    engine = _partial_fixing_engine(AsyncEngine, key, output_model, debug)
+    try:
+        with current_tracer().span("fix_parsing_partial", key=key):
+            return await engine.run(inputs=dict(error_str=error_msg))
+    except DeadlineExceededError as e:
+        raise e
+    except Exception as e:
+        raise ParsingFixingError(f"Error while fixing partial parsing error for key '{key}'. Error: {e}")
+
 
+async def llm_output_fixing_async(text: str, output_model: OutputModel, debug: bool = False):
+    """Fix a parsing error with an AsyncEngine, which keeps the deadline of the calling run."""
+    from structgenie.engine.async_engine import AsyncEngine
+
+    fixing_engine = _fixing_engine(AsyncEngine, "fix_parsing_error", output_model, debug)
     try:
-        return fixing_engine.run(inputs=dict(last_output=text))
+        with current_tracer().span("fix_parsing"):
+            return await fixing_engine.run(inputs=dict(last_output=text))
+    except DeadlineExceededError as e:
+        raise e
     except Exception as e:
         raise ParsingFixingError(f"Error while fixing parsing by llm error: {e}")
+
+
+def _partial_fixing_engine(engine_cls, key: str, output_model: OutputModel, debug: bool = False):
+    return _fixing_engine(engine_cls, "fix_partial_parsing", output_model.partial([key]), debug)
+
+
+def _fixing_engine(engine_cls, template_name: str, output_model: OutputModel, debug: bool = False):
+    engine = engine_cls.from_defaults(template_name, output_model=output_model, debug=debug)
+    engine.fix_parsing_by_llm = False
+    engine.return_metrics = True
+    return engine
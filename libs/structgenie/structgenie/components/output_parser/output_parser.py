@@ -1,7 +1,7 @@
 from structgenie.components.input_output import OutputModel
 from structgenie.components.output_parser.fixing import fix_multiline_output, fix_split_output, \
-    llm_output_fixing_partial, llm_output_fixing
-from structgenie.errors import ParsingPartialError, MultilineParsingError, YamlParsingError
+    llm_output_fixing_partial, llm_output_fixing, llm_output_fixing_partial_async, llm_output_fixing_async
+from structgenie.errors import ParsingPartialError, MultilineParsingError, YamlParsingError, DeadlineExceededError
 from structgenie.utils.operator.default import parse_default
 from structgenie.utils.parsing import parse_yaml_string, format_as_key
 
@@ -20,8 +20,16 @@ class OutputParser:
         self.debug = debug
 
     def parse(self, text: str, inputs: dict) -> tuple[dict, list, list]:
+        return self._finish(self.parse_to_dict(text), inputs)
 
-        output = self.parse_to_dict(text)
+    async def parse_async(self, text: str, inputs: dict) -> tuple[dict, list, list]:
+        """Parse like `parse`, but run the llm fixing calls on awaited AsyncEngines.
+
+        The fixing calls keep the deadline of the calling AsyncEngine run and are cancelled with it.
+        """
+        return self._finish(await self.parse_to_dict_async(text), inputs)
+
+    def _finish(self, output: dict, inputs: dict) -> tuple[dict, list, list]:
         output = self._prefix_output(output)
         output = self._parse_defaults(output, inputs)
 
@@ -48,6 +56,19 @@ class OutputParser:
             except Exception as e:
                 self.error_log.append(YamlParsingError(str(e)))
 
+    async def parse_to_dict_async(self, text: str) -> dict:
+        """Parse the generation text output into a dict structure. (async)"""
+        try:
+            return parse_yaml_string(text)
+        except Exception as e:
+            self._debug("Yaml parsing error", str(e))
+            try:
+                return await self.fixing_parser_async(text)
+            except DeadlineExceededError as e:
+                raise e
+            except Exception as e:
+                self.error_log.append(YamlParsingError(str(e)))
+
     def fixing_parser(self, text: str) -> dict:
         try:
             return self._fixing_parser(text)
@@ -59,8 +80,41 @@ class OutputParser:
                 self.run_metrics.append(run_metrics)
                 return output
 
+    async def fixing_parser_async(self, text: str) -> dict:
+        try:
+            return await self._fixing_parser_async(text)
+        except DeadlineExceededError as e:
+            raise e
+        except Exception as e:
+            self._debug("Fixing failed", str(e))
+            if self.fix_by_llm:
+                self._debug("Fixing failed", "Try LLM parsing")
+                output, run_metrics = await llm_output_fixing_async(text, self.output_model, debug=self.debug)
+                self.run_metrics.append(run_metrics)
+                return output
+
     def _fixing_parser(self, text: str) -> dict:
         """Run fixing logic to fix parsing error."""
+        output = self._fix_output(text)
+        for key in self._failed_keys(output):
+            _value, _run_metrics = llm_output_fixing_partial(str(output[key]), key, self.output_model,
+                                                             debug=self.debug)
+            self.run_metrics.append(_run_metrics)
+            output[key] = _value[key]
+        return output
+
+    async def _fixing_parser_async(self, text: str) -> dict:
+        """Run fixing logic to fix parsing error. (async)"""
+        output = self._fix_output(text)
+        for key in self._failed_keys(output):
+            _value, _run_metrics = await llm_output_fixing_partial_async(str(output[key]), key, self.output_model,
+                                                                         debug=self.debug)
+            self.run_metrics.append(_run_metrics)
+            output[key] = _value[key]
+        return output
+
+    def _fix_output(self, text: str) -> dict:
+        """Fix the output without llm calls, by multiline parsing or else by split partial parsing."""
 
         if any(line.multiline for line in self.output_model.lines):
             self._debug(
@@ -79,28 +133,27 @@ class OutputParser:
             "Split Partial Parsing",
             "Try Split Partial parsing"
         )
-
-        if any(isinstance(value, ParsingPartialError) for value in output.values()):
-            for key, value in output.items():
-                if isinstance(value, ParsingPartialError):
-                    self._debug(
-                        "Split Partial Parsing",
-                        f"ParsingPartialError for '{format_as_key(key)}'"
-                    )
-                    self.error_log.append(value)
-                    if self.fix_partial_by_llm:
-                        self._debug(
-                            "Split Partial Parsing",
-                            f"Try LLM Partial parsing for '{format_as_key(key)}'"
-                        )
-                        _value, _run_metrics = llm_output_fixing_partial(str(value), key, self.output_model,
-                                                                         debug=self.debug)
-                        self.run_metrics.append(_run_metrics)
-                        output[key] = _value[key]
-                    else:
-                        raise ParsingPartialError(f"Error while parsing output for key '{format_as_key(key)}'.")
         return output
 
+    def _failed_keys(self, output: dict) -> list[str]:
+        """Log the partial parsing errors of the output and return the keys to fix by llm."""
+        failed_keys = []
+        for key, value in output.items():
+            if isinstance(value, ParsingPartialError):
+                self._debug(
+                    "Split Partial Parsing",
+                    f"ParsingPartialError for '{format_as_key(key)}'"
+                )
+                self.error_log.append(value)
+                if not self.fix_partial_by_llm:
+                    raise ParsingPartialError(f"Error while parsing output for key '{format_as_key(key)}'.")
+                self._debug(
+                    "Split Partial Parsing",
+                    f"Try LLM Partial parsing for '{format_as_key(key)}'"
+                )
+                failed_keys.append(key)
+        return failed_keys
+
     def _prefix_output(self, output: any) -> dict:
         """Prefix the output with the output prefix if defined."""
         if len(self.output_model.lines) == 1:
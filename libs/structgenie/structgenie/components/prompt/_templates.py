@@ -41,3 +41,7 @@ Please try to fix the output provided below so that it can be parsed by yaml.loa
 {format_instructions}
 {remarks}
 {input}"""
+
+PACKED_INPUTS_TEMPLATE = """Multiple inputs are given below as indexed sections (# Input <index>).
+Return a yaml list with one item for each of the {num_inputs} inputs.
+Each item must contain the key 'Index' with the index of its input and the keys of the response schema."""
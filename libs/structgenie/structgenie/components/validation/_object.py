@@ -16,13 +16,18 @@ def required_keys(validation_config: dict):
     ]
 
 
+def missing_keys(d: dict, val_config: dict) -> list[str]:
+    """Return required keys without default that are missing in the output."""
+    return [
+        key for key in required_keys(val_config)
+        if key not in d and not val_config[key].get("default", None)
+    ]
+
+
 def validate_keys(d: dict, val_config: dict) -> Union[str, None]:
-    missing_keys = [key for key in required_keys(val_config) if key not in d]
-    for key in missing_keys:
-        if key in val_config and val_config[key].get("default", None):
-            missing_keys.remove(key)
-    if missing_keys:
-        return f"Keys {missing_keys} not in output"
+    missing = missing_keys(d, val_config)
+    if missing:
+        return f"Keys {missing} not in output"
     return None
 
 
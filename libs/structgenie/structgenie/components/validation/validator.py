@@ -20,6 +20,7 @@ class Validator(BaseValidator):
         self.validation_config = validation_config
         self.output_model = output_model
         self.error_log = []
+        self.failed_keys = []
         self.inputs = {}
 
     @classmethod
@@ -31,6 +32,7 @@ class Validator(BaseValidator):
         """Validate the output based on the validation config."""
         if inputs:
             self.inputs = inputs
+        self.failed_keys = []
 
         validation_config = self._parse_inputs(self.inputs)
 
@@ -50,6 +52,8 @@ class Validator(BaseValidator):
         error_msg = validate_keys(data, validation_config)
         if error_msg:
             self.log_error_msg(error_msg, "key", parent_key)
+            if parent_key is None:
+                self._track_failed_keys(*missing_keys(data, validation_config))
             return
 
         if not isinstance(data, dict):
@@ -60,6 +64,7 @@ class Validator(BaseValidator):
 
     def _validate_item(self, key: str, value: any, val_config: dict, parent_key: str = None):
         """Validate a single item in the output."""
+        num_errors = len(self.error_log)
 
         # validate type
         error_msg = validate_type(key, value, val_config)
@@ -76,6 +81,9 @@ class Validator(BaseValidator):
         # validate nested value
         self._validate_nested(key, value, val_config, parent_key)
 
+        if len(self.error_log) > num_errors:
+            self._track_failed_keys(parent_key.split(".")[0] if parent_key else key)
+
     def _validate_nested(self, key: str, value: any, val_config: dict, parent_key: str = None):
         """Validate nested structure.
 
@@ -112,6 +120,12 @@ class Validator(BaseValidator):
                 val_config[key]["rule"] = replace_placeholder_from_inputs_and_kwargs(config["rule"], inputs)
         return val_config
 
+    def _track_failed_keys(self, *keys: str):
+        """Track the top level keys that caused validation errors."""
+        for key in keys:
+            if key not in self.failed_keys:
+                self.failed_keys.append(key)
+
     def log_error_msg(self, msg: Union[str, list[str]], error_type: str = None, parent_key: str = None):
         if not msg:
             return
@@ -1,11 +1,20 @@
-from .langchain import (
-    LangchainDriverBasic,
-    LangchainDriverLong,
-    LangchainDriverExpert
-)
+"""Generation drivers.
+
+Drivers are imported on first access (PEP 562), so `import structgenie` doesn't load langchain or openai.
+"""
+from structgenie.utils.lazy import lazy_exports
+
+_DRIVERS = {
+    "LangchainDriverBasic": ".langchain",
+    "LangchainDriverLong": ".langchain",
+    "LangchainDriverExpert": ".langchain",
+}
 
 __all__ = [
     "LangchainDriverBasic",
     "LangchainDriverLong",
     "LangchainDriverExpert"
 ]
+
+
+__getattr__, __dir__ = lazy_exports(_DRIVERS, globals())
@@ -6,8 +6,6 @@ import re
 import time
 from typing import Any, List, Union, Tuple
 
-import openai
-
 from structgenie.base import BaseGenerationDriver
 from structgenie.driver.utils import split_prompt, create_examples_messages, create_chat_message
 
@@ -65,6 +63,7 @@ class OpenAIDriver(BaseGenerationDriver):
         return messages
 
     def completion(self, **kwargs):
+        import openai
         client = openai.OpenAI()
         messages = self.parse_prompt(**kwargs)
         exec_start = time.time()
@@ -84,6 +83,7 @@ class OpenAIDriver(BaseGenerationDriver):
         return result, execution_metrics
 
     async def async_completion(self, **kwargs):
+        import openai
         client = openai.AsyncOpenAI()
         messages = self.parse_prompt(**kwargs)
         exec_start = time.time()
@@ -6,8 +6,6 @@ import re
 import time
 from typing import Any, List, Union, Tuple
 
-import openai
-
 from structgenie.base import BaseGenerationDriver
 from structgenie.driver.utils import split_prompt, create_examples_messages, create_chat_message, \
     create_chat_message_with_image, parse_image_path
@@ -71,6 +69,7 @@ class OpenAIDriverVision(BaseGenerationDriver):
         return messages
 
     def completion(self, **kwargs):
+        import openai
         client = openai.OpenAI()
         messages = self.parse_prompt(**kwargs)
         exec_start = time.time()
@@ -90,6 +89,7 @@ class OpenAIDriverVision(BaseGenerationDriver):
         return result, execution_metrics
 
     async def async_completion(self, **kwargs):
+        import openai
         client = openai.AsyncOpenAI()
         messages = self.parse_prompt(**kwargs)
         exec_start = time.time()
@@ -3,11 +3,10 @@ import base64
 import re
 from typing import Any, Dict, Optional, Union, List
 
-import tiktoken
-
 
 def num_tokens_from_messages(messages, model="gpt-3.5-turbo-0613"):
     """Returns the number of tokens used by a list of messages."""
+    import tiktoken
     try:
         encoding = tiktoken.encoding_for_model(model)
     except KeyError:
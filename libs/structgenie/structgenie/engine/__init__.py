@@ -1,5 +1,13 @@
-from .genie import StructEngine
+"""Engines are imported on first access (PEP 562), e.g. importing the async engine doesn't load the others."""
+from structgenie.utils.lazy import lazy_exports
+
+_ENGINES = {
+    "StructEngine": ".genie",
+}
 
 __all__ = [
     "StructEngine",
 ]
+
+
+__getattr__, __dir__ = lazy_exports(_ENGINES, globals())
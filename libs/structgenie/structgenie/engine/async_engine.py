@@ -1,11 +1,19 @@
 import asyncio
-from typing import Union, Tuple
+from contextvars import ContextVar
+from typing import Union, Tuple, Optional
 
 from structgenie.base import BaseGenerationDriver
+from structgenie.components.input_output import OutputModel
 from structgenie.engine.genie import StructEngine
+from structgenie.errors import EngineRunError, DeadlineExceededError, CallTimeoutError
+from structgenie.utils.latency import get_latency_tracker, LatencyTracker
+
+# deadline (loop time) of the current run, shared by retries, fixing calls and nested runs of the same task
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("structgenie_deadline", default=None)
 
 
 class AsyncEngine(StructEngine):
+    supports_deadlines = True
 
     async def apply(self, input_list: list[dict], **kwargs):
         return await asyncio.gather(*[self.run(input_data, **kwargs) for input_data in input_list])
@@ -13,30 +21,46 @@ class AsyncEngine(StructEngine):
     async def run(self, inputs: dict, **kwargs) -> Union[dict, Tuple[dict, dict]]:
         """Run the chain.
 
+        If timeout is set, the run is bounded by a deadline that is propagated through retries and fixing calls.
+
         Args:
             inputs (dict): The inputs for the chain.
             **kwargs: Keyword arguments for the chain.
 
         Returns:
             Any: The output of the chain.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the run is exceeded.
         """
         self.last_error = None
+        token = self._start_deadline()
+        tracer = self._get_tracer()
 
-        n_run = 0
-        while n_run <= self.max_retries:
-            try:
-                output = await self._run(inputs, self.last_error, **kwargs)
-                if self.return_metrics:
-                    return output, self.run_metrics
-                return output
-            except Exception as e:
-                self.last_error = e
-                n_run += 1
-                if self.debug:
-                    print(f"Error: {e}")
-                    raise e
-                if self.return_metrics:
-                    self._log_error(e)
+        try:
+            with tracer.span("run", run_id=self.run_id, engine=self.__class__.__name__) as run_span:
+                n_run = 0
+                while n_run <= self.max_retries:
+                    try:
+                        with tracer.span("attempt", attempt=n_run):
+                            output = await self._run(inputs, self.last_error, **kwargs)
+                        run_span.set_attribute("attempts", n_run + 1)
+                        if self.return_metrics:
+                            return output, self.run_metrics
+                        return output
+                    except DeadlineExceededError as e:
+                        self._log_error(e)
+                        raise e
+                    except Exception as e:
+                        self.last_error = e
+                        n_run += 1
+                        if self.debug:
+                            print(f"Error: {e}")
+                            raise e
+                        if self.return_metrics:
+                            self._log_error(e)
+        finally:
+            _DEADLINE.reset(token)
 
     async def _run(self, inputs: dict, error_msg: Exception, **kwargs) -> dict:
         """Run the chain.
@@ -50,28 +74,195 @@ class AsyncEngine(StructEngine):
             Any: The output of the chain.
         """
 
+        tracer = self._get_tracer()
+
         # prepare
-        inputs = self.prep_inputs(inputs, **kwargs)
-        prompt = self.prep_prompt(error_msg, **inputs)
-        inputs_ = self.format_inputs(prompt, inputs, **kwargs)
-        executor = self.prep_executor(prompt, **kwargs)
+        with tracer.span("prep_inputs"):
+            inputs = self.prep_inputs(inputs, **kwargs)
+        with tracer.span("prep_prompt", is_retry=error_msg is not None):
+            prompt = self.prep_prompt(error_msg, **inputs)
+        with tracer.span("format_inputs"):
+            inputs_ = self.format_inputs(prompt, inputs, **kwargs)
+        with tracer.span("prep_executor"):
+            executor = self.prep_executor(prompt, **kwargs)
 
         if self.debug:
             print(prompt.format(**inputs_))
 
         # generate
-        if self.return_metrics:
-            text, run_metrics = await self._call_executor(executor, inputs_, return_metrics=True)
-            self._log_metrics(run_metrics)
-        else:
-            text = await self._call_executor(executor, inputs_)
+        text = await self._generate(executor, inputs_)
         # parse
-        output = self.parse_output(text, inputs)
+        with tracer.span("parse_output"):
+            output = await self.parse_output_async(text, inputs)
         # validate
-        self.validate_output(output, inputs)
+        if self.fix_validation_partially_by_llm:
+            return await self.validate_or_regenerate(output, inputs, **kwargs)
+        with tracer.span("validate_output"):
+            self.validate_output(output, inputs)
 
         return output
 
+    async def validate_or_regenerate(self, output: dict, inputs: dict, **kwargs) -> dict:
+        """Validate the output and regenerate only the failed keys on validation errors. (async)"""
+        tracer = self._get_tracer()
+        with tracer.span("validate_output"):
+            failed_keys, validation_errors = self._validate_partially(output, inputs)
+        if not failed_keys:
+            return output
+
+        with tracer.span("regenerate", failed_keys=failed_keys):
+            prompt, inputs_, partial_output_model = self.prep_partial_prompt(
+                output, inputs, failed_keys, validation_errors, **kwargs
+            )
+            executor = self.prep_executor(prompt, **kwargs)
+            text = await self._generate(executor, inputs_)
+
+            partial_output = await self.parse_output_async(text, inputs, output_model=partial_output_model)
+            return self._merge_partial_output(output, partial_output, inputs, partial_output_model)
+
+    async def run_packed(self, input_list: list[dict], max_context_size: int = 4096, max_pack_size: int = 20, **kwargs):
+        """Run the chain for multiple inputs packed into shared prompts. (async)
+
+        Packs are generated concurrently, missing or invalid items are retried individually.
+        """
+        token = self._start_deadline()
+        tracer = self._get_tracer()
+        try:
+            with tracer.span("run_packed", run_id=self.run_id, num_inputs=len(input_list)):
+                packs = self.pack_inputs(input_list, max_context_size, max_pack_size)
+                pack_outputs = await asyncio.gather(*[self._run_pack(pack, **kwargs) for pack in packs])
+
+                outputs = []
+                for pack, pack_output in zip(packs, pack_outputs):
+                    for inputs, output in zip(pack, pack_output):
+                        if output is None:
+                            output = await self.run(inputs, **kwargs)
+                            output = output[0] if self.return_metrics else output
+                        outputs.append(output)
+        finally:
+            _DEADLINE.reset(token)
+
+        if self.return_metrics:
+            return outputs, self.run_metrics
+        return outputs
+
+    async def _run_pack(self, pack: list[dict], **kwargs) -> list[Union[dict, None]]:
+        try:
+            with self._get_tracer().span("pack", pack_size=len(pack)):
+                prompt, inputs_ = self.prep_packed_prompt(pack, **kwargs)
+                executor = self.prep_executor(prompt, **kwargs)
+                text = await self._generate(executor, inputs_)
+                return self.parse_packed_output(text, pack)
+        except DeadlineExceededError as e:
+            raise e
+        except Exception as e:
+            self._log_error(EngineRunError("packed run failed", e))
+            return [None] * len(pack)
+
+    # === Deadlines & Hedging ===
+
+    def _start_deadline(self):
+        """Set the deadline for a run if timeout is set. Nested runs keep the deadline of the outer run."""
+        deadline = _DEADLINE.get()
+        if deadline is None and self.timeout is not None:
+            deadline = asyncio.get_running_loop().time() + self.timeout
+        return _DEADLINE.set(deadline)
+
+    def _remaining_time(self, per_call: bool = True) -> Optional[float]:
+        """Return the time left for the next call, None if unbounded.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the run is already exceeded.
+        """
+        remaining = None
+        deadline = _DEADLINE.get()
+        if deadline is not None:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise DeadlineExceededError("exceeded run deadline")
+        if per_call and self.call_timeout is not None:
+            remaining = self.call_timeout if remaining is None else min(remaining, self.call_timeout)
+        return remaining
+
+    def _hedge_delay(self, tracker: LatencyTracker) -> Optional[float]:
+        """Return the latency after which a duplicate call is launched, None if hedging is disabled."""
+        if self.hedge_percentile is None or len(tracker) < self.hedge_min_samples:
+            return None
+        return tracker.percentile(self.hedge_percentile)
+
+    async def _generate(self, executor: BaseGenerationDriver, inputs: dict) -> str:
+        """Call the executor within the deadline and log the run metrics.
+
+        If hedging is enabled and the call exceeds the latency percentile of recent calls,
+        a duplicate call is launched. The first successful call wins, the other one is cancelled.
+
+        Raises:
+            CallTimeoutError: If no call finished within the call timeout (retried by run).
+            DeadlineExceededError: If no call finished within the deadline of the run.
+        """
+        with self._get_tracer().span("generate") as span:
+            loop = asyncio.get_running_loop()
+            run_remaining = self._remaining_time(per_call=False)
+            timeout = self._remaining_time()
+            tracker = get_latency_tracker(getattr(executor, "model_name", None) or executor.__class__.__name__)
+            hedge_delay = self._hedge_delay(tracker)
+
+            start = loop.time()
+            tasks = {asyncio.ensure_future(self._call_executor(executor, inputs, return_metrics=self.return_metrics))}
+            try:
+                wait_for = min((t for t in (hedge_delay, timeout) if t is not None), default=None)
+                done, _ = await asyncio.wait(tasks, timeout=wait_for)
+
+                if not done and hedge_delay is not None and (timeout is None or hedge_delay < timeout):
+                    self._debug("Hedging", hedge_delay=hedge_delay)
+                    tasks.add(asyncio.ensure_future(
+                        self._call_executor(executor, inputs, return_metrics=self.return_metrics)
+                    ))
+
+                # wait for the first successful call
+                while len(done) < len(tasks) and not any(not task.exception() for task in done):
+                    remaining = None if timeout is None else timeout - (loop.time() - start)
+                    if remaining is not None and remaining <= 0:
+                        break
+                    new_done, _ = await asyncio.wait(
+                        tasks - done, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not new_done:
+                        break
+                    done |= new_done
+
+                if not done:
+                    if run_remaining is not None and timeout >= run_remaining:
+                        raise DeadlineExceededError("generation exceeded run deadline")
+                    raise CallTimeoutError(f"generation exceeded call timeout of {timeout:.2f}s")
+
+                span.set_attribute("hedged", len(tasks) > 1)
+                winner = next((task for task in done if not task.exception()), next(iter(done)))
+                result = winner.result()
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+            if self.return_metrics:
+                text, run_metrics = result
+                self._trace_metrics(span, run_metrics)
+                self._log_metrics(run_metrics)
+                tracker.record((run_metrics or {}).get("execution_time", loop.time() - start))
+            else:
+                text = result
+                tracker.record(loop.time() - start)
+            return text
+
+    async def parse_output_async(self, text: str, inputs: dict, output_model: OutputModel = None) -> dict:
+        """Parse the output of the chain. (async)
+
+        The llm fixing calls run on awaited AsyncEngines, so they keep the deadline of this run and are
+        cancelled with it.
+        """
+        output, run_metrics, error_log = await self._output_parser(output_model).parse_async(text, inputs)
+        return self._log_parsing(output, run_metrics, error_log)
+
     @staticmethod
     async def _call_executor(
             executor: BaseGenerationDriver,
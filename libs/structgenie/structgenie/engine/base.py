@@ -1,8 +1,8 @@
 import uuid
 from abc import abstractmethod, ABC
-from typing import Union, Type, Tuple
+from typing import Union, Type, Tuple, Optional, ClassVar
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator
 
 from structgenie.base import BasePromptBuilder, BaseValidator, BaseGenerationDriver, BaseIOModel
 from structgenie.components.examples import ExampleSelector
@@ -15,6 +15,7 @@ from structgenie.components.input_output import (
     init_input_model
 )
 from structgenie.driver.openai import OpenAIDriver
+from structgenie.utils.tracing import BaseTracer, current_tracer
 from structgenie.utils.templates import (
     extract_sections, load_default_template, load_system_config
 )
@@ -41,6 +42,7 @@ class BaseEngine(BaseModel, ABC):
 
     # validation settings
     validator: BaseValidator = None
+    fix_validation_partially_by_llm: bool = False
 
     # parser
     fix_parsing_by_llm: bool = True
@@ -57,10 +59,21 @@ class BaseEngine(BaseModel, ABC):
     raise_errors: bool = False
     return_metrics: bool = True
 
+    # latency settings (only supported by engines with supports_deadlines, i.e. AsyncEngine)
+    supports_deadlines: ClassVar[bool] = False
+    timeout: Optional[float] = None  # overall deadline in seconds for a run incl. retries and fixing calls
+    call_timeout: Optional[float] = None  # deadline in seconds for a single generation call
+    hedge_percentile: Optional[float] = None  # launch a duplicate call once this latency percentile is exceeded
+    hedge_min_samples: int = 20
+
+    # tracing (defaults to the tracer of the enclosing run, e.g. for fixing engines, else no tracing)
+    tracer: Optional[BaseTracer] = None
+
     # run states
     last_error: Union[str, None] = None
     last_output: Union[str, None] = None
     partial_variables: dict = None
+    item_metrics: list[dict] = None  # run metrics of each input of the last packed run (StructEngine.run_packed)
 
     return_reasoning: bool = False
     num_metrics_logged: int = 0
@@ -68,6 +81,19 @@ class BaseEngine(BaseModel, ABC):
     class Config:
         arbitrary_types_allowed = True
 
+    # === validators ===
+
+    @root_validator(skip_on_failure=True)
+    def validate_latency_settings(cls, values):
+        if cls.supports_deadlines:
+            return values
+        latency_settings = [key for key in ("timeout", "call_timeout", "hedge_percentile") if values.get(key) is not None]
+        if latency_settings:
+            raise ValueError(
+                f"{', '.join(latency_settings)} not supported by {cls.__name__}, use AsyncEngine for deadlines"
+            )
+        return values
+
     # === Setters ===
 
     def set_example_selector(self, examples: ExampleSelector):
@@ -217,6 +243,9 @@ class BaseEngine(BaseModel, ABC):
 
     # === Log/Debug ===
 
+    def _get_tracer(self) -> BaseTracer:
+        return self.tracer or current_tracer()
+
     def _log_metrics(self, metrics: dict):
         """Log run metrics.
 
@@ -241,6 +270,16 @@ class BaseEngine(BaseModel, ABC):
         self.run_metrics["errors"].extend(metrics.get("errors", []))
         self.num_metrics_logged += 1
 
+    @staticmethod
+    def _trace_metrics(span, metrics: Optional[dict]):
+        """Add the run metrics of a generation call to its span."""
+        if metrics:
+            span.set_attributes(
+                model_name=metrics.get("model_name"),
+                token_usage=metrics.get("token_usage", 0),
+                execution_time=metrics.get("execution_time", 0),
+            )
+
     def _log_error(self, error: Exception):
         """Log error in run_metrics."""
         self.run_metrics["errors"].append(str(error))
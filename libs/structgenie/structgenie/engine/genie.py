@@ -1,11 +1,19 @@
+from typing import Union
+
 from structgenie.base import BaseGenerationDriver
+from structgenie.components.input_output import OutputModel
 from structgenie.components.output_parser.output_parser import OutputParser
+from structgenie.components.prompt._templates import PACKED_INPUTS_TEMPLATE
 from structgenie.engine.base import BaseEngine
 from structgenie.errors import ParsingError, ValidationError, EngineRunError, MaxRetriesError
+from structgenie.utils.helper import count_tokens
+from structgenie.utils.operator.default import parse_default
 from structgenie.utils.parsing import (
     dump_to_yaml_string,
     format_inputs,
-    prepare_inputs_placeholders
+    parse_yaml_string,
+    prepare_inputs_placeholders,
+    replace_placeholder
 )
 
 
@@ -29,39 +37,44 @@ class StructEngine(BaseEngine):
         """
         self.last_error = None
         error_index = 0
-
-        n_run = 0
-        while n_run <= self.max_retries:
-            try:
-                output = self._run(inputs, error_msg=self.last_error, **kwargs)
-                if self.return_metrics:
-                    return output, self.run_metrics
-                return output
-
-            except Exception as e:
-                if raise_error or self.raise_errors:
-                    raise e
-                e = EngineRunError(f"run_num: {n_run}/{self.max_retries} ", e)
-                self._log_error(e)
-
-                # prepare error remarks
-                if len(self.run_metrics["errors"]) > error_index:
-                    new_errors = [er for er in self.run_metrics["errors"][error_index:]]
-                    prompt_errors = [
-                        str(er) for er in new_errors if isinstance(er, ParsingError) or isinstance(er, ValidationError)
-                    ]
-                    error_index = len(self.run_metrics["errors"])
-                    self.last_error = "\n - ".join(prompt_errors)
-
-                self._debug(
-                    f"Run Error #{n_run}/{self.max_retries}",
-                    raised=str(e),
-                )
-                n_run += 1
-
-        e = MaxRetriesError(f"exceeded max retries: {self.max_retries}")
-        self._log_error(e)
-        raise e
+        tracer = self._get_tracer()
+
+        with tracer.span("run", run_id=self.run_id, engine=self.__class__.__name__) as run_span:
+            n_run = 0
+            while n_run <= self.max_retries:
+                try:
+                    with tracer.span("attempt", attempt=n_run):
+                        output = self._run(inputs, error_msg=self.last_error, **kwargs)
+                    run_span.set_attribute("attempts", n_run + 1)
+                    if self.return_metrics:
+                        return output, self.run_metrics
+                    return output
+
+                except Exception as e:
+                    if raise_error or self.raise_errors:
+                        raise e
+                    e = EngineRunError(f"run_num: {n_run}/{self.max_retries} ", e)
+                    self._log_error(e)
+
+                    # prepare error remarks
+                    if len(self.run_metrics["errors"]) > error_index:
+                        new_errors = [er for er in self.run_metrics["errors"][error_index:]]
+                        prompt_errors = [
+                            str(er) for er in new_errors
+                            if isinstance(er, ParsingError) or isinstance(er, ValidationError)
+                        ]
+                        error_index = len(self.run_metrics["errors"])
+                        self.last_error = "\n - ".join(prompt_errors)
+
+                    self._debug(
+                        f"Run Error #{n_run}/{self.max_retries}",
+                        raised=str(e),
+                    )
+                    n_run += 1
+
+            e = MaxRetriesError(f"exceeded max retries: {self.max_retries}")
+            self._log_error(e)
+            raise e
 
     def _run(self, inputs: dict, error_msg: str, **kwargs):
         """Run the chain.
@@ -75,19 +88,26 @@ class StructEngine(BaseEngine):
             Any: The output of the chain.
         """
 
+        tracer = self._get_tracer()
+
         # prepare
-        inputs = self.prep_inputs(inputs, **kwargs)
-        prompt = self.prep_prompt(error_msg, **inputs)
-        inputs_ = self.format_inputs(prompt, inputs, **kwargs)
+        with tracer.span("prep_inputs"):
+            inputs = self.prep_inputs(inputs, **kwargs)
+        with tracer.span("prep_prompt", is_retry=error_msg is not None):
+            prompt = self.prep_prompt(error_msg, **inputs)
+        with tracer.span("format_inputs"):
+            inputs_ = self.format_inputs(prompt, inputs, **kwargs)
         self._debug(
             "Prompt",
             formatted_prompt=prompt.format(**inputs_)
         )
 
         # generate
-        executor = self.prep_executor(prompt, **kwargs)
-        text, run_metrics = self._call_executor(executor, inputs_)
-        self._log_metrics(run_metrics)
+        with tracer.span("prep_executor"):
+            executor = self.prep_executor(prompt, **kwargs)
+        with tracer.span("generate") as span:
+            text, run_metrics = self._call_executor(executor, inputs_)
+            self._trace_metrics(span, run_metrics)
 
         self.last_output = text
         self._debug(
@@ -96,13 +116,161 @@ class StructEngine(BaseEngine):
             run_metrics=run_metrics
         )
         # parse
-        output = self.parse_output(text, inputs)
+        with tracer.span("parse_output"):
+            output = self.parse_output(text, inputs)
 
         # validate
-        self.validate_output(output, inputs)
+        if self.fix_validation_partially_by_llm:
+            return self.validate_or_regenerate(output, inputs, **kwargs)
+        with tracer.span("validate_output"):
+            self.validate_output(output, inputs)
 
         return output
 
+    def run_packed(self, input_list: list[dict], max_context_size: int = 4096, max_pack_size: int = 20, **kwargs):
+        """Run the chain for multiple inputs packed into shared prompts.
+
+        Inputs are packed into one prompt as indexed sections, so instruction, examples and format instructions
+        are sent once per pack. The pack size is chosen from the context size of the model.
+        Missing or invalid items of a packed response are retried individually.
+        The metrics of each input are kept in item_metrics: an even share of the tokens and time of its pack
+        plus the metrics and errors of its own retry.
+
+        Args:
+            input_list (list[dict]): The inputs for the chain.
+            max_context_size (int): The context size of the model used to choose the pack size.
+            max_pack_size (int): The maximum number of inputs per prompt.
+            **kwargs: Keyword arguments for the chain.
+
+        Returns:
+            Outputs (list): The outputs of the chain in order of the inputs.
+            (optional) Outputs (list), run_metrics (dict): The outputs of the chain and the run metrics.
+        """
+        tracer = self._get_tracer()
+        outputs = []
+        self.item_metrics = []
+        with tracer.span("run_packed", run_id=self.run_id, num_inputs=len(input_list)):
+            for pack in self.pack_inputs(input_list, max_context_size, max_pack_size):
+                pack_metrics, pack_errors, item_errors = {}, [], {}
+                try:
+                    with tracer.span("pack", pack_size=len(pack)):
+                        prompt, inputs_ = self.prep_packed_prompt(pack, **kwargs)
+                        executor = self.prep_executor(prompt, **kwargs)
+                        with tracer.span("generate") as span:
+                            text, pack_metrics = self._call_executor(executor, inputs_)
+                            self._trace_metrics(span, pack_metrics)
+                        pack_outputs = self.parse_packed_output(text, pack, item_errors=item_errors)
+                except Exception as e:
+                    error = EngineRunError("packed run failed", e)
+                    self._log_error(error)
+                    pack_errors = [str(error)]
+                    pack_outputs = [None] * len(pack)
+
+                for index, (inputs, output) in enumerate(zip(pack, pack_outputs)):
+                    metrics = self._share_metrics(pack_metrics or {}, len(pack))
+                    metrics["errors"] = pack_errors + item_errors.get(index, [])
+                    if output is None:
+                        before = dict(self.run_metrics, errors=len(self.run_metrics["errors"]))
+                        output = self.run(inputs, **kwargs)
+                        output = output[0] if self.return_metrics else output
+                        for key in ("execution_time", "token_usage", "failure_rate"):
+                            metrics[key] += self.run_metrics[key] - before[key]
+                        metrics["errors"] += self.run_metrics["errors"][before["errors"]:]
+                    outputs.append(output)
+                    self.item_metrics.append(metrics)
+
+        if self.return_metrics:
+            return outputs, self.run_metrics
+        return outputs
+
+    @staticmethod
+    def _share_metrics(metrics: dict, num_items: int) -> dict:
+        """Return the share of one item of the metrics of a packed call."""
+        return dict(
+            execution_time=metrics.get("execution_time", 0) / num_items,
+            token_usage=metrics.get("token_usage", 0) / num_items,
+            model_name=metrics.get("model_name"),
+            model_config=metrics.get("model_config"),
+            failure_rate=0,
+        )
+
+    def pack_inputs(self, input_list: list[dict], max_context_size: int, max_pack_size: int = 20) -> list[list[dict]]:
+        """Split the inputs into packs that fit into the context size of the model.
+
+        Each pack is limited by the tokens of the shared prompt plus the tokens of the packed inputs
+        and their estimated outputs.
+        """
+        if not input_list:
+            return []
+
+        shared_tokens = count_tokens(self.prompt_builder.build(remarks=PACKED_INPUTS_TEMPLATE, **input_list[0]))
+        output_tokens = count_tokens(self.output_model.template_schema) + 4
+        budget = max_context_size - shared_tokens
+
+        packs, pack, pack_tokens = [], [], 0
+        for inputs in input_list:
+            item_tokens = count_tokens(self.input_model.dump_to_prompt(inputs)) + 4 + output_tokens
+            if pack and (pack_tokens + item_tokens > budget or len(pack) >= max_pack_size):
+                packs.append(pack)
+                pack, pack_tokens = [], 0
+            pack.append(inputs)
+            pack_tokens += item_tokens
+        packs.append(pack)
+
+        self._debug("Packing", pack_sizes=[len(pack) for pack in packs])
+        return packs
+
+    def prep_packed_prompt(self, pack: list[dict], **kwargs) -> tuple[str, dict]:
+        """Prepare the prompt and the formatted inputs for a pack of inputs.
+
+        Placeholders outside the input section are filled from the first input of the pack.
+        """
+        is_chat_mode = self.driver.prompt_mode() == "chat"
+        inputs = self.prep_inputs(dict(pack[0]), **kwargs)
+        remarks = replace_placeholder(PACKED_INPUTS_TEMPLATE, num_inputs=len(pack))
+        prompt = self.prompt_builder.build(remarks=remarks, chat_mode=is_chat_mode, **inputs)
+        inputs_ = self.format_inputs(prompt, inputs, **kwargs)
+        inputs_["input"] = "\n".join(
+            f"# Input {i}\n{self.input_model.dump_to_prompt(self.prep_inputs(dict(item), **kwargs), **kwargs)}"
+            for i, item in enumerate(pack)
+        )
+        self._debug("Packed Prompt", formatted_prompt=prompt.format(**inputs_))
+        return prompt, inputs_
+
+    def parse_packed_output(self, text: str, pack: list[dict], item_errors: dict = None) -> list[Union[dict, None]]:
+        """Parse a packed response into one output per input.
+
+        Items are validated separately. Missing or invalid items are returned as None.
+        The validation errors of invalid items are added to item_errors by index if given.
+        """
+        items = parse_yaml_string(text)
+        if isinstance(items, dict):
+            items = next((value for value in items.values() if isinstance(value, list)), [])
+
+        outputs = [None] * len(pack)
+        for item in items or []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.pop("index"))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < len(pack):
+                continue
+
+            output = parse_default(item, self.output_model, **pack[index])
+            validation_errors = self.validator.validate(output, pack[index])
+            if validation_errors:
+                for error in validation_errors:
+                    self._log_error(error)
+                if item_errors is not None:
+                    item_errors[index] = [str(error) for error in validation_errors]
+                continue
+            outputs[index] = output
+
+        self._debug("Packed Output Parsing", parsed_outputs=outputs)
+        return outputs
+
     def prep_prompt(self, error_msg: str = None, **kwargs) -> str:
         """Prepare the prompt for the chain.
 
@@ -173,16 +341,21 @@ class StructEngine(BaseEngine):
 
     # === output parsing ===
 
-    def parse_output(self, text: str, inputs: dict):
+    def parse_output(self, text: str, inputs: dict, output_model: OutputModel = None):
         """Parse the output of the chain."""
-        output_parser = OutputParser(
-            self.output_model,  # type: ignore
+        output, run_metrics, error_log = self._output_parser(output_model).parse(text, inputs)
+        return self._log_parsing(output, run_metrics, error_log)
+
+    def _output_parser(self, output_model: OutputModel = None) -> OutputParser:
+        return OutputParser(
+            output_model or self.output_model,  # type: ignore
             fix_by_llm=self.fix_parsing_by_llm,
             fix_partial_by_llm=self.fix_parsing_partially_by_llm,
             debug=self.debug
         )
-        output, run_metrics, error_log = output_parser.parse(text, inputs)
 
+    def _log_parsing(self, output: dict, run_metrics: list, error_log: list) -> dict:
+        """Log the metrics of the fixing calls and the errors of the output parser."""
         self._debug(
             "Output Parsing",
             parsed_output=output,
@@ -216,6 +389,100 @@ class StructEngine(BaseEngine):
                 self._log_error(error)
             raise ValidationError("Validation failed with errors")
 
+    def validate_or_regenerate(self, output: dict, inputs: dict, **kwargs) -> dict:
+        """Validate the output and regenerate only the failed keys on validation errors.
+
+        Valid keys are kept. The failed keys are regenerated with a partial OutputModel,
+        merged into the output and the merged output is validated again.
+
+        Args:
+            output (dict): The parsed output of the chain.
+            inputs (dict): The inputs for the chain.
+            **kwargs: Keyword arguments for the executor.
+
+        Returns:
+            dict: The validated (merged) output.
+        """
+        tracer = self._get_tracer()
+        with tracer.span("validate_output"):
+            failed_keys, validation_errors = self._validate_partially(output, inputs)
+        if not failed_keys:
+            return output
+
+        with tracer.span("regenerate", failed_keys=failed_keys):
+            prompt, inputs_, partial_output_model = self.prep_partial_prompt(
+                output, inputs, failed_keys, validation_errors, **kwargs
+            )
+            executor = self.prep_executor(prompt, **kwargs)
+            with tracer.span("generate") as span:
+                text, run_metrics = self._call_executor(executor, inputs_)
+                self._trace_metrics(span, run_metrics)
+
+            partial_output = self.parse_output(text, inputs, output_model=partial_output_model)
+            return self._merge_partial_output(output, partial_output, inputs, partial_output_model)
+
+    def _validate_partially(self, output: dict, inputs: dict) -> tuple[list[str], list]:
+        """Validate the output and return the failed top level keys with their errors.
+
+        Raises:
+            ValidationError: If the failed keys cannot be regenerated partially (e.g. all keys failed).
+        """
+        validation_errors = self.validator.validate(output, inputs)
+        if not validation_errors:
+            return [], []
+
+        for error in validation_errors:
+            self._log_error(error)
+
+        failed_keys = self.validator.failed_keys
+        top_level_keys = [key for key in self.output_model.keys() if "." not in key]
+        if not failed_keys or len(failed_keys) >= len(top_level_keys):
+            raise ValidationError("Validation failed with errors")
+
+        self._debug("Partial Regeneration", failed_keys=failed_keys)
+        return failed_keys, validation_errors
+
+    def prep_partial_prompt(
+            self, output: dict, inputs: dict, failed_keys: list[str], errors: list, **kwargs
+    ) -> tuple[str, dict, OutputModel]:
+        """Prepare the prompt for regenerating the failed keys of an output.
+
+        The prompt consists of the instruction, the input and the format instructions for the failed keys only.
+        Examples and the full last output are omitted to keep the retry cheap.
+        """
+        from structgenie.components.prompt.builder import PromptBuilder
+
+        partial_output_model = self.output_model.partial(failed_keys)
+        valid_output = {key: value for key, value in output.items() if key not in failed_keys}
+        error_msg = "\n - ".join(str(error) for error in errors)
+        error_remark = (
+            "---\n"
+            f"During last generation, errors were encountered for the keys {failed_keys}:\n{error_msg}\n\n"
+            "Only return the keys from the format instructions. "
+            f"Stay consistent with the valid part of the last output:\n{dump_to_yaml_string(valid_output)}\n"
+            "---\n"
+        )
+
+        prompt_builder = PromptBuilder(
+            instruction=self.instruction,
+            input_model=self.input_model,
+            output_model=partial_output_model,
+        )
+        is_chat_mode = self.driver.prompt_mode() == "chat"
+        prompt = prompt_builder.build(error=error_remark, chat_mode=is_chat_mode, **inputs)
+        inputs_ = self.format_inputs(prompt, inputs, **kwargs)
+        self._debug("Partial Prompt", formatted_prompt=prompt.format(**inputs_))
+        return prompt, inputs_, partial_output_model
+
+    def _merge_partial_output(self, output: dict, partial_output: dict, inputs: dict,
+                              partial_output_model: OutputModel) -> dict:
+        """Merge the parsed regenerated keys into the output and validate the merged output."""
+        merged_output = output.copy()
+        merged_output.update({key: value for key, value in partial_output.items() if key in partial_output_model.keys()})
+        self._debug("Partial Regeneration", merged_output=merged_output)
+        self.validate_output(merged_output, inputs)
+        return merged_output
+
     # === helpers ===
 
     @staticmethod
@@ -2,8 +2,6 @@
 
 import asyncio
 
-from nest_asyncio import apply
-
 from structgenie.engine.async_engine import AsyncEngine
 from structgenie.utils import remove_reasoning
 
@@ -70,6 +68,7 @@ class MajorVoteEngine:
         return [output for output in outputs if output]
 
     def run(self, inputs: dict, **kwargs):
+        from nest_asyncio import apply
         apply()
         outputs: list[dict] = asyncio.run(self.gather_engine_run(inputs, **kwargs))
         self.callback(f"Outputs: {outputs}")
@@ -1,7 +1,6 @@
 import uuid
 from typing import Union, Callable, Type
 
-from colorama import Fore
 from pydantic import BaseModel, Field
 
 from structgenie.base import BasePromptBuilder, BaseValidator, BaseGenerationDriver
@@ -323,6 +322,7 @@ class StructGenie(BaseModel):
         try:
             output = self.output_parser(text)
         except Exception as e:
+            from colorama import Fore
             print(Fore.RED + f"Error while parsing output: {e}" + Fore.RESET)
             output = self._parse_output(text, e)
         output = self._prefix_output(output)
@@ -29,6 +29,14 @@ class MaxRetriesError(EngineRunError):
     pass
 
 
+class DeadlineExceededError(EngineRunError):
+    pass
+
+
+class CallTimeoutError(EngineRunError):
+    pass
+
+
 # === VALIDATION ERRORS ===
 
 class ValidationError(Exception):
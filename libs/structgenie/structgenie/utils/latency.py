@@ -0,0 +1,40 @@
+"""Track recent execution times per model to derive latency percentiles (e.g. for hedged requests)."""
+import threading
+from collections import deque
+from typing import Union
+
+import math
+
+
+class LatencyTracker:
+    """Ring buffer of recent execution times."""
+
+    def __init__(self, max_samples: int = 200):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, execution_time: float):
+        with self._lock:
+            self._samples.append(execution_time)
+
+    def percentile(self, q: float) -> Union[float, None]:
+        """Return the q-th percentile (0-100) of the recent execution times, None if no samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(max(math.ceil(q / 100 * len(samples)) - 1, 0), len(samples) - 1)
+        return samples[index]
+
+
+_TRACKERS: dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(key: str) -> LatencyTracker:
+    """Return the shared tracker for a key (e.g. model name)."""
+    if key not in _TRACKERS:
+        _TRACKERS[key] = LatencyTracker()
+    return _TRACKERS[key]
@@ -0,0 +1,271 @@
+"""Phase-level tracing of engine runs.
+
+Engines open a span for each run, retry attempt and phase (prep_inputs, prep_prompt, format_inputs,
+prep_executor, generate, parse_output, validate_output, regenerate). The current span is kept in a ContextVar,
+so spans opened inside it (incl. fixing engines started by the output parser, hedged calls and worker threads
+started with asyncio.to_thread) become its children and are recorded by the same tracer.
+
+By default the NoopTracer is used, which returns a shared no-op span and doesn't allocate per call.
+Use a Tracer with exporters to record spans, e.g. in OTLP JSON to a local file:
+
+    tracer = Tracer(exporters=[FileSpanExporter("traces.jsonl")])
+    engine = StructEngine.from_template(template, tracer=tracer)
+
+Callbacks are added by subclassing Tracer (on_start, on_end) or SpanExporter (export).
+"""
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Optional, Union
+
+_CURRENT_SPAN: ContextVar[Optional["Span"]] = ContextVar("structgenie_span", default=None)
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """A timed phase of a run. Use as context manager."""
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "start_time", "end_time", "attributes", "status", "error",
+        "tracer", "_token"
+    )
+
+    def __init__(self, name: str, tracer: "Tracer", parent: Optional["Span"] = None, attributes: dict = None):
+        self.name = name
+        self.tracer = tracer
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes or {}
+        self.start_time = None
+        self.end_time = None
+        self.status = STATUS_UNSET
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.error = f"{error.__class__.__name__}: {error}"
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duration in seconds, None if the span hasn't ended."""
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) / 1e9
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.time_ns()
+        self._token = _CURRENT_SPAN.set(self)
+        self.tracer.on_start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_time = time.time_ns()
+        if exc is not None:
+            self.record_error(exc)
+        elif self.status == STATUS_UNSET:
+            self.status = STATUS_OK
+        _CURRENT_SPAN.reset(self._token)
+        self.tracer.on_end(self)
+        return False
+
+
+class _NoopSpan:
+    """Shared span of the NoopTracer."""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class BaseTracer:
+
+    def span(self, name: str, **attributes) -> Union[Span, _NoopSpan]:
+        raise NotImplementedError
+
+
+class NoopTracer(BaseTracer):
+    """Tracer that records nothing."""
+
+    def span(self, name: str, **attributes) -> _NoopSpan:
+        return NOOP_SPAN
+
+
+NOOP_TRACER = NoopTracer()
+
+
+class SpanExporter:
+    """Receives each finished span."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        self.flush()
+
+
+class Tracer(BaseTracer):
+
+    def __init__(self, exporters: list[SpanExporter] = None):
+        """Tracer recording spans.
+
+        Args:
+            exporters (list[SpanExporter], optional): Exporters receiving each finished span.
+        """
+        self.exporters = exporters or []
+
+    def span(self, name: str, **attributes) -> Span:
+        """Create a span as child of the current span."""
+        return Span(name, self, parent=_CURRENT_SPAN.get(), attributes=attributes)
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    def flush(self) -> None:
+        for exporter in self.exporters:
+            exporter.flush()
+
+    def shutdown(self) -> None:
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+def current_span() -> Optional[Span]:
+    """Return the span of the current context, None outside of traced runs."""
+    return _CURRENT_SPAN.get()
+
+
+def current_tracer() -> BaseTracer:
+    """Return the tracer of the current span, the NoopTracer outside of traced runs."""
+    span = _CURRENT_SPAN.get()
+    return span.tracer if span is not None else NOOP_TRACER
+
+
+# === Exporters ===
+
+class InMemorySpanExporter(SpanExporter):
+    """Collects finished spans in a list (e.g. for tests)."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+class FileSpanExporter(SpanExporter):
+
+    def __init__(self, file_path: Union[str, Path], service_name: str = "structgenie", max_batch_size: int = 512):
+        """Export spans as OTLP JSON lines (the format of the OpenTelemetry collector file exporter).
+
+        Spans are buffered and written as one line when a root span ends or the buffer is full.
+
+        Args:
+            file_path (str|Path): The jsonl file to append to.
+            service_name (str): The service.name resource attribute.
+            max_batch_size (int): Write the buffer once it holds this many spans.
+        """
+        self.file_path = Path(file_path)
+        self.service_name = service_name
+        self.max_batch_size = max_batch_size
+        self._buffer: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._buffer.append(span)
+            if span.parent_id is not None and len(self._buffer) < self.max_batch_size:
+                return
+            spans, self._buffer = self._buffer, []
+        self._write(spans)
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        self._write(spans)
+
+    def _write(self, spans: list[Span]) -> None:
+        if not spans:
+            return
+        line = json.dumps(self.to_otlp(spans, self.service_name))
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self.file_path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    @staticmethod
+    def to_otlp(spans: list[Span], service_name: str = "structgenie") -> dict:
+        """Convert spans to an OTLP JSON ExportTraceServiceRequest."""
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "structgenie"},
+                "spans": [_otlp_span(span) for span in spans],
+            }],
+        }]}
+
+
+def _otlp_span(span: Span) -> dict:
+    otlp_span = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+        "status": {"code": span.status},
+    }
+    if span.parent_id is not None:
+        otlp_span["parentSpanId"] = span.parent_id
+    if span.error is not None:
+        otlp_span["status"]["message"] = span.error
+    return otlp_span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    if isinstance(value, (list, tuple)):
+        return {"key": key, "value": {"arrayValue": {"values": [_otlp_attribute("", v)["value"] for v in value]}}}
+    return {"key": key, "value": {"stringValue": str(value)}}
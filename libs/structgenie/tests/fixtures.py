@@ -1,2 +1,39 @@
+from typing import Any, Tuple, Union
+
+from structgenie.base import BaseGenerationDriver
+
+
 def api_key():
     return "test"
+
+
+class ScriptedDriver(BaseGenerationDriver):
+    """Driver answering the calls of an engine with scripted texts and metrics (in call order)."""
+    responses: list = []
+    prompts: list = []
+
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+
+    @classmethod
+    def script(cls, *responses: Tuple[str, dict]) -> type:
+        """Return a driver class answering with the given (text, metrics) responses."""
+        return type(cls.__name__, (cls,), {"responses": list(responses), "prompts": []})
+
+    @classmethod
+    def load_driver(cls, prompt: Union[str, Any], **kwargs):
+        cls.prompts.append(prompt)
+        return cls(prompt)
+
+    def predict(self, **kwargs) -> str:
+        return self.predict_and_measure(**kwargs)[0]
+
+    def predict_and_measure(self, **kwargs) -> Tuple[str, dict]:
+        text, metrics = type(self).responses.pop(0)
+        return text, dict(metrics)
+
+    async def predict_async(self, **kwargs) -> str:
+        return self.predict(**kwargs)
+
+    async def predict_and_measure_async(self, **kwargs) -> Tuple[str, dict]:
+        return self.predict_and_measure(**kwargs)
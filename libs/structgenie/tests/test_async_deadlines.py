@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from structgenie.engine import StructEngine
+from structgenie.engine.async_engine import AsyncEngine
+from structgenie.errors import DeadlineExceededError
+from structgenie.utils.latency import get_latency_tracker
+
+
+@pytest.fixture
+def template():
+    return """Return the genre of a book.
+
+# Input
+Book: {book}
+---
+Genre: <str, options=[fiction, non-fiction, fantasy]>
+"""
+
+
+def delayed_calls(*delays):
+    """Return a fake _call_executor answering each call after the given delay."""
+    calls = []
+
+    async def call_executor(executor, inputs, return_metrics=False):
+        delay = delays[len(calls)]
+        calls.append(delay)
+        await asyncio.sleep(delay)
+        return "Genre: fantasy", {"model_name": "some model", "execution_time": delay}
+
+    return call_executor, calls
+
+
+def test_run_exceeds_deadline(mocker, template):
+    call_executor, calls = delayed_calls(1.0)
+    mocker.patch('structgenie.engine.async_engine.AsyncEngine._call_executor', side_effect=call_executor)
+
+    engine = AsyncEngine.from_template(template, timeout=0.1)
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(engine.run({"book": "The Hobbit"}))
+    assert len(calls) == 1
+
+
+def test_call_timeout_is_retried(mocker, template):
+    call_executor, calls = delayed_calls(1.0, 0.01)
+    mocker.patch('structgenie.engine.async_engine.AsyncEngine._call_executor', side_effect=call_executor)
+
+    engine = AsyncEngine.from_template(template, timeout=5, call_timeout=0.1)
+    output, m = asyncio.run(engine.run({"book": "The Hobbit"}))
+
+    assert output == {"genre": "fantasy"}
+    assert calls == [1.0, 0.01]
+    assert any("CallTimeoutError" in str(error) for error in m["errors"])
+
+
+def test_hedged_request(mocker, template):
+    tracker = get_latency_tracker("hedging-test-model")
+    for _ in range(20):
+        tracker.record(0.01)
+
+    call_executor, calls = delayed_calls(1.0, 0.01)
+    mocker.patch('structgenie.engine.async_engine.AsyncEngine._call_executor', side_effect=call_executor)
+
+    engine = AsyncEngine.from_template(template, hedge_percentile=95, timeout=0.5)
+    output, m = asyncio.run(engine.run({"book": "The Hobbit"}, model_name="hedging-test-model"))
+
+    assert output == {"genre": "fantasy"}
+    assert calls == [1.0, 0.01]
+
+
+def test_fixing_call_keeps_run_deadline(mocker):
+    template = """Return the genres of a book.
+
+# Input
+Book: {book}
+---
+Genres: <list[str]>
+"""
+    calls = []
+
+    async def call_executor(executor, inputs, return_metrics=False):
+        calls.append(executor)
+        if len(calls) == 1:
+            return "Genres: [fantasy, fiction", {"model_name": "some model", "execution_time": 0.01}
+        # the llm fixing call of the unparsable output
+        await asyncio.sleep(1.0)
+        return "Genres: [fantasy, fiction]", {"model_name": "some model", "execution_time": 1.0}
+
+    mocker.patch('structgenie.engine.async_engine.AsyncEngine._call_executor', side_effect=call_executor)
+
+    engine = AsyncEngine.from_template(template, timeout=0.1)
+    start = time.time()
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(engine.run({"book": "The Hobbit"}))
+
+    assert time.time() - start < 0.5
+    assert len(calls) == 2
+    assert engine.num_metrics_logged == 1
+    assert engine.run_metrics["errors"] == ["DeadlineExceededError(exceeded run deadline)"]
+
+
+def test_sync_engine_rejects_latency_settings(template):
+    with pytest.raises(ValueError, match="use AsyncEngine"):
+        StructEngine.from_template(template, timeout=1)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HEAVY_MODULES = ["langchain", "openai", "tiktoken", "colorama", "nest_asyncio"]
+PACKAGE_ROOT = Path(__file__).parents[1]
+
+
+def loaded_modules(code: str) -> list[str]:
+    """Run code in a fresh interpreter and return the heavy modules it loaded."""
+    script = code + f"\nimport sys, json\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=PACKAGE_ROOT)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("code", [
+    "import structgenie",
+    "from structgenie.engine import StructEngine",
+    "from structgenie.engine.async_engine import AsyncEngine",
+    "from structgenie.driver.openai import OpenAIDriver",
+])
+def test_heavy_dependencies_are_lazy(code):
+    assert loaded_modules(code) == []
+
+
+def test_lazy_driver_exports():
+    pytest.importorskip("langchain")
+    import structgenie.driver
+
+    assert "LangchainDriverBasic" in dir(structgenie.driver)
+    assert structgenie.driver.LangchainDriverBasic.__name__ == "LangchainDriverBasic"
+    with pytest.raises(AttributeError):
+        structgenie.driver.UnknownDriver
+
+
+def test_lazy_engine_exports():
+    import structgenie.engine
+
+    assert "StructEngine" in dir(structgenie.engine)
+    assert structgenie.engine.StructEngine.__name__ == "StructEngine"
+    assert "StructEngine" in vars(structgenie.engine)
+    with pytest.raises(AttributeError):
+        structgenie.engine.UnknownEngine
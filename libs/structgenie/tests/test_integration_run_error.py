@@ -5,6 +5,8 @@ import pytest
 from structgenie.engine import StructEngine
 from structgenie.errors import MaxRetriesError
 
+from fixtures import ScriptedDriver
+
 
 @pytest.fixture
 def template():
@@ -29,18 +31,14 @@ def mock_structengine(mocker):
     return mock
 
 
-def test_failure_rate(mocker, template):
-    # mock_structengine._call_executor.return_value = ("Reasoning: I knew it all along.\nInstruction: Do it again.", {})
-    mocker.patch(
-        'structgenie.engine.StructEngine._call_executor',
-        side_effect=[
-            ("Reasoning: I knew it all along.\n", {"model_name": "some model"}),
-            ("Reasoning: I knew it all along.\nConstrcution: Do it again.", {"model_name": "some model"}),
-            ("Reasoning: I knew it all along.\nInstruction: Do it again.", {"model_name": "some model"})
-        ]
+def test_failure_rate(template):
+    driver = ScriptedDriver.script(
+        ("Reasoning: I knew it all along.\n", {"model_name": "some model"}),
+        ("Reasoning: I knew it all along.\nConstrcution: Do it again.", {"model_name": "some model"}),
+        ("Reasoning: I knew it all along.\nInstruction: Do it again.", {"model_name": "some model"})
     )
 
-    engine = StructEngine.from_template(template)
+    engine = StructEngine.from_template(template, driver=driver)
     output, m = engine.run(inputs={"input_model": "some model", "output_model": "some model"})
 
     assert output == {"reasoning": "I knew it all along.", "instruction": "Do it again."}
@@ -48,6 +46,19 @@ def test_failure_rate(mocker, template):
     assert engine.num_metrics_logged == 3
 
 
+def test_metrics_of_a_clean_run(template):
+    driver = ScriptedDriver.script(
+        ("Reasoning: I knew it all along.\nInstruction: Do it again.", {"model_name": "some model", "token_usage": 100}),
+    )
+
+    engine = StructEngine.from_template(template, driver=driver)
+    output, m = engine.run(inputs={"input_model": "some model", "output_model": "some model"})
+
+    assert m["token_usage"] == 100
+    assert m["failure_rate"] == 0
+    assert engine.num_metrics_logged == 1
+
+
 def test_max_retries(mocker, template):
     # mock_structengine._call_executor.return_value = ("Reasoning: I knew it all along.\nInstruction: Do it again.", {})
     mocker.patch(
@@ -0,0 +1,92 @@
+import pytest
+
+from structgenie.engine import StructEngine
+
+from fixtures import ScriptedDriver
+
+
+@pytest.fixture(autouse=True)
+def count_tokens(mocker):
+    return mocker.patch('structgenie.engine.genie.count_tokens', side_effect=lambda text: len(text) // 4)
+
+
+@pytest.fixture
+def template():
+    return """Return the genre of a book.
+
+# Input
+Book: {book}
+---
+Genre: <str, options=[fiction, non-fiction, fantasy]>
+"""
+
+
+def test_pack_inputs(template):
+    engine = StructEngine.from_template(template)
+    input_list = [{"book": f"Book {i}"} for i in range(5)]
+
+    assert [len(pack) for pack in engine.pack_inputs(input_list, max_context_size=4096)] == [5]
+    assert [len(pack) for pack in engine.pack_inputs(input_list, max_context_size=4096, max_pack_size=2)] == [2, 2, 1]
+
+
+def test_run_packed(mocker, template):
+    call_executor = mocker.patch(
+        'structgenie.engine.StructEngine._call_executor',
+        side_effect=[
+            ("- Index: 1\n  Genre: fiction\n- Index: 0\n  Genre: fantasy", {"model_name": "some model"}),
+        ]
+    )
+
+    engine = StructEngine.from_template(template)
+    outputs, m = engine.run_packed([{"book": "The Hobbit"}, {"book": "Emma"}])
+
+    assert outputs == [{"genre": "fantasy"}, {"genre": "fiction"}]
+    assert call_executor.call_count == 1
+
+    packed_input = call_executor.call_args_list[0].args[1]["input"]
+    assert "# Input 0" in packed_input and "# Input 1" in packed_input
+
+
+def test_run_packed_retries_invalid_items(mocker, template):
+    call_executor = mocker.patch(
+        'structgenie.engine.StructEngine._call_executor',
+        side_effect=[
+            ("- Index: 0\n  Genre: fantasy\n- Index: 1\n  Genre: cooking", {"model_name": "some model"}),
+            ("Genre: fiction", {"model_name": "some model"}),
+        ]
+    )
+
+    engine = StructEngine.from_template(template)
+    outputs, m = engine.run_packed([{"book": "The Hobbit"}, {"book": "Emma"}])
+
+    assert outputs == [{"genre": "fantasy"}, {"genre": "fiction"}]
+    assert call_executor.call_count == 2
+
+
+def test_run_packed_metrics(template):
+    driver = ScriptedDriver.script(
+        (
+            "- Index: 0\n  Genre: fantasy\n- Index: 1\n  Genre: cooking",
+            {"model_name": "some model", "token_usage": 120, "execution_time": 2.0},
+        ),
+        ("Genre: fiction", {"model_name": "some model", "token_usage": 40, "execution_time": 0.5}),
+    )
+
+    engine = StructEngine.from_template(template, driver=driver)
+    outputs, m = engine.run_packed([{"book": "The Hobbit"}, {"book": "Emma"}])
+
+    assert len(driver.prompts) == 2
+    assert m["token_usage"] == 160
+    assert m["execution_time"] == 2.5
+    assert m["model_name"] == "some model"
+
+    first, second = engine.item_metrics
+    assert (first["token_usage"], first["execution_time"], first["failure_rate"]) == (60, 1.0, 0)
+    assert first["errors"] == []
+    assert (second["token_usage"], second["execution_time"], second["failure_rate"]) == (100, 1.5, 1)
+    assert second["errors"] and all("cooking" in error for error in second["errors"])
+    assert first["errors"] is not second["errors"]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,68 @@
+import pytest
+
+from structgenie.components.validation import Validator
+from structgenie.engine import StructEngine
+from structgenie.errors import MaxRetriesError
+
+from fixtures import ScriptedDriver
+
+
+@pytest.fixture
+def template():
+    return """Return the genre of a book and a short summary.
+
+# Input
+Book: {book}
+---
+Summary: <str>
+Genre: <str, options=[fiction, non-fiction, fantasy]>
+"""
+
+
+def test_validator_failed_keys(template):
+    engine = StructEngine.from_template(template)
+    validator = Validator.from_output_model(engine.output_model)
+    errors = validator.validate({"summary": "A hobbit goes on a journey.", "genre": "cooking"}, {})
+    assert errors
+    assert validator.failed_keys == ["genre"]
+
+
+def test_partial_regeneration(template):
+    driver = ScriptedDriver.script(
+        (
+            "Summary: A hobbit goes on a journey.\nGenre: cooking",
+            {"model_name": "some model", "token_usage": 100, "execution_time": 1.0},
+        ),
+        ("Genre: fantasy", {"model_name": "some model", "token_usage": 30, "execution_time": 0.5}),
+    )
+
+    engine = StructEngine.from_template(template, fix_validation_partially_by_llm=True, driver=driver)
+    output, m = engine.run(inputs={"book": "The Hobbit"})
+
+    assert output == {"summary": "A hobbit goes on a journey.", "genre": "fantasy"}
+    assert len(driver.prompts) == 2
+    assert m["token_usage"] == 130
+    assert m["execution_time"] == 1.5
+    assert m["failure_rate"] == 1
+
+    partial_prompt = driver.prompts[1]
+    assert "Summary" not in partial_prompt.split("During last generation")[0]
+
+
+def test_partial_regeneration_falls_back_to_full_retry(mocker, template):
+    mocker.patch(
+        'structgenie.engine.StructEngine._call_executor',
+        side_effect=[
+            ("Summary: A hobbit goes on a journey.\nGenre: cooking", {"model_name": "some model"}),
+            ("Genre: baking", {"model_name": "some model"}),
+        ]
+    )
+
+    engine = StructEngine.from_template(template, fix_validation_partially_by_llm=True)
+    engine.max_retries = 0
+    with pytest.raises(MaxRetriesError):
+        engine.run(inputs={"book": "The Hobbit"})
+
+
+if __name__ == '__main__':
+    pytest.main()
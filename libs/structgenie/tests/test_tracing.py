@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import pytest
+
+from structgenie.engine import StructEngine
+from structgenie.engine.async_engine import AsyncEngine
+from structgenie.utils.tracing import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    NOOP_SPAN,
+    NoopTracer,
+    Tracer,
+    STATUS_ERROR,
+)
+
+
+@pytest.fixture
+def template():
+    return """Return the genre of a book.
+
+# Input
+Book: {book}
+---
+Genre: <str, options=[fiction, non-fiction, fantasy]>
+"""
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+def by_name(spans, name):
+    return [span for span in spans if span.name == name]
+
+
+def test_noop_tracer():
+    tracer = NoopTracer()
+    with tracer.span("run", run_id="1") as span:
+        span.set_attribute("attempts", 1)
+    assert span is NOOP_SPAN
+
+
+def test_run_spans(mocker, template, exporter):
+    mocker.patch(
+        'structgenie.engine.StructEngine._call_executor',
+        side_effect=[
+            ("Genre: cooking", {"model_name": "some model", "token_usage": 10}),
+            ("Genre: fantasy", {"model_name": "some model", "token_usage": 12}),
+        ]
+    )
+
+    engine = StructEngine.from_template(template, tracer=Tracer(exporters=[exporter]))
+    output, _ = engine.run(inputs={"book": "The Hobbit"})
+    assert output == {"genre": "fantasy"}
+
+    spans = exporter.spans
+    run_span, = by_name(spans, "run")
+    assert run_span.parent_id is None
+    assert run_span.attributes["attempts"] == 2
+    assert {span.trace_id for span in spans} == {run_span.trace_id}
+
+    attempts = by_name(spans, "attempt")
+    assert [span.attributes["attempt"] for span in attempts] == [0, 1]
+    assert all(span.parent_id == run_span.span_id for span in attempts)
+    assert [span.status for span in attempts][0] == STATUS_ERROR
+
+    phases = ["prep_inputs", "prep_prompt", "format_inputs", "prep_executor", "generate", "parse_output",
+              "validate_output"]
+    second_attempt = [span for span in spans if span.parent_id == attempts[1].span_id]
+    assert [span.name for span in second_attempt] == phases
+    assert second_attempt[1].attributes["is_retry"] is True
+    assert second_attempt[4].attributes["token_usage"] == 12
+    assert all(span.duration >= 0 for span in spans)
+
+
+def test_nested_engines_inherit_tracer(mocker, template, exporter):
+    mocker.patch(
+        'structgenie.engine.StructEngine._call_executor',
+        return_value=("Genre: fantasy", {"model_name": "some model"})
+    )
+    tracer = Tracer(exporters=[exporter])
+    nested_engine = StructEngine.from_template(template)
+
+    with tracer.span("fix_parsing") as parent:
+        nested_engine.run(inputs={"book": "The Hobbit"})
+
+    run_span, = by_name(exporter.spans, "run")
+    assert run_span.parent_id == parent.span_id
+    assert run_span.trace_id == parent.trace_id
+
+
+def test_async_run_spans(mocker, template, exporter):
+    async def call_executor(executor, inputs, return_metrics=False):
+        return "Genre: fantasy", {"model_name": "some model", "execution_time": 0.01}
+
+    mocker.patch('structgenie.engine.async_engine.AsyncEngine._call_executor', side_effect=call_executor)
+
+    engine = AsyncEngine.from_template(template, tracer=Tracer(exporters=[exporter]))
+    asyncio.run(engine.apply([{"book": "The Hobbit"}, {"book": "Dune"}]))
+
+    runs = by_name(exporter.spans, "run")
+    assert len(runs) == 2
+    assert len({span.trace_id for span in runs}) == 2
+    for generate in by_name(exporter.spans, "generate"):
+        assert generate.attributes["hedged"] is False
+        assert generate.trace_id in {span.trace_id for span in runs}
+
+
+def test_file_exporter(mocker, template, tmp_path):
+    mocker.patch(
+        'structgenie.engine.StructEngine._call_executor',
+        return_value=("Genre: fantasy", {"model_name": "some model"})
+    )
+    file_path = tmp_path / "traces.jsonl"
+    engine = StructEngine.from_template(template, tracer=Tracer(exporters=[FileSpanExporter(file_path)]))
+    engine.run(inputs={"book": "The Hobbit"})
+
+    lines = file_path.read_text().splitlines()
+    assert len(lines) == 1
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    span_ids = {span["spanId"] for span in spans}
+    root, = [span for span in spans if "parentSpanId" not in span]
+    assert root["name"] == "run"
+    assert all(span["parentSpanId"] in span_ids for span in spans if span is not root)
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+    assert {"key": "attempts", "value": {"intValue": "1"}} in root["attributes"]